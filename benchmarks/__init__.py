@@ -0,0 +1,10 @@
+"""
+Microbenchmarks for the Bomberman game
+
+Run with ``python -m benchmarks``; see ``python -m benchmarks --help``.
+"""
+import os
+
+# Benchmarks run headless
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
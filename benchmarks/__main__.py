@@ -0,0 +1,51 @@
+"""
+Command line entry point: python -m benchmarks
+"""
+import argparse
+import sys
+from .harness import save_results, load_results, compare, format_results, format_comparison
+from .suites import SUITES, DIFFICULTIES, run_suites
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Bomberman microbenchmarks")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=SUITES,
+                        help="suites to run (default: all)")
+    parser.add_argument("--difficulty", nargs="+", choices=list(DIFFICULTIES), default=list(DIFFICULTIES),
+                        help="difficulties to run (default: all)")
+    parser.add_argument("--size", nargs="+", type=int, default=[None],
+                        help="grid sizes to run (odd, default: the difficulty's own size)")
+    parser.add_argument("--seed", type=int, default=1234, help="level seed")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions")
+    parser.add_argument("--save", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown counted as a regression (default: 0.10)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    def report(result):
+        print(f"  {result['key']}: {result['median_us']:.1f} us", flush=True)
+
+    results = run_suites(args.suite, args.difficulty, args.size, args.seed, args.quick, report)
+    print()
+    print(format_results(results))
+
+    if args.save:
+        save_results(args.save, results)
+        print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        rows = compare(results, load_results(args.compare), args.threshold)
+        print()
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row[4] == "slower"]
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Timing, result storage and baseline comparison for the benchmarks
+"""
+import json
+import platform
+import statistics
+import time
+import pygame
+
+class Benchmark:
+    """One timed operation.
+
+    func is timed; setup, if given, runs untimed before every call so each
+    call starts from the same state.
+    """
+
+    def __init__(self, name, func, params, setup=None, number=20, repeat=5):
+        self.name = name
+        self.func = func
+        self.params = params
+        self.setup = setup
+        self.number = number  # Calls per repeat
+        self.repeat = repeat
+
+    @property
+    def key(self):
+        """Unique id used to match results against a baseline"""
+        params = " ".join(f"{name}={value}" for name, value in sorted(self.params.items()))
+        return f"{self.name} [{params}]" if params else self.name
+
+    def run(self):
+        """Time the benchmark and return its result"""
+        # One untimed call to warm caches
+        if self.setup:
+            self.setup()
+        self.func()
+
+        timings = []
+        for _ in range(self.repeat):
+            total = 0.0
+            for _ in range(self.number):
+                if self.setup:
+                    self.setup()
+                start = time.perf_counter()
+                self.func()
+                total += time.perf_counter() - start
+            timings.append(total / self.number * 1000000)
+
+        return {
+            "key": self.key,
+            "name": self.name,
+            "params": self.params,
+            "calls": self.number * self.repeat,
+            "mean_us": statistics.mean(timings),
+            "median_us": statistics.median(timings),
+            "min_us": min(timings),
+            "stdev_us": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        }
+
+def environment():
+    """Machine details stored alongside results"""
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def save_results(path, results):
+    """Write results as JSON"""
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+def load_results(path):
+    """Read results written by save_results, keyed by benchmark id"""
+    with open(path) as f:
+        data = json.load(f)
+    return {result["key"]: result for result in data["results"]}
+
+def compare(results, baseline, threshold=0.10):
+    """Compare median times against a baseline.
+
+    Returns (key, baseline_us, current_us, change, status) rows where change
+    is the relative difference and status is "slower", "faster", "same" or
+    "new" using the given relative threshold.
+    """
+    rows = []
+    for result in results:
+        base = baseline.get(result["key"])
+        current = result["median_us"]
+        if base is None:
+            rows.append((result["key"], None, current, None, "new"))
+            continue
+
+        change = (current - base["median_us"]) / base["median_us"] if base["median_us"] else 0.0
+        if change > threshold:
+            status = "slower"
+        elif change < -threshold:
+            status = "faster"
+        else:
+            status = "same"
+        rows.append((result["key"], base["median_us"], current, change, status))
+    return rows
+
+def format_results(results):
+    """Table of results"""
+    width = max([len(result["key"]) for result in results] + [9])
+    lines = [f"{'benchmark':<{width}}  {'median us':>12}  {'min us':>12}  {'stdev us':>10}"]
+    for result in results:
+        lines.append(f"{result['key']:<{width}}  {result['median_us']:>12.1f}  "
+                     f"{result['min_us']:>12.1f}  {result['stdev_us']:>10.1f}")
+    return "\n".join(lines)
+
+def format_comparison(rows):
+    """Table of a baseline comparison"""
+    width = max([len(row[0]) for row in rows] + [9])
+    lines = [f"{'benchmark':<{width}}  {'baseline us':>12}  {'current us':>12}  {'change':>8}  status"]
+    for key, base, current, change, status in rows:
+        base_text = f"{base:>12.1f}" if base is not None else f"{'-':>12}"
+        change_text = f"{change * 100:>+7.1f}%" if change is not None else f"{'-':>8}"
+        lines.append(f"{key:<{width}}  {base_text}  {current:>12.1f}  {change_text}  {status}")
+    return "\n".join(lines)
@@ -0,0 +1,203 @@
+"""
+Benchmark definitions for pathfinding, blasts, map generation, AI, assets and rendering
+"""
+import random
+from bomberman import GameController
+from bomberman.assets import GameAssets
+from bomberman.constants import *
+from bomberman.map import generate_many
+from bomberman.sprites import Player, Bomb
+from .harness import Benchmark
+
+DIFFICULTIES = {
+    "EASY": Difficulty.EASY,
+    "NORMAL": Difficulty.NORMAL,
+    "HARD": Difficulty.HARD,
+}
+
+# Names accepted by --suite
+SUITES = ["pathfinding", "escape", "danger", "explode", "generate_map", "assets", "render"]
+
+def make_difficulty(name, size=None):
+    """Difficulty settings, optionally with a different grid size (odd, at least 7)"""
+    difficulty = dict(DIFFICULTIES[name])
+    if size:
+        if size < 7 or size % 2 == 0:
+            raise ValueError(f"Grid size must be odd and at least 7, got {size}")
+        difficulty["size"] = size
+    return difficulty
+
+def make_game(difficulty, seed):
+    """A game set up on a seeded level without menus or the main loop"""
+    random.seed(seed)
+    game = GameController(show_menu=False)
+    game.config.adaptive_quality = False
+    game.setup_game(difficulty)
+    return game
+
+def setup_level(game, difficulty, seed):
+    """Start a fresh seeded level on an existing game"""
+    random.seed(seed)
+    game.setup_game(difficulty)
+
+def empty_tiles(game):
+    """All empty tiles, in scan order"""
+    return [(x, y) for y in range(game.grid_size) for x in range(game.grid_size)
+            if game.grid[y][x] == EMPTY]
+
+def central_tile(game):
+    """The empty tile closest to the middle of the map"""
+    middle = game.grid_size // 2
+    return min(empty_tiles(game), key=lambda tile: abs(tile[0] - middle) + abs(tile[1] - middle))
+
+def place_bombs(game, count, timer=30):
+    """Put bombs about to explode on a spread of empty tiles"""
+    tiles = empty_tiles(game)
+    step = max(1, len(tiles) // count)
+    for x, y in tiles[step // 2::step][:count]:
+        bomb = Bomb(x, y, game.assets.fire_bomb_img, BombType.FIRE, game.player)
+        bomb.timer = timer
+        game.bombs.append(bomb)
+
+def pathfinding_benchmarks(game, params, number, repeat):
+    """A* and D* Lite paths from every enemy to the player"""
+    ais = [enemy.ai for enemy in game.enemies if enemy.ai]
+    for ai in ais:
+        ai.target_x, ai.target_y = game.player.x, game.player.y
+
+    def astar():
+        for ai in ais:
+            ai.incremental_planning = False
+            ai.find_path_to_target(game)
+
+    def reset_planners():
+        for ai in ais:
+            ai.incremental_planning = True
+            ai.planner = None
+
+    def dstar():
+        for ai in ais:
+            ai.incremental_planning = True
+            ai.find_path_to_target(game)
+
+    return [
+        Benchmark("find_path_to_target[astar]", astar, params, number=number, repeat=repeat),
+        Benchmark("find_path_to_target[dstar_cold]", dstar, params, setup=reset_planners,
+                  number=number, repeat=repeat),
+        Benchmark("find_path_to_target[dstar_warm]", dstar, params, number=number, repeat=repeat),
+    ]
+
+def escape_benchmarks(game, params, number, repeat):
+    """can_escape_after_bomb for every enemy"""
+    ais = [enemy.ai for enemy in game.enemies if enemy.ai]
+
+    def escape():
+        for ai in ais:
+            ai.can_escape_after_bomb(game)
+
+    return [Benchmark("can_escape_after_bomb", escape, params, number=number, repeat=repeat)]
+
+def danger_benchmarks(game, params, number, repeat):
+    """is_tile_in_danger for every tile with several bombs about to explode"""
+    ai = next(enemy.ai for enemy in game.enemies if enemy.ai)
+    size = game.grid_size
+
+    def setup():
+        game.bombs = []
+        place_bombs(game, 6)
+
+    def danger():
+        for y in range(size):
+            for x in range(size):
+                ai.is_tile_in_danger(x, y, game)
+
+    return [Benchmark("is_tile_in_danger[all_tiles]", danger, params, setup=setup,
+                      number=number, repeat=repeat)]
+
+def explode_benchmarks(game, params, number, repeat):
+    """explode_bomb for a long-range bomb in the middle of the map, restoring the level each call"""
+    saved_grid = [row[:] for row in game.grid]
+    saved_enemies = list(game.enemies)
+    x, y = central_tile(game)
+
+    def setup():
+        for row, saved_row in zip(game.grid, saved_grid):
+            row[:] = saved_row
+        game.map.blast_table.rebuild(game.grid, game.grid_size)
+        game.enemies = list(saved_enemies)
+        game.player = Player(1, 1, game.assets.player_img)
+        game.explosions = []
+        game.particles.clear()
+        game.powerup_manager.powerups = []
+        game.bombs = []
+
+    def explode():
+        bomb = Bomb(x, y, game.assets.fire_bomb_img, BombType.FIRE, game.player)
+        bomb.range = 4
+        game.explode_bomb(bomb)
+
+    return [Benchmark("explode_bomb", explode, params, setup=setup, number=number, repeat=repeat)]
+
+def generate_map_benchmarks(game, params, number, repeat):
+    """Map.generate_map on the current level, and a pool of 100 maps from generate_many"""
+    def generate_pool():
+        for _ in generate_many(100, 1, game.difficulty):
+            pass
+
+    return [Benchmark("generate_map", game.map.generate_map, params,
+                      number=max(1, number // 4), repeat=repeat),
+            Benchmark("generate_many_100", generate_pool, params, number=1, repeat=repeat)]
+
+def assets_benchmarks(game, params, number, repeat):
+    """GameAssets construction (independent of the level)"""
+    return [Benchmark("GameAssets", GameAssets, {}, number=1, repeat=repeat)]
+
+def render_benchmarks(game, params, number, repeat):
+    """A full frame render with bombs and explosions on screen"""
+    def setup():
+        if not game.bombs:
+            place_bombs(game, 4, timer=120)
+
+    return [Benchmark("render", game.render, params, setup=setup, number=number, repeat=repeat)]
+
+SUITE_BUILDERS = {
+    "pathfinding": pathfinding_benchmarks,
+    "escape": escape_benchmarks,
+    "danger": danger_benchmarks,
+    "explode": explode_benchmarks,
+    "generate_map": generate_map_benchmarks,
+    "assets": assets_benchmarks,
+    "render": render_benchmarks,
+}
+
+def run_suites(suites, difficulties, sizes, seed=1234, quick=False, report=None):
+    """Run the selected suites for every difficulty and grid size and return the results"""
+    number, repeat = (5, 3) if quick else (20, 5)
+    results = []
+    game = None
+    assets_done = False
+
+    for name in difficulties:
+        for size in sizes:
+            difficulty = make_difficulty(name, size)
+            params = {"difficulty": name, "size": difficulty["size"]}
+
+            for suite in suites:
+                if suite == "assets":
+                    # Does not depend on the level, run it once
+                    if assets_done:
+                        continue
+                    assets_done = True
+
+                # Every suite starts from the same fresh level
+                if game is None:
+                    game = make_game(difficulty, seed)
+                else:
+                    setup_level(game, difficulty, seed)
+
+                for benchmark in SUITE_BUILDERS[suite](game, params, number, repeat):
+                    result = benchmark.run()
+                    results.append(result)
+                    if report:
+                        report(result)
+    return results
@@ -0,0 +1,104 @@
+"""
+Time-budgeted scheduler that staggers enemy AI decisions across frames
+"""
+import heapq
+import random
+import time
+from .constants import *
+
+class AIScheduler:
+    """Runs due enemy decisions in priority order until the frame budget is spent.
+
+    Decisions are generators (see EnemyAI.decision_steps), so a decision that
+    does not fit in the remaining budget is resumed on the next frame.
+    """
+
+    def __init__(self, budget_us=AI_FRAME_BUDGET_US["NORMAL"]):
+        self.budget_us = budget_us
+        self.active = {}  # Enemy -> decision generator that has started but not finished
+        self.waiting = {}  # Enemy -> frames spent waiting while due
+        self.last_frame_us = 0  # Time spent in the most recent update
+        self.frame_deadline = None  # perf_counter() time the current frame's budget runs out
+        self.deferred = 0  # Due decisions pushed to the next frame in the most recent update
+
+    def reset(self, budget_us):
+        """Forget pending work and set a new per-frame budget"""
+        self.budget_us = budget_us
+        self.active = {}
+        self.waiting = {}
+
+    def stagger(self, enemies):
+        """Give each enemy a random phase so they do not all decide on the same frame"""
+        for enemy in enemies:
+            if enemy.ai:
+                enemy.ai.last_decision_time = random.randint(0, enemy.ai.decision_cooldown - 1)
+
+    def priority(self, enemy, game):
+        """Sort key for a due enemy, smaller runs first"""
+        # Finish decisions already in progress before starting new ones
+        in_progress = 0 if enemy in self.active else 1
+
+        # Enemies in danger must react now
+        in_danger = 0 if enemy.ai.is_in_danger(game) else 1
+
+        # Then prefer enemies close to the player, aging the ones that keep waiting
+        distance = abs(enemy.x - game.player.x) + abs(enemy.y - game.player.y)
+        return (in_progress, in_danger, distance - self.waiting.get(enemy, 0) * 2)
+
+    def update(self, game):
+        """Advance enemy decisions within the per-frame CPU budget"""
+        start = time.perf_counter()
+        self.frame_deadline = start + self.budget_us / 1000000
+
+        # Drop work belonging to enemies that no longer exist
+        alive = set(game.enemies)
+        for enemy in list(self.active):
+            if enemy not in alive:
+                del self.active[enemy]
+        for enemy in list(self.waiting):
+            if enemy not in alive:
+                del self.waiting[enemy]
+
+        # Collect enemies whose decision is due or already under way
+        queue = []
+        for index, enemy in enumerate(game.enemies):
+            if not enemy.ai:
+                continue
+            if enemy in self.active or enemy.ai.tick():
+                heapq.heappush(queue, (self.priority(enemy, game), index, enemy))
+
+        steps = 0
+        while queue:
+            # Always make some progress, then stop once the budget is spent
+            elapsed_us = (time.perf_counter() - start) * 1000000
+            if steps > 0 and elapsed_us >= self.budget_us:
+                break
+
+            _, index, enemy = heapq.heappop(queue)
+            if enemy not in alive:
+                self.active.pop(enemy, None)
+                continue
+
+            job = self.active.get(enemy)
+            if job is None:
+                job = enemy.ai.decision_steps(game)
+
+            steps += 1
+            try:
+                next(job)
+            except StopIteration:
+                self.active.pop(enemy, None)
+                self.waiting.pop(enemy, None)
+                continue
+
+            # Unfinished decisions go back in the queue ahead of new ones
+            self.active[enemy] = job
+            heapq.heappush(queue, (self.priority(enemy, game), index, enemy))
+
+        # Whatever is left waits for the next frame and gains priority
+        self.deferred = len(queue)
+        for _, _, enemy in queue:
+            self.waiting[enemy] = self.waiting.get(enemy, 0) + 1
+
+        self.frame_deadline = None
+        self.last_frame_us = (time.perf_counter() - start) * 1000000
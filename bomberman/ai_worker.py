@@ -0,0 +1,245 @@
+"""
+Off-main-thread enemy AI using immutable world snapshots
+"""
+import multiprocessing
+import queue
+import threading
+from collections import namedtuple
+from .sprites import Enemy
+from .enemy_ai import EnemyAI
+from .flow_field import FlowField
+from .blast_table import BlastTable
+from .utility_maps import UtilityMaps
+
+# Compact, immutable description of the world sent to the worker every tick
+WorldSnapshot = namedtuple("WorldSnapshot", ["tick", "grid_size", "grid", "bombs", "player",
+                                             "enemies", "powerups", "difficulty"])
+BombState = namedtuple("BombState", ["x", "y", "timer", "range"])
+PlayerState = namedtuple("PlayerState", ["x", "y", "health", "speed_boost", "shield"])
+EnemyState = namedtuple("EnemyState", ["id", "x", "y", "frozen", "active_bomb", "bomb_cooldown",
+                                       "aggression", "caution", "intelligence",
+                                       "bombs_placed", "successful_hits"])
+PowerUpState = namedtuple("PowerUpState", ["x", "y"])
+
+# What an enemy wants to do, decided from the snapshot of the given tick
+AIIntent = namedtuple("AIIntent", ["tick", "enemy_id", "from_x", "from_y", "x", "y",
+                                   "place_bomb", "state"])
+
+def take_snapshot(game, tick, difficulty):
+    """Capture the parts of the game state the enemy AI reads"""
+    grid = bytes(tile for row in game.grid for tile in row)
+    bombs = tuple(BombState(bomb.x, bomb.y, bomb.timer, getattr(bomb, 'range', 2))
+                  for bomb in game.bombs)
+    player = PlayerState(game.player.x, game.player.y, game.player.health,
+                         game.player.speed_boost, game.player.shield)
+    enemies = tuple(EnemyState(enemy.serial, enemy.x, enemy.y, enemy.frozen, enemy.active_bomb,
+                               enemy.bomb_cooldown, enemy.ai.aggression, enemy.ai.caution,
+                               enemy.ai.intelligence, enemy.ai.bombs_placed,
+                               enemy.ai.successful_hits)
+                    for enemy in game.enemies if enemy.ai)
+    powerups = tuple(PowerUpState(powerup.x, powerup.y)
+                     for powerup in game.powerup_manager.powerups)
+    return WorldSnapshot(tick, game.grid_size, grid, bombs, player, enemies, powerups, difficulty)
+
+class ShadowEnemy(Enemy):
+    """Worker-side copy of an enemy that records bomb placements instead of making bombs"""
+
+    def __init__(self, x, y):
+        super().__init__(x, y, None)
+        self.wants_bomb = False
+
+    def try_place_bomb(self, game):
+        if self.active_bomb or self.bomb_cooldown > 0:
+            return False
+        if any(bomb.x == self.x and bomb.y == self.y for bomb in game.bombs):
+            return False
+
+        # Reserve the tile so the rest of this decision sees the bomb
+        game.bombs.append(BombState(self.x, self.y, 120, 2))
+        self.active_bomb = True
+        self.wants_bomb = True
+        return True
+
+class PowerUpView:
+    """Minimal stand-in for PowerUpManager exposing only the power-up list"""
+
+    def __init__(self):
+        self.powerups = []
+
+class SnapshotWorld:
+    """Game-like view of a snapshot that EnemyAI can read on the worker"""
+
+    def __init__(self):
+        self.grid_size = 0
+        self.grid = []
+        self.grid_version = 0
+        self.bombs = []
+        self.player = None
+        self.powerup_manager = PowerUpView()
+        self.flow_field = FlowField()
+        self.blast_table = BlastTable()
+        self.utility_maps = UtilityMaps()
+
+    def apply(self, snapshot):
+        """Update the world in place and return the tiles that changed"""
+        size = snapshot.grid_size
+        changed_tiles = []
+
+        if size != self.grid_size:
+            # New level size, rebuild everything
+            self.grid_size = size
+            self.grid = [list(snapshot.grid[y * size:(y + 1) * size]) for y in range(size)]
+            self.grid_version += 1
+            self.blast_table.rebuild(self.grid, size)
+        else:
+            for y in range(size):
+                row = self.grid[y]
+                new_row = snapshot.grid[y * size:(y + 1) * size]
+                for x in range(size):
+                    if row[x] != new_row[x]:
+                        row[x] = new_row[x]
+                        changed_tiles.append((x, y))
+                        self.blast_table.tile_changed(x, y)
+            if changed_tiles:
+                self.grid_version += 1
+
+        self.bombs = list(snapshot.bombs)
+        self.player = snapshot.player
+        self.powerup_manager.powerups = list(snapshot.powerups)
+        self.flow_field.update(self.grid, size, self.bombs,
+                               [(self.player.x, self.player.y)], self.grid_version)
+        self.utility_maps.update(self.grid, size, self.bombs,
+                                 self.powerup_manager.powerups, self.grid_version)
+        return changed_tiles
+
+def decide(world, brains, snapshot, last_tick):
+    """Run one round of AI decisions for a snapshot and return the intents"""
+    changed_tiles = world.apply(snapshot)
+    elapsed = max(1, snapshot.tick - last_tick) if last_tick is not None else 1
+    intents = []
+    seen = set()
+
+    for state in snapshot.enemies:
+        seen.add(state.id)
+        brain = brains.get(state.id)
+        if brain is None:
+            brain = EnemyAI(ShadowEnemy(state.x, state.y), snapshot.difficulty)
+            brains[state.id] = brain
+
+        # The main thread is authoritative, refresh the shadow from the snapshot
+        shadow = brain.enemy
+        shadow.x, shadow.y = state.x, state.y
+        shadow.frozen = state.frozen
+        shadow.active_bomb = state.active_bomb
+        shadow.bomb_cooldown = state.bomb_cooldown
+        shadow.wants_bomb = False
+        brain.aggression = state.aggression
+        brain.caution = state.caution
+        brain.intelligence = state.intelligence
+        brain.bombs_placed = state.bombs_placed
+        brain.successful_hits = state.successful_hits
+
+        if changed_tiles:
+            brain.notify_tiles_changed(changed_tiles)
+
+        # Account for ticks skipped while the worker was busy
+        brain.last_decision_time = max(0, brain.last_decision_time - (elapsed - 1))
+        brain.update(world)
+
+        if shadow.wants_bomb or (shadow.x, shadow.y) != (state.x, state.y):
+            intents.append(AIIntent(snapshot.tick, state.id, state.x, state.y,
+                                    shadow.x, shadow.y, shadow.wants_bomb, brain.state))
+
+    # Forget enemies that are gone
+    for enemy_id in list(brains):
+        if enemy_id not in seen:
+            del brains[enemy_id]
+
+    return intents
+
+def run_worker(inbox, outbox):
+    """Worker loop: always decide on the newest snapshot, dropping stale ones"""
+    world = SnapshotWorld()
+    brains = {}
+    last_tick = None
+
+    while True:
+        snapshot = inbox.get()
+        if snapshot is None:
+            break
+
+        # Skip to the most recent snapshot if the main loop got ahead of us
+        try:
+            while True:
+                newer = inbox.get_nowait()
+                if newer is None:
+                    return
+                snapshot = newer
+        except queue.Empty:
+            pass
+
+        intents = decide(world, brains, snapshot, last_tick)
+        last_tick = snapshot.tick
+        outbox.put(intents)
+
+class AIWorker:
+    """Runs enemy AI on a worker thread or process and applies its intents a tick later"""
+
+    def __init__(self, mode="thread"):
+        self.mode = mode
+        self.tick = 0
+        if mode == "process":
+            self.inbox = multiprocessing.Queue()
+            self.outbox = multiprocessing.Queue()
+            self.worker = multiprocessing.Process(target=run_worker, args=(self.inbox, self.outbox),
+                                                  daemon=True)
+        else:
+            self.inbox = queue.Queue()
+            self.outbox = queue.Queue()
+            self.worker = threading.Thread(target=run_worker, args=(self.inbox, self.outbox),
+                                           daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        """Ask the worker to finish"""
+        self.inbox.put(None)
+
+    def exchange(self, game, difficulty):
+        """Apply intents that are ready, then send the current world to the worker"""
+        self.apply_intents(game, self.poll())
+        self.tick += 1
+        self.inbox.put(take_snapshot(game, self.tick, difficulty))
+
+    def poll(self):
+        """Collect all intents returned so far without blocking"""
+        intents = []
+        try:
+            while True:
+                intents.extend(self.outbox.get_nowait())
+        except queue.Empty:
+            pass
+        return intents
+
+    def apply_intents(self, game, intents):
+        """Carry out intents that are still valid in the current world"""
+        enemies = {enemy.serial: enemy for enemy in game.enemies}
+
+        for intent in intents:
+            enemy = enemies.get(intent.enemy_id)
+            if enemy is None or enemy.frozen > 0:
+                continue
+            # Skip intents decided from a position the enemy has since left
+            if (enemy.x, enemy.y) != (intent.from_x, intent.from_y):
+                continue
+
+            if enemy.ai:
+                enemy.ai.state = intent.state
+
+            if intent.place_bomb:
+                enemy.try_place_bomb(game)
+
+            if (intent.x, intent.y) != (enemy.x, enemy.y):
+                # Only single steps onto walkable tiles are accepted
+                if (abs(intent.x - enemy.x) + abs(intent.y - enemy.y) == 1 and
+                    game.map.is_valid_move(intent.x, intent.y, game.bombs)):
+                    enemy.x, enemy.y = intent.x, intent.y
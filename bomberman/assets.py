@@ -5,6 +5,40 @@ import pygame
 import random
 import math
 from .constants import *
+from .sound_synth import load_synth_sounds, VoiceManager
+
+# Tiles drawn straight onto the black background, flattened so they carry no per-pixel alpha
+OPAQUE_IMAGES = ("wall_img", "destructible_wall_img", "empty_img")
+
+# Sprites drawn over the map, which keep their alpha
+SPRITE_IMAGES = (
+    "player_img", "enemy_img",
+    "fire_bomb_img", "ice_bomb_img", "mega_bomb_img",
+    "explosion_img", "fire_explosion_img", "ice_explosion_img", "mega_explosion_img",
+    "heart_img", "health_segment_img",
+    "speed_powerup_img", "bomb_powerup_img", "range_powerup_img", "shield_powerup_img",
+    "life_powerup_img", "remote_powerup_img", "armor_powerup_img", "health_powerup_img",
+    "ice_immunity_powerup_img",
+)
+
+# Widest row of an atlas in pixels
+ATLAS_WIDTH = 512
+
+def pack_atlas(images):
+    """Place images on shelves, tallest first. Returns the atlas size and a rect per name"""
+    order = sorted(images, key=lambda name: images[name].get_height(), reverse=True)
+    rects = {}
+    x = y = shelf_height = width = 0
+    for name in order:
+        w, h = images[name].get_size()
+        if x and x + w > ATLAS_WIDTH:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        rects[name] = pygame.Rect(x, y, w, h)
+        x += w
+        width = max(width, x)
+        shelf_height = max(shelf_height, h)
+    return (max(1, width), max(1, y + shelf_height)), rects
 
 class GameAssets:
     def __init__(self):
@@ -53,9 +87,55 @@ class GameAssets:
         self.health_powerup_img = self.create_powerup_image(TILE_SIZE, GREEN, "H")
         self.ice_immunity_powerup_img = self.create_powerup_image(TILE_SIZE, (150, 220, 255), "I")
         
+        # Generated images, kept so atlases can be rebuilt for a new display format
+        self.source_images = {name: getattr(self, name) for name in OPAQUE_IMAGES + SPRITE_IMAGES}
+        self.display_format = None
+        self.tile_atlas = None
+        self.sprite_atlas = None
+        
         # Load sounds
         self.load_sounds()
     
+    def convert_for_display(self):
+        """Pack the images into display-format atlases once a display mode exists.
+
+        Tiles go into an opaque atlas and sprites into a per-pixel alpha atlas;
+        the image attributes become subsurfaces of them. Returns a mapping from
+        id() of each replaced surface to its replacement, empty when nothing
+        changed (no display yet, or the display format is the same as before).
+        """
+        display = pygame.display.get_surface()
+        if display is None:
+            return {}
+        display_format = (display.get_bitsize(), display.get_masks())
+        if display_format == self.display_format:
+            return {}
+        self.display_format = display_format
+        
+        replaced = {}
+        
+        # Tiles are flattened onto black, which is what the screen is cleared to before the map is drawn
+        tiles = {name: self.source_images[name] for name in OPAQUE_IMAGES}
+        size, rects = pack_atlas(tiles)
+        self.tile_atlas = pygame.Surface(size).convert()
+        self.tile_atlas.fill(BLACK)
+        for name, rect in rects.items():
+            self.tile_atlas.blit(tiles[name], rect)
+            replaced[id(getattr(self, name))] = self.tile_atlas.subsurface(rect)
+        
+        # Sprites are copied as they are, alpha included
+        sprites = {name: self.source_images[name] for name in SPRITE_IMAGES}
+        size, rects = pack_atlas(sprites)
+        self.sprite_atlas = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        self.sprite_atlas.fill((0, 0, 0, 0))
+        for name, rect in rects.items():
+            self.sprite_atlas.blit(sprites[name], rect, special_flags=pygame.BLEND_RGBA_MAX)
+            replaced[id(getattr(self, name))] = self.sprite_atlas.subsurface(rect)
+        
+        for name in OPAQUE_IMAGES + SPRITE_IMAGES:
+            setattr(self, name, replaced[id(getattr(self, name))])
+        return replaced
+    
     def create_placeholder_image(self, size, color, alpha=255, shape="square", border_color=None):
         img = pygame.Surface((size, size), pygame.SRCALPHA)
         
@@ -557,23 +637,14 @@ class GameAssets:
         return img
     
     def load_sounds(self):
-        # Initialize sound dictionary
-        self.sounds = {}
-        
-        # We'll use placeholder sounds for now
-        # In a real game, you would load actual sound files
-        try:
-            self.sounds["explosion"] = pygame.mixer.Sound("explosion.wav")
-            self.sounds["pickup"] = pygame.mixer.Sound("pickup.wav")
-        except:
-            # If sound files don't exist, create dummy sound objects
-            class DummySound:
-                def play(self): pass
-            
-            self.sounds["explosion"] = DummySound()
-            self.sounds["pickup"] = DummySound()
+        """Synthesized sound effects (empty without a mixer or NumPy, the game is then silent)"""
+        self.sounds = load_synth_sounds()
+        self.voices = VoiceManager(self.sounds)
     
     def play_sound(self, sound_name):
-        """Play a sound by name"""
-        if sound_name in self.sounds:
-            self.sounds[sound_name].play()
\ No newline at end of file
+        """Queue a sound by name, it is played on the next flush_sounds"""
+        self.voices.request(sound_name)
+    
+    def flush_sounds(self, enabled=True, volume=1.0):
+        """Play the sounds queued this frame, merging repeats"""
+        self.voices.flush(enabled, volume)
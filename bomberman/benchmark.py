@@ -0,0 +1,116 @@
+"""
+Built-in frame time benchmark on a fixed, seeded scenario
+"""
+import random
+import pygame
+from .constants import *
+from .scenarios import ScenarioBuilder
+
+BENCHMARK_DIFFICULTIES = {
+    "EASY": Difficulty.EASY,
+    "NORMAL": Difficulty.NORMAL,
+    "HARD": Difficulty.HARD,
+}
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(times):
+    """Average, percentiles and worst case of a list of times in milliseconds"""
+    ordered = sorted(times)
+    average = sum(ordered) / len(ordered) if ordered else 0.0
+    return {
+        "avg": average,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+class FrameBenchmark:
+    """Plays a scripted game for a fixed number of frames and records frame times.
+
+    The level and the scripted player are seeded, so runs with the same seed
+    play the same scenario (enemy AI still adapts to its time budget). The
+    player is revived on game over so every run lasts the full length.
+    A scenario name (see scenarios.SCENARIOS) starts from that worst case
+    instead of a fresh level.
+    """
+
+    def __init__(self, game, frames=1200, seed=1234, difficulty=Difficulty.HARD, scenario=None):
+        self.game = game
+        self.frames = frames
+        self.seed = seed
+        self.difficulty = difficulty
+        self.scenario = scenario
+
+    def run(self):
+        """Run the scenario and return frame and work time statistics"""
+        game = self.game
+        rng = random.Random(self.seed)
+        if self.scenario:
+            ScenarioBuilder(game, self.seed).build(self.scenario, self.difficulty)
+        else:
+            random.seed(self.seed)
+            game.setup_game(self.difficulty)
+            game.particles.seed(self.seed)
+
+        frame_times = []
+        work_times = []
+        game.frame_pacer.wait()
+
+        for frame in range(self.frames):
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                break
+
+            self.play(rng, frame)
+            game.update()
+            if game.game_over:
+                self.revive()
+            game.render()
+            game.present()
+
+            game.frame_pacer.wait()
+            frame_times.append(game.frame_pacer.frame_ms)
+            work_times.append(game.frame_pacer.work_ms)
+
+        return {
+            "frames": len(frame_times),
+            "scenario": self.scenario,
+            "pacing": game.frame_pacer.mode,
+            "quality": game.config.graphics_quality,
+            "frame": summarize(frame_times),
+            "work": summarize(work_times),
+        }
+
+    def play(self, rng, frame):
+        """Scripted player: wander every few frames and bomb now and then"""
+        player = self.game.player
+        if frame % 8 == 0:
+            dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+            player.move(dx, dy, self.game)
+        if frame % 90 == 45:
+            player.place_bomb(self.game)
+
+    def revive(self):
+        """Keep the scenario running after the player dies"""
+        self.game.game_over = False
+        self.game.player.lives = 3
+        self.game.player.health = 5
+
+def format_report(stats):
+    """Human readable benchmark results"""
+    lines = [f"Frames: {stats['frames']}  pacing: {stats['pacing']}  quality: {stats['quality']}"]
+    if stats.get("scenario"):
+        lines[0] += f"  scenario: {stats['scenario']}"
+    for name in ("frame", "work"):
+        values = stats[name]
+        fps = 1000 / values["avg"] if values["avg"] > 0 else 0
+        lines.append(f"{name:>5} ms  avg {values['avg']:.2f}  p50 {values['p50']:.2f}  "
+                     f"p95 {values['p95']:.2f}  p99 {values['p99']:.2f}  max {values['max']:.2f}"
+                     f"  ({fps:.0f} fps)")
+    return "\n".join(lines)
@@ -0,0 +1,118 @@
+"""
+Precomputed blast-line tables for constant-time explosion queries
+"""
+from .constants import *
+
+# Direction order used by the tables
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+EAST, WEST, SOUTH, NORTH = 0, 1, 2, 3
+
+class BlastTable:
+    """For every tile and direction, the distance to the next non-empty tile.
+
+    A distance of k means tiles 1..k-1 in that direction are empty and tile k
+    is a wall, a destructible wall or outside the grid. Blasts stop there, so
+    bomb coverage and exposure become lookups. Only the row and column of a
+    changed tile need updating.
+    """
+
+    def __init__(self):
+        self.grid = None
+        self.grid_size = 0
+        self.reach = [[], [], [], []]  # One flat table per direction
+
+    def rebuild(self, grid, grid_size):
+        """Compute all four tables for a new grid"""
+        self.grid = grid
+        self.grid_size = grid_size
+        self.reach = [[0] * (grid_size * grid_size) for _ in DIRECTIONS]
+        for y in range(grid_size):
+            self.update_row(y)
+        for x in range(grid_size):
+            self.update_column(x)
+
+    def tile_changed(self, x, y):
+        """Refresh the row and column crossing a changed tile"""
+        self.update_row(y)
+        self.update_column(x)
+
+    def update_row(self, y):
+        """Recompute east and west distances for one row"""
+        size = self.grid_size
+        row = self.grid[y]
+        east = self.reach[EAST]
+        west = self.reach[WEST]
+        base = y * size
+
+        distance = 0
+        for x in range(size - 1, -1, -1):
+            distance = 1 if x + 1 >= size or row[x + 1] != EMPTY else distance + 1
+            east[base + x] = distance
+
+        distance = 0
+        for x in range(size):
+            distance = 1 if x - 1 < 0 or row[x - 1] != EMPTY else distance + 1
+            west[base + x] = distance
+
+    def update_column(self, x):
+        """Recompute south and north distances for one column"""
+        size = self.grid_size
+        grid = self.grid
+        south = self.reach[SOUTH]
+        north = self.reach[NORTH]
+
+        distance = 0
+        for y in range(size - 1, -1, -1):
+            distance = 1 if y + 1 >= size or grid[y + 1][x] != EMPTY else distance + 1
+            south[y * size + x] = distance
+
+        distance = 0
+        for y in range(size):
+            distance = 1 if y - 1 < 0 or grid[y - 1][x] != EMPTY else distance + 1
+            north[y * size + x] = distance
+
+    def blocker_distance(self, x, y, direction):
+        """Steps from (x, y) to the first non-empty tile in a direction"""
+        return self.reach[direction][y * self.grid_size + x]
+
+    def blast_line(self, x, y, direction, bomb_range):
+        """Empty tiles covered in one direction and the blocking tile if it is in range
+
+        Returns (open_count, blocker) where the covered empty tiles are steps
+        1..open_count and blocker is the (x, y) of the first non-empty tile, or
+        None when it lies beyond the range or outside the grid.
+        """
+        distance = self.reach[direction][y * self.grid_size + x]
+        open_count = min(bomb_range, distance - 1)
+        blocker = None
+        if distance <= bomb_range:
+            dx, dy = DIRECTIONS[direction]
+            bx, by = x + dx * distance, y + dy * distance
+            if 0 <= bx < self.grid_size and 0 <= by < self.grid_size:
+                blocker = (bx, by)
+        return open_count, blocker
+
+    def covered_tiles(self, x, y, bomb_range):
+        """Empty tiles a bomb at (x, y) would cover, including its own tile"""
+        tiles = [(x, y)]
+        for direction, (dx, dy) in enumerate(DIRECTIONS):
+            open_count, _ = self.blast_line(x, y, direction, bomb_range)
+            for i in range(1, open_count + 1):
+                tiles.append((x + dx * i, y + dy * i))
+        return tiles
+
+    def is_exposed(self, tx, ty, bx, by, bomb_range):
+        """Check if a tile is reached by a blast from (bx, by) with no wall in between"""
+        if bx == tx:
+            offset = ty - by
+            direction = SOUTH if offset > 0 else NORTH
+        elif by == ty:
+            offset = tx - bx
+            direction = EAST if offset > 0 else WEST
+        else:
+            return False
+
+        offset = abs(offset)
+        if offset == 0:
+            return True
+        return offset <= bomb_range and offset <= self.reach[direction][by * self.grid_size + bx]
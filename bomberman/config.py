@@ -1,7 +1,7 @@
 """
 Configuration settings for the Bomberman game
 """
-from .constants import GRAPHICS_QUALITY
+from .constants import GRAPHICS_QUALITY, SEARCH_AI_BUDGET_MS
 
 class GameConfig:
     def __init__(self):
@@ -21,6 +21,14 @@ class GameConfig:
         self.particle_effects = True
         self.screen_shake = True
         
+        # Performance settings
+        self.ai_worker = None  # None (main thread), "thread" or "process"
+        self.search_ai = False  # Tree-search enemies on HARD
+        self.search_ai_budget_ms = SEARCH_AI_BUDGET_MS  # Search time per enemy per frame
+        self.dirty_rects = False  # Push only changed screen regions instead of flipping
+        self.adaptive_quality = True  # Adjust graphics_quality to the measured frame time
+        self.frame_pacing = None  # "vsync", "precise", "capped", "uncapped"; None follows vsync
+        
     def set_graphics_quality(self, quality):
         """Set graphics quality level"""
         if quality in GRAPHICS_QUALITY:
@@ -28,6 +36,12 @@ class GameConfig:
             return True
         return False
     
+    def get_frame_pacing(self):
+        """Frame pacing mode to use"""
+        if self.frame_pacing:
+            return self.frame_pacing
+        return "vsync" if self.vsync else "capped"
+    
     def toggle_fullscreen(self):
         """Toggle fullscreen mode"""
         self.fullscreen = not self.fullscreen
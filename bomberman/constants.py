@@ -9,9 +9,9 @@ FPS = 60
 
 # Graphics quality settings
 GRAPHICS_QUALITY = {
-    "LOW": {"particles": 5, "glow_effects": False, "animation_frames": 3},
-    "MEDIUM": {"particles": 15, "glow_effects": True, "animation_frames": 5},
-    "HIGH": {"particles": 30, "glow_effects": True, "animation_frames": 8}
+    "LOW": {"particles": 5, "glow_effects": False, "animation_frames": 3, "smooth_scaling": False},
+    "MEDIUM": {"particles": 15, "glow_effects": True, "animation_frames": 5, "smooth_scaling": True},
+    "HIGH": {"particles": 30, "glow_effects": True, "animation_frames": 8, "smooth_scaling": True}
 }
 
 # Default to medium quality
@@ -63,9 +63,22 @@ BOMB_EFFECTS = {
 
 # Difficulty settings
 class Difficulty:
-    EASY = {"size": 13, "enemies": 3, "walls_percent": 0.15, "skills_count": 3, "npc_bomb_chance": 0.01}
-    NORMAL = {"size": 15, "enemies": 5, "walls_percent": 0.2, "skills_count": 5, "npc_bomb_chance": 0.02}
-    HARD = {"size": 17, "enemies": 8, "walls_percent": 0.25, "skills_count": 8, "npc_bomb_chance": 0.03}
+    EASY = {"name": "EASY", "size": 13, "enemies": 3, "walls_percent": 0.15, "skills_count": 3, "npc_bomb_chance": 0.01}
+    NORMAL = {"name": "NORMAL", "size": 15, "enemies": 5, "walls_percent": 0.2, "skills_count": 5, "npc_bomb_chance": 0.02}
+    HARD = {"name": "HARD", "size": 17, "enemies": 8, "walls_percent": 0.25, "skills_count": 8, "npc_bomb_chance": 0.03}
+
+# Per-frame CPU budget for enemy AI decisions in microseconds
+AI_FRAME_BUDGET_US = {
+    "EASY": 1500,
+    "NORMAL": 2500,
+    "HARD": 4000
+}
+
+# Tree-search time per enemy decision slice in milliseconds
+SEARCH_AI_BUDGET_MS = 2.0
+
+# Frames the level-cleared banner stays on screen after switching to the next level
+LEVEL_TRANSITION_FRAMES = 90
 
 # Tile types for grid
 EMPTY = 0
@@ -0,0 +1,99 @@
+"""
+Dirty-rectangle display updates for software-rendered displays
+"""
+import pygame
+from .constants import *
+
+class DirtyRectTracker:
+    """Pushes only the screen regions that changed since the last frame.
+
+    The frame is still rendered in full to the screen surface; only the copy
+    to the display is limited to tiles with something animated or moving on
+    them (this frame or the last, so old positions get erased), map tiles
+    that changed, the particle area and the HUD when its values change.
+    Overlays, menus and frames where too much changed fall back to a flip.
+    """
+
+    def __init__(self, max_fraction=0.4):
+        self.max_fraction = max_fraction  # Flip instead when more of the screen than this changed
+        self.surface = None
+        self.full = True
+        self.overlay_shown = False
+        self.map = None
+        self.map_version = None
+        self.previous_tiles = set()
+        self.previous_particles = None
+        self.hud_state = None
+        self.full_updates = 0  # Frames presented with a flip (for debugging)
+        self.partial_updates = 0  # Frames presented with rectangles (for debugging)
+
+    def invalidate(self):
+        """Force a full flip on the next frame, e.g. after a menu drew over the game"""
+        self.full = True
+
+    def active_tiles(self, game):
+        """Tiles whose pixels may differ from the previous frame"""
+        tiles = {(game.player.x, game.player.y)}
+        tiles.update((enemy.x, enemy.y) for enemy in game.enemies)
+        tiles.update((bomb.x, bomb.y) for bomb in game.bombs)
+        tiles.update((explosion.x, explosion.y) for explosion in game.explosions)
+        tiles.update((powerup.x, powerup.y) for powerup in game.powerup_manager.powerups)
+        tiles.update((skill.x, skill.y) for skill in game.map.skills
+                     if game.grid[skill.y][skill.x] == EMPTY)
+        return tiles
+
+    def tile_rect(self, x, y):
+        """Screen rectangle of a tile with a small margin for effects drawn past its edge"""
+        margin = TILE_SIZE // 8
+        return pygame.Rect(x * TILE_SIZE - margin, y * TILE_SIZE - margin,
+                           TILE_SIZE + margin * 2, TILE_SIZE + margin * 2)
+
+    def present(self, game, hud_rect):
+        """Send the rendered frame to the display"""
+        surface = pygame.display.get_surface()
+        overlay = (game.paused or game.game_over or game.changing_difficulty or game.debug_mode
+                   or game.level_transition > 0)
+
+        tiles = self.active_tiles(game)
+        particles = game.particles.bounds()
+        hud_state = game.hud_state()
+
+        # Tiles the map changed since the last frame, None if it was regenerated
+        changes = None
+        if game.map is self.map:
+            changes = game.map.changes_since(self.map_version)
+
+        full = (self.full or overlay or self.overlay_shown or changes is None or
+                surface is not self.surface)
+
+        rects = []
+        if not full:
+            dirty_tiles = tiles | self.previous_tiles
+            dirty_tiles.update(changes)
+            rects = [self.tile_rect(x, y) for x, y in dirty_tiles]
+            for area in (particles, self.previous_particles):
+                if area is not None:
+                    rects.append(area)
+            if hud_state != self.hud_state:
+                rects.append(hud_rect)
+
+            screen_area = surface.get_width() * surface.get_height()
+            changed_area = sum(rect.width * rect.height for rect in rects)
+            full = changed_area > screen_area * self.max_fraction
+
+        if full:
+            pygame.display.flip()
+            self.full_updates += 1
+        else:
+            if rects:
+                pygame.display.update(rects)
+            self.partial_updates += 1
+
+        self.surface = surface
+        self.full = False
+        self.overlay_shown = overlay
+        self.map = game.map
+        self.map_version = game.map.version
+        self.previous_tiles = tiles
+        self.previous_particles = particles
+        self.hud_state = hud_state
@@ -0,0 +1,189 @@
+"""
+Incremental path replanning (D* Lite) for enemy robots
+"""
+import heapq
+from .constants import *
+
+INFINITY = float('inf')
+
+class DStarLite:
+    """D* Lite planner searching backward from a fixed goal tile.
+
+    The planner keeps its g/rhs values between calls so that when a few tiles
+    change (a destroyed wall, a new or exploded bomb) only the affected nodes
+    are updated instead of repeating a full search. Large changes fall back to
+    a fresh search.
+    """
+
+    def __init__(self, grid_size, goal, max_changes=8):
+        self.grid_size = grid_size
+        self.goal = goal
+        self.max_changes = max_changes  # More changed tiles than this triggers a full search
+        self.grid = None
+        self.bomb_tiles = frozenset()
+        self.start = None
+        self.last_start = None
+        self.km = 0
+        self.g = {}
+        self.rhs = {}
+        self.queue = []
+        self.queued = {}  # Node -> key currently valid in the queue
+        self.pending_changes = set()
+        self.initialized = False
+        self.expansions = 0  # Total node expansions (for debugging)
+        self.full_searches = 0
+
+    def notify_changed(self, tiles):
+        """Record tiles whose walkability changed since the last plan"""
+        self.pending_changes.update(tiles)
+
+    def plan(self, start, grid, bomb_tiles):
+        """Return a path from start to the goal (excluding start), or [] if none"""
+        bomb_tiles = frozenset(bomb_tiles)
+
+        # Bomb changes are detected here so callers only report map edits
+        if self.initialized and bomb_tiles != self.bomb_tiles:
+            self.pending_changes.update(bomb_tiles.symmetric_difference(self.bomb_tiles))
+
+        self.grid = grid
+        self.bomb_tiles = bomb_tiles
+
+        if not self.initialized or len(self.pending_changes) > self.max_changes:
+            self.reset(start)
+        else:
+            # Shift keys to account for the robot having moved
+            self.km += self.heuristic(self.last_start, start)
+            self.last_start = start
+            self.start = start
+
+            # Repair the nodes whose outgoing edges changed
+            for x, y in self.pending_changes:
+                self.update_vertex((x, y))
+                for neighbor in self.neighbors((x, y)):
+                    self.update_vertex(neighbor)
+            self.pending_changes.clear()
+
+        self.compute_shortest_path()
+        return self.extract_path()
+
+    def reset(self, start):
+        """Discard all search state and start a fresh search"""
+        self.start = start
+        self.last_start = start
+        self.km = 0
+        self.g = {}
+        self.rhs = {self.goal: 0}
+        self.queue = []
+        self.queued = {}
+        self.pending_changes.clear()
+        self.initialized = True
+        self.full_searches += 1
+        self.push(self.goal)
+
+    def heuristic(self, a, b):
+        """Manhattan distance heuristic"""
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def calculate_key(self, node):
+        """D* Lite priority of a node"""
+        best = min(self.g.get(node, INFINITY), self.rhs.get(node, INFINITY))
+        return (best + self.heuristic(self.start, node) + self.km, best)
+
+    def push(self, node):
+        """Insert or re-prioritise a node (stale heap entries are skipped lazily)"""
+        key = self.calculate_key(node)
+        self.queued[node] = key
+        heapq.heappush(self.queue, (key, node))
+
+    def top_key(self):
+        """Smallest valid key in the queue"""
+        while self.queue:
+            key, node = self.queue[0]
+            if self.queued.get(node) == key:
+                return key
+            heapq.heappop(self.queue)
+        return (INFINITY, INFINITY)
+
+    def is_open(self, x, y):
+        """Tiles a robot can stand on (bomb tiles can still be left)"""
+        return 0 <= x < self.grid_size and 0 <= y < self.grid_size and self.grid[y][x] == EMPTY
+
+    def cost(self, node):
+        """Cost of stepping onto a node"""
+        x, y = node
+        if not self.is_open(x, y) or node in self.bomb_tiles:
+            return INFINITY
+        return 1
+
+    def neighbors(self, node):
+        """Open neighbouring tiles"""
+        x, y = node
+        result = []
+        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+            if self.is_open(x + dx, y + dy):
+                result.append((x + dx, y + dy))
+        return result
+
+    def update_vertex(self, node):
+        """Recompute a node's rhs value and its place in the queue"""
+        if node != self.goal:
+            best = INFINITY
+            for neighbor in self.neighbors(node):
+                best = min(best, self.cost(neighbor) + self.g.get(neighbor, INFINITY))
+            self.rhs[node] = best
+
+        if self.g.get(node, INFINITY) != self.rhs.get(node, INFINITY):
+            self.push(node)
+        else:
+            self.queued.pop(node, None)
+
+    def compute_shortest_path(self):
+        """Expand nodes until the start is locally consistent"""
+        while (self.top_key() < self.calculate_key(self.start) or
+               self.rhs.get(self.start, INFINITY) != self.g.get(self.start, INFINITY)):
+            if not self.queue:
+                break
+
+            old_key, node = heapq.heappop(self.queue)
+            del self.queued[node]
+            self.expansions += 1
+
+            new_key = self.calculate_key(node)
+            if old_key < new_key:
+                self.push(node)
+            elif self.g.get(node, INFINITY) > self.rhs.get(node, INFINITY):
+                # Overconsistent: settle the node
+                self.g[node] = self.rhs[node]
+                for neighbor in self.neighbors(node):
+                    self.update_vertex(neighbor)
+            else:
+                # Underconsistent: invalidate and propagate
+                self.g[node] = INFINITY
+                self.update_vertex(node)
+                for neighbor in self.neighbors(node):
+                    self.update_vertex(neighbor)
+
+    def extract_path(self):
+        """Follow the cheapest successors from the start to the goal"""
+        if self.g.get(self.start, INFINITY) == INFINITY and self.start != self.goal:
+            return []
+
+        path = []
+        current = self.start
+        max_steps = self.grid_size * self.grid_size
+        while current != self.goal and len(path) < max_steps:
+            best_node = None
+            best_cost = INFINITY
+            for neighbor in self.neighbors(current):
+                cost = self.cost(neighbor) + self.g.get(neighbor, INFINITY)
+                if cost < best_cost:
+                    best_cost = cost
+                    best_node = neighbor
+
+            if best_node is None:
+                return []
+
+            path.append(best_node)
+            current = best_node
+
+        return path
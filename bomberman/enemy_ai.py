@@ -3,10 +3,30 @@ Advanced AI for enemy robots in Bomberman game
 """
 import random
 import math
+from collections import deque
 from .constants import *
+from .dstar_lite import DStarLite
+from .mcts import ACTION_MOVES, BOMB
+
+def roll_traits(difficulty_level, rng=random):
+    """Random personality traits (aggression, caution, intelligence) for a difficulty"""
+    aggression = rng.uniform(0.3, 0.9)  # How likely to hunt player
+    caution = rng.uniform(0.3, 0.9)     # How careful about bombs
+    intelligence = rng.uniform(0.3, 0.9) # How smart in pathfinding
+    
+    # Adjust traits based on difficulty
+    if difficulty_level == "HARD":
+        aggression = min(1.0, aggression + 0.2)
+        caution = min(1.0, caution + 0.1)
+        intelligence = min(1.0, intelligence + 0.3)
+    elif difficulty_level == "EASY":
+        aggression = max(0.1, aggression - 0.2)
+        caution = max(0.1, caution - 0.1)
+        intelligence = max(0.1, intelligence - 0.2)
+    return aggression, caution, intelligence
 
 class EnemyAI:
-    def __init__(self, enemy, difficulty_level):
+    def __init__(self, enemy, difficulty_level, traits=None):
         self.enemy = enemy
         self.difficulty = difficulty_level
         self.target_x = None
@@ -16,20 +36,21 @@ class EnemyAI:
         self.last_decision_time = 0
         self.decision_cooldown = 30  # Frames between AI decisions
         
-        # Personality traits (randomized for each enemy)
-        self.aggression = random.uniform(0.3, 0.9)  # How likely to hunt player
-        self.caution = random.uniform(0.3, 0.9)     # How careful about bombs
-        self.intelligence = random.uniform(0.3, 0.9) # How smart in pathfinding
-        
-        # Adjust traits based on difficulty
-        if difficulty_level == "HARD":
-            self.aggression = min(1.0, self.aggression + 0.2)
-            self.caution = min(1.0, self.caution + 0.1)
-            self.intelligence = min(1.0, self.intelligence + 0.3)
-        elif difficulty_level == "EASY":
-            self.aggression = max(0.1, self.aggression - 0.2)
-            self.caution = max(0.1, self.caution - 0.1)
-            self.intelligence = max(0.1, self.intelligence - 0.2)
+        # Incremental replanning keeps a D* Lite planner per target
+        self.incremental_planning = True
+        self.planner = None
+        
+        # Search windows for wander and escape targets
+        self.wander_radius = 7 if difficulty_level == "HARD" else 5  # Larger on hard difficulty
+        self.escape_radius = 5
+        
+        # Optional search-based controller (see mcts.MCTSController) replacing the state machine
+        self.search = None
+        
+        # Personality traits (randomized for each enemy unless given)
+        if traits is None:
+            traits = roll_traits(difficulty_level)
+        self.aggression, self.caution, self.intelligence = traits
             
         # Behavior tracking
         self.last_bomb_time = 0
@@ -38,17 +59,36 @@ class EnemyAI:
         
     def update(self, game):
         """Update enemy AI state and actions"""
+        if not self.tick():
+            return
+            
+        # Run the whole decision in one go
+        for _ in self.decision_steps(game):
+            pass
+    
+    def tick(self):
+        """Count down the decision cooldown, returns True when a decision is due"""
         # Decrease decision cooldown
         if self.last_decision_time > 0:
             self.last_decision_time -= 1
-            return
+            return False
             
         # Skip if frozen
-        if self.enemy.frozen > 0:
+        return self.enemy.frozen <= 0
+    
+    def decision_steps(self, game):
+        """Make one AI decision, yielding between phases so the work can span frames"""
+        if self.search is not None:
+            yield from self.search_steps(game)
             return
-            
+        
         # Update AI state based on situation
         self.update_state(game)
+        yield
+        
+        # The world may have changed while we waited for the next frame
+        if self.enemy.frozen > 0:
+            return
         
         # Take action based on current state
         if self.state == "wander":
@@ -61,6 +101,27 @@ class EnemyAI:
         # Reset decision cooldown
         self.last_decision_time = self.decision_cooldown
     
+    def search_steps(self, game):
+        """Decide by tree search, spreading the thinking over several frames"""
+        self.state = "search"
+        yield from self.search.think(game, self)
+        
+        if self.enemy.frozen > 0:
+            return
+        
+        action = self.search.choose_action(self)
+        if action == BOMB:
+            self.enemy.try_place_bomb(game)
+        else:
+            dx, dy = ACTION_MOVES[action]
+            new_x, new_y = self.enemy.x + dx, self.enemy.y + dy
+            if ((dx or dy) and 0 <= new_x < game.grid_size and 0 <= new_y < game.grid_size and
+                game.grid[new_y][new_x] == EMPTY and
+                not any(bomb.x == new_x and bomb.y == new_y for bomb in game.bombs)):
+                self.enemy.x, self.enemy.y = new_x, new_y
+        
+        self.last_decision_time = self.decision_cooldown
+    
     def update_state(self, game):
         """Determine the appropriate AI state based on game situation"""
         # Check if in danger - highest priority
@@ -190,6 +251,12 @@ class EnemyAI:
         
     def can_reach_position(self, game, x, y):
         """Check if a position is reachable"""
+        # Region labels answer this with a single comparison when available
+        regions = getattr(game, 'regions', None)
+        if regions is not None:
+            regions.sync(game)
+            return regions.connected(self.enemy.x, self.enemy.y, x, y)
+            
         # Simple BFS to check reachability
         queue = [(self.enemy.x, self.enemy.y)]
         visited = {(self.enemy.x, self.enemy.y)}
@@ -248,12 +315,42 @@ class EnemyAI:
                 
         # No target or reached previous target, find a new one
         # Look for destructible walls, power-ups, or open spaces
+        utility_maps = getattr(game, 'utility_maps', None)
+        if utility_maps is not None and utility_maps.enabled:
+            targets = utility_maps.wander_targets(game, self)
+        else:
+            targets = self.scan_wander_targets(game)
+        
+        if targets:
+            # Select one of the top targets with some randomness
+            # More randomness on easy, less on hard
+            if self.difficulty == "EASY":
+                top_count = min(5, len(targets))
+                selected = random.randint(0, top_count - 1)
+            elif self.difficulty == "NORMAL":
+                top_count = min(3, len(targets))
+                selected = random.randint(0, top_count - 1)
+            else:  # HARD
+                top_count = min(2, len(targets))
+                selected = 0  # Always choose the best target on hard
+                
+            self.target_x, self.target_y, _ = targets[selected]
+            
+            # Find path to target
+            self.find_path_to_target(game)
+            
+            # Move toward target
+            self.move_toward_target(game)
+        else:
+            # No good targets found, move randomly
+            self.enemy.move_random(game)
+            
+    def scan_wander_targets(self, game):
+        """Wander targets as (x, y, priority), best first, found by scanning tiles"""
         targets = []
         
         # Search in a radius around the enemy
-        search_radius = 5
-        if self.difficulty == "HARD":
-            search_radius = 7  # Larger search radius on hard difficulty
+        search_radius = self.wander_radius
             
         for y in range(max(0, self.enemy.y - search_radius), min(game.grid_size, self.enemy.y + search_radius + 1)):
             for x in range(max(0, self.enemy.x - search_radius), min(game.grid_size, self.enemy.x + search_radius + 1)):
@@ -291,33 +388,10 @@ class EnemyAI:
                             # Just an empty space
                             targets.append((x, y, 1))  # Lower priority
         
-        if targets:
-            # Sort by priority (higher first) then by distance (closer first)
-            targets.sort(key=lambda t: (-t[2], abs(t[0] - self.enemy.x) + abs(t[1] - self.enemy.y)))
-            
-            # Select one of the top targets with some randomness
-            # More randomness on easy, less on hard
-            if self.difficulty == "EASY":
-                top_count = min(5, len(targets))
-                selected = random.randint(0, top_count - 1)
-            elif self.difficulty == "NORMAL":
-                top_count = min(3, len(targets))
-                selected = random.randint(0, top_count - 1)
-            else:  # HARD
-                top_count = min(2, len(targets))
-                selected = 0  # Always choose the best target on hard
-                
-            self.target_x, self.target_y, _ = targets[selected]
-            
-            # Find path to target
-            self.find_path_to_target(game)
-            
-            # Move toward target
-            self.move_toward_target(game)
-        else:
-            # No good targets found, move randomly
-            self.enemy.move_random(game)
-            
+        # Sort by priority (higher first) then by distance (closer first)
+        targets.sort(key=lambda t: (-t[2], abs(t[0] - self.enemy.x) + abs(t[1] - self.enemy.y)))
+        return targets
+    
     def should_place_bomb_while_wandering(self, game):
         """Check if we should place a bomb while wandering"""
         # Don't place bomb if already has an active bomb or on cooldown
@@ -372,11 +446,16 @@ class EnemyAI:
             self.target_x = game.player.x
             self.target_y = game.player.y
             
-        # Find path to target
-        self.find_path_to_target(game)
+        # Chasing the player directly reads the shared flow field; other targets use A*
+        path_length = None
+        if self.target_x == game.player.x and self.target_y == game.player.y:
+            path_length = self.follow_flow_field(game)
+        if path_length is None:
+            self.find_path_to_target(game)
+            path_length = len(self.path)
         
         # If no path found or path is too long, try to find a position to intercept player
-        if not self.path or len(self.path) > 10:
+        if not self.path or path_length > 10:
             intercept_x, intercept_y = self.find_intercept_position(game)
             if intercept_x is not None and intercept_y is not None:
                 self.target_x = intercept_x
@@ -386,6 +465,22 @@ class EnemyAI:
         # Move toward target
         self.move_toward_target(game)
         
+    def follow_flow_field(self, game):
+        """Take the next step toward the player from the shared flow field"""
+        flow_field = getattr(game, 'flow_field', None)
+        if flow_field is None:
+            return None
+            
+        distance = flow_field.distance_at(self.enemy.x, self.enemy.y)
+        if distance is None:
+            # Player is not reachable from here
+            self.path = []
+            return 0
+            
+        next_step = flow_field.next_step(self.enemy.x, self.enemy.y)
+        self.path = [next_step] if next_step is not None else []
+        return distance
+        
     def predict_player_movement(self, game):
         """Try to predict where the player will move next"""
         # Only predict on harder difficulties
@@ -533,6 +628,13 @@ class EnemyAI:
                 game.grid[ny][nx] == EMPTY and
                 not any(bomb.x == nx and bomb.y == ny for bomb in game.bombs)):
                 
+                # The flow field answers reachability when we share the player's region
+                flow_field = getattr(game, 'flow_field', None)
+                if flow_field is not None and flow_field.distance_at(self.enemy.x, self.enemy.y) is not None:
+                    if flow_field.distance_at(nx, ny) is not None:
+                        return nx, ny
+                    continue
+                
                 # Check if we can reach this position
                 # Find path to this position
                 start = (self.enemy.x, self.enemy.y)
@@ -580,11 +682,32 @@ class EnemyAI:
     
     def escape_danger(self, game):
         """Escape from dangerous situations"""
-        # Find safe tiles
+        # Find safe tiles, closest first
+        utility_maps = getattr(game, 'utility_maps', None)
+        if utility_maps is not None and utility_maps.enabled:
+            safe_tiles = utility_maps.escape_targets(game, self)
+        else:
+            safe_tiles = self.scan_safe_tiles(game)
+        
+        if safe_tiles:
+            # Select the closest safe tile
+            self.target_x, self.target_y, _ = safe_tiles[0]
+            
+            # Find path to safe tile
+            self.find_path_to_target(game)
+            
+            # Move toward safe tile
+            self.move_toward_target(game)
+        else:
+            # No safe tiles found, move randomly and hope for the best
+            self.enemy.move_random(game)
+    
+    def scan_safe_tiles(self, game):
+        """Safe tiles as (x, y, distance), closest first, found by scanning tiles"""
         safe_tiles = []
         
         # Search in a radius around the enemy
-        search_radius = 5
+        search_radius = self.escape_radius
         for y in range(max(0, self.enemy.y - search_radius), min(game.grid_size, self.enemy.y + search_radius + 1)):
             for x in range(max(0, self.enemy.x - search_radius), min(game.grid_size, self.enemy.x + search_radius + 1)):
                 # Skip current position
@@ -600,21 +723,9 @@ class EnemyAI:
                     distance = abs(x - self.enemy.x) + abs(y - self.enemy.y)
                     safe_tiles.append((x, y, distance))
         
-        if safe_tiles:
-            # Sort by distance (closer first)
-            safe_tiles.sort(key=lambda t: t[2])
-            
-            # Select the closest safe tile
-            self.target_x, self.target_y, _ = safe_tiles[0]
-            
-            # Find path to safe tile
-            self.find_path_to_target(game)
-            
-            # Move toward safe tile
-            self.move_toward_target(game)
-        else:
-            # No safe tiles found, move randomly and hope for the best
-            self.enemy.move_random(game)
+        # Sort by distance (closer first)
+        safe_tiles.sort(key=lambda t: t[2])
+        return safe_tiles
     
     def find_path_to_target(self, game):
         """Find a path to the target using A* algorithm"""
@@ -630,6 +741,11 @@ class EnemyAI:
             self.path = []
             return
             
+        # Repair the previous plan instead of searching from scratch when possible
+        if self.incremental_planning:
+            self.path = self.plan_incrementally(game, start, goal)
+            return
+            
         # Initialize open and closed sets
         open_set = {start}
         closed_set = set()
@@ -687,6 +803,20 @@ class EnemyAI:
         # No path found
         self.path = []
     
+    def plan_incrementally(self, game, start, goal):
+        """Find a path with the D* Lite planner, reusing it while the goal is unchanged"""
+        if (self.planner is None or self.planner.goal != goal or
+            self.planner.grid is not game.grid):
+            self.planner = DStarLite(game.grid_size, goal)
+        
+        bomb_tiles = [(bomb.x, bomb.y) for bomb in game.bombs]
+        return self.planner.plan(start, game.grid, bomb_tiles)
+    
+    def notify_tiles_changed(self, tiles):
+        """Forward changed map tiles to the incremental planner"""
+        if self.planner is not None:
+            self.planner.notify_changed(tiles)
+    
     def reconstruct_path(self, came_from, current):
         """Reconstruct path from came_from dictionary"""
         total_path = [current]
@@ -766,31 +896,9 @@ class EnemyAI:
                 has_nearby_wall = True
                 wall_positions.append((nx, ny))
         
-        # Check if player is in bomb range (same row or column)
-        player_in_range = False
-        if (self.enemy.x == game.player.x and abs(self.enemy.y - game.player.y) <= bomb_range):
-            # Check if there are walls blocking the path to player
-            blocked = False
-            min_y = min(self.enemy.y, game.player.y)
-            max_y = max(self.enemy.y, game.player.y)
-            for y in range(min_y + 1, max_y):
-                if game.grid[y][self.enemy.x] != EMPTY:
-                    blocked = True
-                    break
-            if not blocked:
-                player_in_range = True
-        
-        elif (self.enemy.y == game.player.y and abs(self.enemy.x - game.player.x) <= bomb_range):
-            # Check if there are walls blocking the path to player
-            blocked = False
-            min_x = min(self.enemy.x, game.player.x)
-            max_x = max(self.enemy.x, game.player.x)
-            for x in range(min_x + 1, max_x):
-                if game.grid[self.enemy.y][x] != EMPTY:
-                    blocked = True
-                    break
-            if not blocked:
-                player_in_range = True
+        # Check if player is in bomb range (same row or column) with no walls in between
+        player_in_range = game.blast_table.is_exposed(game.player.x, game.player.y,
+                                                      self.enemy.x, self.enemy.y, bomb_range)
         
         # Strategic bomb placement - check if we can trap the player
         can_trap_player = False
@@ -865,21 +973,11 @@ class EnemyAI:
         # Add bomb position
         danger_tiles.add((self.enemy.x, self.enemy.y))
         
-        # Add tiles in bomb range
-        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            for i in range(1, bomb_range + 1):
-                nx, ny = self.enemy.x + (dx * i), self.enemy.y + (dy * i)
-                
-                # Stop at grid boundaries
-                if nx < 0 or nx >= game.grid_size or ny < 0 or ny >= game.grid_size:
-                    break
-                
-                # Stop at walls
-                if game.grid[ny][nx] != EMPTY:
-                    break
-                
-                # Add to danger tiles
-                danger_tiles.add((nx, ny))
+        # Add tiles in bomb range (blasts stop at the first non-empty tile)
+        danger_tiles.update(game.blast_table.covered_tiles(self.enemy.x, self.enemy.y, bomb_range))
+        
+        # Find everything reachable without crossing danger tiles in a single search
+        reachable = self.reachable_tiles(game, danger_tiles)
         
         # Check if there's a safe tile we can reach
         for y in range(max(0, self.enemy.y - bomb_range - 1), min(game.grid_size, self.enemy.y + bomb_range + 2)):
@@ -891,26 +989,21 @@ class EnemyAI:
                 # Check if this tile is safe and reachable
                 if (game.grid[y][x] == EMPTY and 
                     not any(bomb.x == x and bomb.y == y for bomb in game.bombs) and
-                    not self.is_tile_in_danger(x, y, game) and
-                    self.can_reach_tile(x, y, game, danger_tiles)):
+                    (x, y) in reachable and
+                    not self.is_tile_in_danger(x, y, game)):
                     return True
         
         return False
     
-    def can_reach_tile(self, x, y, game, danger_tiles):
-        """Check if the enemy can reach a tile without going through danger tiles"""
-        # Simple BFS to find path
-        queue = [(self.enemy.x, self.enemy.y)]
+    def reachable_tiles(self, game, danger_tiles):
+        """All tiles the enemy can reach without going through danger tiles"""
+        bomb_tiles = {(bomb.x, bomb.y) for bomb in game.bombs}
+        queue = deque([(self.enemy.x, self.enemy.y)])
         visited = {(self.enemy.x, self.enemy.y)}
         
         while queue:
-            cx, cy = queue.pop(0)
+            cx, cy = queue.popleft()
             
-            # Check if we've reached the target
-            if cx == x and cy == y:
-                return True
-                
-            # Check neighbors
             for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
                 nx, ny = cx + dx, cy + dy
                 
@@ -919,15 +1012,14 @@ class EnemyAI:
                     nx < 0 or nx >= game.grid_size or
                     ny < 0 or ny >= game.grid_size or
                     game.grid[ny][nx] != EMPTY or
-                    any(bomb.x == nx and bomb.y == ny for bomb in game.bombs) or
+                    (nx, ny) in bomb_tiles or
                     (nx, ny) in danger_tiles):
                     continue
                     
-                # Add to queue and visited
                 queue.append((nx, ny))
                 visited.add((nx, ny))
         
-        return False
+        return visited
     
     def is_in_danger(self, game):
         """Check if the enemy is in danger"""
@@ -941,31 +1033,10 @@ class EnemyAI:
             if bomb.timer > 60:  # Only worry about bombs that will explode in the next second
                 continue
                 
-            # Check if tile is in bomb's explosion range
+            # Check if tile is in bomb's explosion range with no walls blocking it
             bomb_range = getattr(bomb, 'range', 2)  # Default to 2 if range not specified
-            
-            # Check if in same row or column
-            if bomb.x == x and abs(bomb.y - y) <= bomb_range:
-                # Check if there are walls blocking the explosion
-                blocked = False
-                step = 1 if bomb.y < y else -1
-                for cy in range(bomb.y + step, y, step):
-                    if game.grid[cy][x] != EMPTY:
-                        blocked = True
-                        break
-                if not blocked:
-                    return True
-            
-            if bomb.y == y and abs(bomb.x - x) <= bomb_range:
-                # Check if there are walls blocking the explosion
-                blocked = False
-                step = 1 if bomb.x < x else -1
-                for cx in range(bomb.x + step, x, step):
-                    if game.grid[y][cx] != EMPTY:
-                        blocked = True
-                        break
-                if not blocked:
-                    return True
+            if game.blast_table.is_exposed(x, y, bomb.x, bomb.y, bomb_range):
+                return True
         
         return False
     
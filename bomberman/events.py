@@ -0,0 +1,213 @@
+"""
+Gameplay event bus with a batching background writer (JSON Lines or a binary log)
+"""
+import enum
+import json
+import queue
+import struct
+import threading
+from .constants import *
+from .powerups import POWERUP_TYPES
+
+# Fields of every event kind, in the order publish() takes them. Enemies and bomb
+# owners are Enemy.serial numbers, 0 for the player
+EVENT_FIELDS = {
+    "bomb_placed": ("owner", "x", "y", "bomb_type", "range", "remote"),
+    "bomb_detonated": ("owner", "x", "y", "bomb_type", "range"),
+    "wall_destroyed": ("x", "y"),
+    "powerup_spawned": ("x", "y", "powerup"),
+    "powerup_picked": ("x", "y", "powerup"),
+    "skill_picked": ("x", "y", "bomb_type"),
+    "player_hit": ("x", "y", "damage", "effect", "health", "lives"),
+    "enemy_killed": ("enemy", "x", "y", "owner"),
+    "enemy_frozen": ("enemy", "x", "y", "owner"),
+    "ai_state": ("enemy", "x", "y", "previous", "state"),
+}
+EVENT_KINDS = tuple(EVENT_FIELDS)
+
+# Strings stored as small numbers in the binary log, see encode_binary_value
+AI_STATES = ("wander", "hunt", "escape", "search")
+BINARY_STRINGS = tuple(dict.fromkeys(POWERUP_TYPES + AI_STATES + tuple(BOMB_EFFECTS.values())))
+STRING_CODES = {string: code for code, string in enumerate(BINARY_STRINGS)}
+
+EVENT_MAGIC = b"BMEV"
+EVENT_VERSION = 1
+EVENT_HEADER = struct.Struct("<4sH")  # Magic, version
+RECORD = struct.Struct("<IBB")  # Frame, kind index, value count; followed by that many int32
+VALUE = struct.Struct("<i")
+
+# Events collected before a batch goes to the writer, and frames a smaller batch may wait
+BATCH_EVENTS = 512
+BATCH_FRAMES = 60
+
+def encode_binary_value(value):
+    """An event value as an int32: enums by value, strings by their index in BINARY_STRINGS, None as -1"""
+    if value is None:
+        return -1
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, str):
+        return STRING_CODES[value]
+    return int(value)
+
+def decode_binary_value(field, code):
+    """Reverse encode_binary_value for a field"""
+    if code == -1 and field in ("effect", "previous"):
+        return None
+    if field == "bomb_type":
+        return BombType(code).name
+    if field in ("powerup", "effect", "previous", "state"):
+        return BINARY_STRINGS[code]
+    if field == "remote":
+        return bool(code)
+    return code
+
+def json_value(value):
+    """An event value as JSON: enums by name"""
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value
+
+def write_json_lines(f, batch):
+    """Write a batch of (frame, kind, values) as one JSON object per line"""
+    lines = []
+    for frame, kind, values in batch:
+        record = {"frame": frame, "event": kind}
+        record.update(zip(EVENT_FIELDS[kind], map(json_value, values)))
+        lines.append(json.dumps(record, separators=(",", ":")))
+    lines.append("")
+    f.write("\n".join(lines).encode())
+
+def write_binary(f, batch):
+    """Write a batch of (frame, kind, values) as binary records"""
+    chunks = []
+    for frame, kind, values in batch:
+        chunks.append(RECORD.pack(frame, EVENT_KINDS.index(kind), len(values)))
+        chunks.append(struct.pack(f"<{len(values)}i", *map(encode_binary_value, values)))
+    f.write(b"".join(chunks))
+
+def read_event_log(path):
+    """Yield the events of a log as dicts with frame and event keys, whatever its format"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(EVENT_MAGIC):
+        for line in data.decode().splitlines():
+            if line:
+                yield json.loads(line)
+        return
+
+    magic, version = EVENT_HEADER.unpack_from(data)
+    if version != EVENT_VERSION:
+        raise ValueError(f"{path}: unsupported event log version {version}")
+    offset = EVENT_HEADER.size
+    while offset < len(data):
+        frame, kind_index, count = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        codes = struct.unpack_from(f"<{count}i", data, offset)
+        offset += count * VALUE.size
+        kind = EVENT_KINDS[kind_index]
+        record = {"frame": frame, "event": kind}
+        for field, code in zip(EVENT_FIELDS[kind], codes):
+            record[field] = decode_binary_value(field, code)
+        yield record
+
+class EventWriter:
+    """Writes event batches to a file on a background thread.
+
+    The game loop only puts finished batches on a queue; encoding and file
+    writes happen on the writer thread. Files ending in .jsonl get JSON
+    Lines, anything else the binary format.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.binary = not path.endswith(".jsonl")
+        self.file = open(path, "wb")
+        if self.binary:
+            self.file.write(EVENT_HEADER.pack(EVENT_MAGIC, EVENT_VERSION))
+        self.batches = queue.Queue()
+        self.written = 0  # Events written so far (for debugging)
+        self.thread = threading.Thread(target=self.run, name="event-writer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Writer loop: encode and write batches until None arrives"""
+        write = write_binary if self.binary else write_json_lines
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                break
+            write(self.file, batch)
+            self.written += len(batch)
+        self.file.close()
+
+    def put(self, batch):
+        """Queue a batch for writing"""
+        self.batches.put(batch)
+
+    def close(self):
+        """Write what is queued and close the file"""
+        self.batches.put(None)
+        self.thread.join()
+
+class EventBus:
+    """Publishes gameplay events to subscribers and an optional log writer.
+
+    publish() does nothing while there is neither a subscriber nor a
+    writer, so the calls can stay in the game loop. Logged events are
+    kept as (frame, kind, values) tuples and handed to the writer in
+    batches by end_frame().
+    """
+
+    def __init__(self):
+        self.frame = 0
+        self.subscribers = {}  # Event kind to callbacks taking (frame, kind, values)
+        self.writer = None
+        self.batch = []
+        self.batch_frame = 0  # Frame of the first event in the current batch
+        self.enabled = False
+
+    def subscribe(self, kind, callback):
+        """Call callback(frame, kind, values) for every event of a kind"""
+        if kind not in EVENT_FIELDS:
+            raise ValueError(f"Unknown event kind {kind!r}")
+        self.subscribers.setdefault(kind, []).append(callback)
+        self.enabled = True
+
+    def open_log(self, path):
+        """Log all events to a file from now on"""
+        self.close()
+        self.writer = EventWriter(path)
+        self.enabled = True
+
+    def publish(self, kind, *values):
+        """Record an event; values follow EVENT_FIELDS[kind]"""
+        if not self.enabled:
+            return
+        for callback in self.subscribers.get(kind, ()):
+            callback(self.frame, kind, values)
+        if self.writer is not None:
+            if not self.batch:
+                self.batch_frame = self.frame
+            self.batch.append((self.frame, kind, values))
+
+    def end_frame(self):
+        """Advance the frame number and hand a full or old enough batch to the writer"""
+        self.frame += 1
+        if self.batch and (len(self.batch) >= BATCH_EVENTS or self.frame - self.batch_frame >= BATCH_FRAMES):
+            self.flush()
+
+    def flush(self):
+        """Hand the events collected so far to the writer"""
+        if self.writer is not None and self.batch:
+            self.writer.put(self.batch)
+        self.batch = []
+
+    def close(self):
+        """Flush and stop logging"""
+        if self.writer is None:
+            return
+        self.flush()
+        self.writer.close()
+        self.writer = None
+        self.enabled = bool(self.subscribers)
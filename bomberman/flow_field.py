@@ -0,0 +1,89 @@
+"""
+Shared flow field toward the player for hunting enemies
+"""
+from collections import deque
+from .constants import *
+
+class FlowField:
+    """Breadth-first distance field computed once from one or more source tiles.
+
+    Every hunting enemy reads its distance to the nearest source and its next
+    step toward it in O(1) instead of running its own search each decision.
+    """
+
+    def __init__(self):
+        self.grid_size = 0
+        self.distances = []  # Flat list indexed by y * grid_size + x, -1 if unreachable
+        self.next_steps = []  # Flat list of the neighbour tile one step closer to a source
+        self.sources = ()
+        self.signature = None  # Inputs of the last computation
+        self.computations = 0  # Number of full recomputations (for debugging)
+
+    def update(self, grid, grid_size, bombs, sources, grid_version):
+        """Recompute the field only when the sources, grid or bombs changed"""
+        sources = tuple(sources)
+        bomb_tiles = frozenset((bomb.x, bomb.y) for bomb in bombs)
+        signature = (sources, bomb_tiles, grid_version, grid_size)
+
+        if signature == self.signature:
+            return False
+
+        self.signature = signature
+        self.compute(grid, grid_size, bomb_tiles, sources)
+        return True
+
+    def compute(self, grid, grid_size, bomb_tiles, sources):
+        """Run a multi-source BFS over walkable tiles"""
+        size = grid_size * grid_size
+        distances = [-1] * size
+        next_steps = [None] * size
+        queue = deque()
+
+        self.grid_size = grid_size
+        self.sources = tuple(sources)
+        self.computations += 1
+
+        for sx, sy in self.sources:
+            if 0 <= sx < grid_size and 0 <= sy < grid_size and distances[sy * grid_size + sx] < 0:
+                distances[sy * grid_size + sx] = 0
+                queue.append((sx, sy))
+
+        while queue:
+            cx, cy = queue.popleft()
+            next_distance = distances[cy * grid_size + cx] + 1
+
+            for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+                nx, ny = cx + dx, cy + dy
+
+                # Skip if out of bounds, not walkable, or already visited
+                if nx < 0 or nx >= grid_size or ny < 0 or ny >= grid_size:
+                    continue
+                if grid[ny][nx] != EMPTY:
+                    continue
+                index = ny * grid_size + nx
+                if distances[index] >= 0:
+                    continue
+
+                distances[index] = next_distance
+                next_steps[index] = (cx, cy)
+
+                # A bomb tile can be left (enemies stand on their own bombs)
+                # but never passed through, so it is not expanded further
+                if (nx, ny) not in bomb_tiles:
+                    queue.append((nx, ny))
+
+        self.distances = distances
+        self.next_steps = next_steps
+
+    def distance_at(self, x, y):
+        """Distance from (x, y) to the nearest source, or None if unreachable"""
+        if x < 0 or x >= self.grid_size or y < 0 or y >= self.grid_size:
+            return None
+        distance = self.distances[y * self.grid_size + x]
+        return distance if distance >= 0 else None
+
+    def next_step(self, x, y):
+        """Neighbouring tile one step closer to the nearest source, or None"""
+        if x < 0 or x >= self.grid_size or y < 0 or y >= self.grid_size:
+            return None
+        return self.next_steps[y * self.grid_size + x]
@@ -0,0 +1,77 @@
+"""
+Frame pacing modes for the main loop
+"""
+import time
+import pygame
+from .constants import *
+
+# vsync: wait for the display refresh (capped at FPS as a safety net)
+# precise: sleep, then spin for the last moment to hit each frame deadline
+# capped: pygame's Clock.tick
+# uncapped: run as fast as possible (for benchmarks)
+PACING_MODES = ("vsync", "precise", "capped", "uncapped")
+
+# Spin instead of sleeping for the last part of a frame, sleep() overshoots by about this much
+SPIN_SECONDS = 0.002
+
+class FramePacer:
+    """Paces the main loop and measures how long each frame's work took"""
+
+    def __init__(self, mode="capped", fps=FPS):
+        self.clock = pygame.time.Clock()
+        self.fps = fps
+        self.mode = None
+        self.set_mode(mode)
+        self.work_ms = 0.0  # Time the last frame spent working, excluding pacing waits
+        self.frame_ms = 0.0  # Time between the starts of the last two frames
+        self.last_wait_end = None
+        self.last_frame_start = None
+        self.work_end = None
+
+    def set_mode(self, mode):
+        """Switch pacing mode"""
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown frame pacing mode: {mode}")
+        self.mode = mode
+        self.deadline = None
+
+    def end_work(self):
+        """Mark the end of a frame's work, just before it is shown"""
+        # With vsync the flip blocks until the refresh, which is waiting rather than work
+        if self.mode == "vsync":
+            self.work_end = time.perf_counter()
+
+    def wait(self):
+        """Wait until the next frame should start"""
+        start = time.perf_counter()
+        if self.last_wait_end is not None:
+            self.work_ms = ((self.work_end or start) - self.last_wait_end) * 1000
+        self.work_end = None
+
+        if self.mode == "precise":
+            self.wait_precise(start)
+        elif self.mode in ("vsync", "capped"):
+            self.clock.tick(self.fps)
+
+        end = time.perf_counter()
+        if self.last_frame_start is not None:
+            self.frame_ms = (end - self.last_frame_start) * 1000
+        self.last_frame_start = end
+        self.last_wait_end = end
+
+    def wait_precise(self, now):
+        """Sleep most of the way to the deadline, then spin on the high-resolution timer"""
+        period = 1.0 / self.fps
+        if self.deadline is None or now - self.deadline > period:
+            # First frame, or we fell more than a frame behind: start a new schedule
+            self.deadline = now + period
+            return
+
+        remaining = self.deadline - now
+        if remaining > SPIN_SECONDS:
+            time.sleep(remaining - SPIN_SECONDS)
+        while time.perf_counter() < self.deadline:
+            pass
+
+        # Advance from the deadline rather than from now so errors do not accumulate
+        self.deadline += period
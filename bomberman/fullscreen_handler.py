@@ -1,8 +1,7 @@
 """
 Fullscreen handling for Bomberman game
 """
-import pygame
-from .screen_utils import calculate_tile_size
+from .screen_utils import calculate_tile_size, create_screen
 
 class FullscreenHandler:
     def __init__(self, game):
@@ -12,20 +11,26 @@ class FullscreenHandler:
         
     def toggle_fullscreen(self):
         """Toggle between fullscreen and windowed mode"""
+        # Keep the display flags the frame pacer relies on
+        vsync = self.game.frame_pacer.mode == "vsync"
         if self.is_fullscreen:
             # Switch back to windowed mode
             self.is_fullscreen = False
             if self.windowed_size:
                 width, height = self.windowed_size
-                self.game.screen = pygame.display.set_mode((width, height))
+                self.game.screen = create_screen(width, height, vsync=vsync)
         else:
             # Switch to fullscreen mode
             self.is_fullscreen = True
             # Save current window size
             self.windowed_size = (self.game.screen.get_width(), self.game.screen.get_height())
             # Set fullscreen mode
-            self.game.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            width, height = self.windowed_size
+            self.game.screen = create_screen(width, height, vsync=vsync, fullscreen=True)
             
+        # The new mode may use a different pixel format
+        self.game.convert_images()
+        
         # Recalculate tile size and update game elements
         self.update_game_scale()
         
@@ -6,18 +6,34 @@ import sys
 import os
 import random
 from .constants import *
-from .sprites import Player, Enemy, Bomb, Explosion
+from .sprites import Player, Enemy, Bomb, scaled_images
 from .map import Map
+from .levels import Level
 from .assets import GameAssets
 from .config import GameConfig
 from .settings_menu import SettingsMenu
-from .powerups import PowerUpManager, PowerUpType
+from .powerups import PowerUpManager, PowerUpType, POWERUP_TABLE
 from .screen_utils import get_optimal_screen_size, center_window, calculate_tile_size, create_screen
 from .fullscreen_handler import FullscreenHandler
 from .enemy_ai import EnemyAI
+from .mcts import MCTSController
+from .flow_field import FlowField
+from .utility_maps import UtilityMaps
+from .particles import ParticleSystem
+from .dirty_rects import DirtyRectTracker
+from .quality_governor import QualityGovernor
+from .frame_pacing import FramePacer
+from .reachability import RegionLabels
+from .rules import BombRules
+from .ai_scheduler import AIScheduler
+from .ai_worker import AIWorker
+from .level_pregen import LevelPregenerator, prepare_level
+from .events import EventBus
+from .input import PlayerInput
+from .scenes import SceneStack, DifficultyScene, GameScene, REDRAW_EVENTS
 
-class GameController:
-    def __init__(self):
+class GameController(BombRules):
+    def __init__(self, show_menu=True):
         pygame.init()
         pygame.display.set_caption("Robot Bomberman")
         
@@ -33,6 +49,8 @@ class GameController:
         self.debug_mode = False  # Toggle for debug overlay
         self.changing_difficulty = False  # Flag for difficulty change menu
         self.show_settings = False  # Flag for settings menu
+        self.scenes = SceneStack()  # Menus, gameplay and overlays, driven by run()
+        self.level = None  # Hand-built level being played instead of a generated one
         
         # Initialize fullscreen handler
         from .fullscreen_handler import FullscreenHandler
@@ -47,9 +65,36 @@ class GameController:
         # Load assets
         self.assets = GameAssets()
         
+        # Pooled particle effects, sized by the graphics quality
+        self.particles = ParticleSystem(self.config)
+        
+        # Paces the main loop (vsync, precise, capped or uncapped)
+        self.frame_pacer = FramePacer(self.config.get_frame_pacing())
+        
+        # Steps graphics quality with the measured frame time when adaptive quality is on
+        self.quality_governor = QualityGovernor(self.config)
+        
+        # Tracks changed screen regions when dirty-rectangle updates are enabled
+        self.display_tracker = DirtyRectTracker()
+        
+        # Buffers gameplay keys between ticks and moves the player at its current speed
+        self.player_input = PlayerInput()
+        
+        # Enemy AI runs on the main thread unless a worker is configured
+        self.ai_worker = None
+        
+        # Builds the next generated level while the current one is played
+        self.level_pregen = LevelPregenerator()
+        self.level_transition = 0  # Frames left of the level-cleared banner
+        
+        # Gameplay events for subscribers and the optional event log (see events.py)
+        self.events = EventBus()
+        self.ai_states = {}  # Enemy -> AI state last published
+        
         # Initialize power-up manager
         from .powerups import PowerUpManager
         self.powerup_manager = PowerUpManager(self.assets)
+        self.rng = random  # Power-up drops, see rules.BombRules
         
         # Initialize fonts - use more modern fonts if available
         font_size_factor = min(1.0, self.screen_width / 1366)  # Scale font based on screen width
@@ -64,115 +109,26 @@ class GameController:
             self.big_font = pygame.font.SysFont('Arial', int(48 * font_size_factor))
         
         # Start with difficulty selection
-        self.show_difficulty_selection()
+        if show_menu:
+            self.show_difficulty_selection()
     
-    def show_difficulty_selection(self, in_game=False):
-        """Show difficulty selection screen"""
-        # Create a screen for difficulty selection
-        if in_game:
-            # Use existing screen if changing difficulty during gameplay
-            temp_screen = self.screen
-            self.changing_difficulty = True
-        else:
-            # Use optimal size for laptop screens
-            width = min(800, int(self.screen_width * 0.8))
-            height = min(600, int(self.screen_height * 0.8))
-            
-            # Create centered screen
-            temp_screen = create_screen(width, height)
-        
-        selection_active = True
-        while selection_active:
-            temp_screen.fill(BLACK)
-            
-            # Draw title
-            title = self.big_font.render("Bomberman", True, WHITE)
-            subtitle = self.font.render("Select Difficulty", True, WHITE)
-            
-            # Center horizontally
-            center_x = temp_screen.get_width() // 2
-            temp_screen.blit(title, (center_x - title.get_width()//2, 100))
-            temp_screen.blit(subtitle, (center_x - subtitle.get_width()//2, 160))
-            
-            # Draw buttons - scale based on screen size
-            button_width = min(200, int(temp_screen.get_width() * 0.3))
-            button_height = 50
-            button_x = center_x - button_width // 2
-            
-            easy_btn = pygame.Rect(button_x, 250, button_width, button_height)
-            normal_btn = pygame.Rect(button_x, 320, button_width, button_height)
-            hard_btn = pygame.Rect(button_x, 390, button_width, button_height)
-            
-            pygame.draw.rect(temp_screen, GREEN, easy_btn)
-            pygame.draw.rect(temp_screen, YELLOW, normal_btn)
-            pygame.draw.rect(temp_screen, RED, hard_btn)
-            
-            easy_text = self.font.render("Easy", True, BLACK)
-            normal_text = self.font.render("Normal", True, BLACK)
-            hard_text = self.font.render("Hard", True, BLACK)
-            
-            temp_screen.blit(easy_text, (center_x - easy_text.get_width()//2, 265))
-            temp_screen.blit(normal_text, (center_x - normal_text.get_width()//2, 335))
-            temp_screen.blit(hard_text, (center_x - hard_text.get_width()//2, 405))
-            
-            # Draw difficulty details
-            easy_details = self.small_font.render("15x15 grid, 3 enemies", True, WHITE)
-            normal_details = self.small_font.render("20x20 grid, 5 enemies", True, WHITE)
-            hard_details = self.small_font.render("25x25 grid, 8 enemies", True, WHITE)
-            
-            temp_screen.blit(easy_details, (center_x - easy_details.get_width()//2, 300))
-            temp_screen.blit(normal_details, (center_x - normal_details.get_width()//2, 370))
-            temp_screen.blit(hard_details, (center_x - hard_details.get_width()//2, 440))
-            
-            # Add back button if changing difficulty during gameplay
-            if in_game:
-                back_btn = pygame.Rect(button_x, 460, button_width, button_height)
-                pygame.draw.rect(temp_screen, GRAY, back_btn)
-                back_text = self.font.render("Back to Game", True, BLACK)
-                temp_screen.blit(back_text, (center_x - back_text.get_width()//2, 475))
-            
-            pygame.display.flip()
-            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE and in_game:
-                        self.changing_difficulty = False
-                        selection_active = False
-                
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
-                    
-                    if easy_btn.collidepoint(mouse_pos):
-                        if in_game:
-                            self.changing_difficulty = False
-                            self.start_game(Difficulty.EASY)
-                        else:
-                            self.start_game(Difficulty.EASY)
-                        selection_active = False
-                    elif normal_btn.collidepoint(mouse_pos):
-                        if in_game:
-                            self.changing_difficulty = False
-                            self.start_game(Difficulty.NORMAL)
-                        else:
-                            self.start_game(Difficulty.NORMAL)
-                        selection_active = False
-                    elif hard_btn.collidepoint(mouse_pos):
-                        if in_game:
-                            self.changing_difficulty = False
-                            self.start_game(Difficulty.HARD)
-                        else:
-                            self.start_game(Difficulty.HARD)
-                        selection_active = False
-                    elif in_game and back_btn.collidepoint(mouse_pos):
-                        self.changing_difficulty = False
-                        selection_active = False
+    def show_difficulty_selection(self):
+        """Show difficulty selection screen and run the game from there"""
+        self.run(DifficultyScene(self))
     
     def start_game(self, difficulty):
-        """Initialize the game with the selected difficulty"""
+        """Initialize the game with the selected difficulty or a levels.Level and run it"""
+        self.setup_game(difficulty)
+        
+        # Start game loop
+        self.game_loop()
+    
+    def setup_game(self, difficulty):
+        """Initialize the game with the selected difficulty, or on a hand-built levels.Level"""
+        self.level = None
+        if isinstance(difficulty, Level):
+            self.level = difficulty
+            difficulty = self.level.difficulty
         self.difficulty = difficulty
         self.grid_size = difficulty["size"]
         
@@ -195,146 +151,172 @@ class GameController:
         screen_height = self.grid_size * TILE_SIZE + ui_height
         
         # Create centered screen with the calculated dimensions
-        self.screen = create_screen(screen_width, screen_height)
-        
-        # Initialize game objects
-        self.map = Map(difficulty, self.assets)
+        self.frame_pacer.set_mode(self.config.get_frame_pacing())
+        self.screen = create_screen(screen_width, screen_height, vsync=self.frame_pacer.mode == "vsync")
+        self.convert_images()
+        
+        # Initialize game objects, starting on a level from the loaded seed list if there is one
+        prepared = None
+        if self.level is None and self.level_pregen.seeds.get(difficulty["name"]):
+            prepared = prepare_level(difficulty, self.level_pregen.next_seed(difficulty))
+        self.map = Map(difficulty, self.assets, self.level, prepared)
         self.grid = self.map.grid
+        self.blast_table = self.map.blast_table
+        self.powerup_manager.table = self.level.powerups if self.level else POWERUP_TABLE
         
         # Create player at starting position
-        self.player = Player(1, 1, self.assets.player_img)
+        start_x, start_y = self.level.player_start if self.level else (1, 1)
+        self.player = Player(start_x, start_y, self.assets.player_img)
+        self.player_input.reset()
         
         # Create enemies
         self.enemies = []
-        self.create_enemies()
+        self.ai_scheduler = AIScheduler()
+        if self.config.ai_worker and self.ai_worker is None:
+            self.ai_worker = AIWorker(self.config.ai_worker)
+        self.create_enemies(prepared)
+        if self.level is None:
+            self.level_pregen.request(difficulty)
         
         # Initialize other game objects
         self.bombs = []
         self.explosions = []
+        self.particles.clear()
+        self.quality_governor.reset()
+        self.flow_field = FlowField()
+        self.regions = RegionLabels()
+        self.utility_maps = UtilityMaps()
+        self.seen_map_version = self.map.version
         self.score = 0
+        self.level_transition = 0
         self.game_over = False  # Reset game over state
         self.changing_difficulty = False
-        
-        # Start game loop
-        self.game_loop()
     
-    def create_enemies(self):
-        """Create enemies based on difficulty"""
+    def convert_images(self):
+        """Convert images to the display format, after every display mode change"""
+        replaced = self.assets.convert_for_display()
+        if not replaced:
+            return
+        scaled_images.clear()
+        if self.particles.enabled:
+            self.particles.build_sprites()
+        
+        # Objects already on the board keep the surfaces they were created with
+        if hasattr(self, 'map'):
+            objects = ([self.player] + self.enemies + self.bombs + self.explosions +
+                       self.powerup_manager.powerups + self.map.skills)
+            for obj in objects:
+                obj.image = replaced.get(id(obj.image), obj.image)
+    
+    def create_enemies(self, prepared=None):
+        """Create enemies based on difficulty, or at the spawns of a prepared level"""
         self.enemies = []
         
         # Determine difficulty level for AI
-        if self.difficulty == Difficulty.EASY:
-            ai_difficulty = "EASY"
-        elif self.difficulty == Difficulty.NORMAL:
-            ai_difficulty = "NORMAL"
+        ai_difficulty = self.difficulty["name"]
+        self.ai_difficulty = ai_difficulty
+        
+        if prepared is not None:
+            for (x, y), traits in zip(prepared.spawns, prepared.traits):
+                self.spawn_enemy(x, y, traits)
         else:
-            ai_difficulty = "HARD"
+            for _ in range(self.difficulty["enemies"]):
+                x, y = self.map.get_valid_spawn_position()
+                self.spawn_enemy(x, y)
         
-        for _ in range(self.difficulty["enemies"]):
-            x, y = self.map.get_valid_spawn_position()
-            enemy = Enemy(x, y, self.assets.enemy_img)
-            
-            # Initialize AI for this enemy
-            enemy.ai = EnemyAI(enemy, ai_difficulty)
-            
-            self.enemies.append(enemy)
+        # Budget AI work per frame and spread decisions over different frames
+        self.ai_scheduler.reset(AI_FRAME_BUDGET_US[ai_difficulty])
+        self.ai_scheduler.stagger(self.enemies)
+    
+    def spawn_enemy(self, x, y, traits=None):
+        """Add an enemy with AI for the current difficulty at a tile"""
+        enemy = Enemy(x, y, self.assets.enemy_img)
+        
+        # Initialize AI for this enemy
+        enemy.ai = EnemyAI(enemy, self.ai_difficulty, traits)
+        if self.ai_difficulty == "HARD" and self.config.search_ai:
+            enemy.ai.search = MCTSController(self.config.search_ai_budget_ms)
+        
+        self.enemies.append(enemy)
+        return enemy
     
     def game_loop(self):
-        """Main game loop"""
+        """Play the current level"""
+        self.run(GameScene(self))
+    
+    def run(self, scene):
+        """Main loop: drive the scene stack until the window is closed"""
+        self.scenes.switch(scene)
         while self.running:
-            self.clock.tick(FPS)
+            self.scenes.top.wait()
             
             # Handle events
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
                 
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        if self.changing_difficulty:
-                            self.changing_difficulty = False
-                        else:
-                            self.paused = not self.paused
-                    elif event.key == pygame.K_F1:
-                        self.debug_mode = not self.debug_mode
-                    elif event.key == pygame.K_F11:
-                        # Toggle fullscreen mode
-                        self.fullscreen_handler.toggle_fullscreen()
-                    elif event.key == pygame.K_d:
-                        # Change difficulty when paused or game over
-                        if self.paused or self.game_over:
-                            self.show_difficulty_selection(in_game=True)
-                    elif event.key == pygame.K_s:
-                        # Show settings menu when paused or game over
-                        if self.paused or self.game_over:
-                            self.settings_menu.show()
-                    elif event.key == pygame.K_r:
-                        if self.game_over:
-                            # Reset the game with the same difficulty
-                            self.start_game(self.difficulty)
-                            return
-                    
-                    # Handle Ctrl+D for difficulty change during gameplay
-                    if event.key == pygame.K_d and pygame.key.get_mods() & pygame.KMOD_CTRL:
-                        self.show_difficulty_selection(in_game=True)
-                    
-                    if not self.paused and not self.game_over and not self.changing_difficulty:
-                        if event.key == pygame.K_UP:
-                            self.player.move(0, -1, self)
-                        elif event.key == pygame.K_DOWN:
-                            self.player.move(0, 1, self)
-                        elif event.key == pygame.K_LEFT:
-                            self.player.move(-1, 0, self)
-                        elif event.key == pygame.K_RIGHT:
-                            self.player.move(1, 0, self)
-                        elif event.key == pygame.K_SPACE:
-                            if self.player.place_bomb(self):
-                                self.assets.play_sound("pickup")  # Use as bomb placement sound
-                        elif event.key == pygame.K_TAB:
-                            self.player.switch_bomb_type()
-                        elif event.key == pygame.K_e:
-                            # Detonate remote bombs if player has them
-                            if self.player.detonate_remote_bombs(self):
-                                self.assets.play_sound("pickup")
-            
-            # Skip updates if paused, game over, or changing difficulty
-            if not self.paused and not self.game_over and not self.changing_difficulty:
-                self.update()
-            
-            # Render
-            self.render()
+                if event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE):
+                    # The window contents were lost, repaint everything
+                    self.display_tracker.invalidate()
+                
+                if event.type in REDRAW_EVENTS:
+                    self.scenes.top.dirty = True
+                self.scenes.top.handle_event(event)
             
-            pygame.display.flip()
-        
+            # Scenes other than gameplay only draw after input
+            scene = self.scenes.top
+            scene.update()
+            scene = self.scenes.top
+            if scene.dirty:
+                scene.draw()
+                scene.present()
+                scene.dirty = False
+        
+        if self.ai_worker:
+            self.ai_worker.stop()
+        self.level_pregen.stop()
+        self.events.close()
         pygame.quit()
         sys.exit()
     
+    def present(self):
+        """Show the rendered frame on the display"""
+        self.frame_pacer.end_work()
+        if self.config.dirty_rects:
+            self.display_tracker.present(self, self.hud_rect())
+        else:
+            pygame.display.flip()
+    
     def update(self):
         """Update game state"""
         # Update player status effects
         self.player.update()
+        if self.level_transition > 0:
+            self.level_transition -= 1
         
-        # Update bombs
-        for bomb in self.bombs[:]:
-            bomb.update()
-            if bomb.exploded:
-                self.explode_bomb(bomb)
-                self.bombs.remove(bomb)
-        
-        # Update explosions
-        for explosion in self.explosions[:]:
-            explosion.update()
-            if explosion.finished:
-                self.explosions.remove(explosion)
+        # Update bombs and explosions
+        self.update_bombs()
+        self.particles.update()
         
         # Update power-ups
         self.powerup_manager.update()
         
+        # Refresh the shared flow field toward the player (no-op when nothing changed)
+        self.flow_field.update(self.grid, self.grid_size, self.bombs,
+                               [(self.player.x, self.player.y)], self.map.version)
+        self.utility_maps.update(self.grid, self.grid_size, self.bombs,
+                                 self.powerup_manager.powerups, self.map.version)
+        
+        # Tell enemy planners which tiles changed so they can repair their paths
+        changed_tiles = self.map.changes_since(self.seen_map_version) or []
+        self.seen_map_version = self.map.version
+        
         # Update enemies
         for enemy in self.enemies[:]:
-            # Use advanced AI instead of random movement
+            # Use advanced AI instead of random movement (scheduled below)
             if enemy.ai:
-                enemy.ai.update(self)
+                if changed_tiles:
+                    enemy.ai.notify_tiles_changed(changed_tiles)
             else:
                 # Fallback to old behavior if AI not initialized
                 if random.random() < 0.05:  # 5% chance to move each frame
@@ -343,129 +325,116 @@ class GameController:
             
             # No collision with player - they can pass through each other
         
-        # Check for skill pickups
-        for skill in self.map.skills[:]:
-            if skill.x == self.player.x and skill.y == self.player.y and self.grid[skill.y][skill.x] == EMPTY:
-                if skill.bomb_type not in self.player.bomb_types:
-                    self.player.bomb_types.append(skill.bomb_type)
-                self.player.current_bomb_type = skill.bomb_type
-                self.map.skills.remove(skill)
-                self.score += 50
-                self.assets.play_sound("pickup")
-        
-        # Check if player is on an explosion
-        for explosion in self.explosions:
-            if explosion.x == self.player.x and explosion.y == self.player.y:
-                if self.player.hit():
-                    self.game_over = True
-    
-    def explode_bomb(self, bomb):
-        """Handle bomb explosion"""
-        # Create explosion at bomb position with appropriate image based on bomb type
-        if bomb.bomb_type == BombType.FIRE:
-            explosion_img = self.assets.fire_explosion_img
-        elif bomb.bomb_type == BombType.ICE:
-            explosion_img = self.assets.ice_explosion_img
-        elif bomb.bomb_type == BombType.MEGA:
-            explosion_img = self.assets.mega_explosion_img
+        # Run due AI decisions within this frame's budget, or hand them to the worker
+        if self.ai_worker:
+            self.ai_worker.exchange(self, self.ai_difficulty)
         else:
-            explosion_img = self.assets.explosion_img
-            
-        self.explosions.append(Explosion(bomb.x, bomb.y, explosion_img))
+            self.ai_scheduler.update(self)
         
-        # Get explosion range based on bomb type and bomb range
-        base_range = 4 if bomb.bomb_type == BombType.MEGA else 2
-        explosion_range = bomb.range if hasattr(bomb, 'range') else base_range
+        if self.events.enabled:
+            self.publish_ai_states()
         
-        # Create explosions in four directions
-        directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        # Check for skill pickups and whether the player is on an explosion
+        self.pick_up_skills(self.player)
+        self.burn_players([self.player])
         
-        # Track if this bomb hit the player (for AI tracking)
-        hit_player = False
+        self.events.end_frame()
         
-        for dx, dy in directions:
-            for i in range(1, explosion_range + 1):
-                x, y = bomb.x + (dx * i), bomb.y + (dy * i)
-                
-                # Stop at grid boundaries
-                if x < 0 or x >= self.grid_size or y < 0 or y >= self.grid_size:
-                    break
-                
-                # Stop at indestructible walls
-                if self.grid[y][x] == WALL:
-                    break
-                
-                # Destroy destructible walls
-                if self.grid[y][x] == DESTRUCTIBLE:
-                    self.grid[y][x] = EMPTY
-                    self.score += 10
-                    
-                    # Create explosion here with appropriate image based on bomb type
-                    if bomb.bomb_type == BombType.FIRE:
-                        explosion_img = self.assets.fire_explosion_img
-                    elif bomb.bomb_type == BombType.ICE:
-                        explosion_img = self.assets.ice_explosion_img
-                    elif bomb.bomb_type == BombType.MEGA:
-                        explosion_img = self.assets.mega_explosion_img
-                    else:
-                        explosion_img = self.assets.explosion_img
-                        
-                    self.explosions.append(Explosion(x, y, explosion_img))
-                    
-                    # Chance to spawn power-up (20%)
-                    if random.random() < 0.2:
-                        self.powerup_manager.create_powerup(x, y)
-                    
-                    break
-                
-                # Create explosion in empty space with appropriate image based on bomb type
-                if bomb.bomb_type == BombType.FIRE:
-                    explosion_img = self.assets.fire_explosion_img
-                elif bomb.bomb_type == BombType.ICE:
-                    explosion_img = self.assets.ice_explosion_img
-                elif bomb.bomb_type == BombType.MEGA:
-                    explosion_img = self.assets.mega_explosion_img
-                else:
-                    explosion_img = self.assets.explosion_img
-                    
-                self.explosions.append(Explosion(x, y, explosion_img))
-                
-                # Check if explosion hits player
-                if x == self.player.x and y == self.player.y:
-                    # Get damage and effect based on bomb type
-                    damage = BOMB_DAMAGE.get(bomb.bomb_type, 1)
-                    effect = BOMB_EFFECTS.get(bomb.bomb_type, None)
-                    
-                    # Track if this bomb hit the player (for AI tracking)
-                    hit_player = True
-                    
-                    if self.player.hit(damage, effect):
-                        self.game_over = True
-                
-                # Check if explosion hits enemies
-                for enemy in self.enemies[:]:
-                    if x == enemy.x and y == enemy.y:
-                        if bomb.bomb_type == BombType.ICE:
-                            enemy.freeze()
-                        else:
-                            self.enemies.remove(enemy)
-                            self.score += 100
-        
-        # Update AI tracking for enemy bombs
-        if isinstance(bomb.owner, Enemy) and hasattr(bomb.owner, 'ai'):
-            bomb.owner.ai.bombs_placed += 1
-            if hit_player:
-                bomb.owner.ai.successful_hits += 1
-        
-        # Play explosion sound
+        # Play this frame's sounds, a burst of identical ones as one
+        self.assets.flush_sounds(self.config.sound_enabled, self.config.sfx_volume)
+    
+    def publish_ai_states(self):
+        """Publish the enemies whose AI state changed since the last frame"""
+        states = {}
+        for enemy in self.enemies:
+            if not enemy.ai:
+                continue
+            state = enemy.ai.state
+            previous = self.ai_states.get(enemy)
+            if state != previous:
+                self.events.publish("ai_state", enemy.serial, enemy.x, enemy.y, previous, state)
+            states[enemy] = state
+        self.ai_states = states
+    
+    def hit_player(self, damage=1, effect=None):
+        """Damage the player, returns True when that ends the game"""
+        game_over = self.player.hit(damage, effect)
+        self.events.publish("player_hit", self.player.x, self.player.y, damage, effect,
+                            self.player.health, self.player.lives)
+        return game_over
+    
+    def explosion_image(self, bomb_type):
+        """Explosion image of a bomb type"""
+        if bomb_type == BombType.FIRE:
+            return self.assets.fire_explosion_img
+        elif bomb_type == BombType.ICE:
+            return self.assets.ice_explosion_img
+        elif bomb_type == BombType.MEGA:
+            return self.assets.mega_explosion_img
+        return self.assets.explosion_img
+    
+    def players_at(self, x, y):
+        """The player, when standing on the tile"""
+        if x == self.player.x and y == self.player.y:
+            return (self.player,)
+        return ()
+    
+    def damage_player(self, player, damage=1, effect=None):
+        """A blast or explosion hit the player; ends the game with the last life"""
+        if effect == "slow" and player.slow_immune <= 0 and not player.shield:
+            self.assets.play_sound("freeze")
+        if self.hit_player(damage, effect):
+            self.game_over = True
+    
+    def bomb_detonated(self, bomb, explosion_range):
+        """Explosion glow and the detonation event"""
+        glow_variant = {BombType.ICE: 1, BombType.MEGA: 2}.get(bomb.bomb_type, 0)
+        self.particles.explosion(bomb.x, bomb.y, glow_variant)
+        self.events.publish("bomb_detonated", getattr(bomb.owner, 'serial', 0), bomb.x, bomb.y,
+                            bomb.bomb_type, explosion_range)
+    
+    def bomb_exploded(self, bomb):
+        """Explosion sound, and the next level once all enemies are defeated"""
         self.assets.play_sound("explosion")
-        
-        # Check if all enemies are defeated
         if len(self.enemies) == 0:
             self.score += 500  # Bonus for clearing the level
+            self.next_level()
+    
+    def enemy_frozen(self, enemy, bomb):
+        self.assets.play_sound("freeze")
+        self.events.publish("enemy_frozen", enemy.serial, enemy.x, enemy.y, getattr(bomb.owner, 'serial', 0))
+    
+    def enemy_killed(self, enemy, bomb):
+        self.score += 100
+        self.events.publish("enemy_killed", enemy.serial, enemy.x, enemy.y, getattr(bomb.owner, 'serial', 0))
+    
+    def wall_destroyed(self, x, y, bomb):
+        self.score += 10
+        self.particles.debris(x, y)
+        self.events.publish("wall_destroyed", x, y)
+    
+    def powerup_spawned(self, powerup):
+        self.events.publish("powerup_spawned", powerup.x, powerup.y, powerup.type)
+    
+    def skill_picked(self, player, skill):
+        self.score += 50
+        self.assets.play_sound("pickup")
+        self.events.publish("skill_picked", skill.x, skill.y, skill.bomb_type)
+    
+    def next_level(self):
+        """Switch to the next level, using the one prepared in the background when it is ready"""
+        prepared = self.level_pregen.take(self.difficulty) if self.level is None else None
+        if prepared is None and self.level is None and self.level_pregen.seeds.get(self.difficulty["name"]):
+            prepared = prepare_level(self.difficulty, self.level_pregen.next_seed(self.difficulty))
+        if prepared is not None:
+            self.map.install(prepared)
+        else:
             self.map.generate_map()
-            self.grid = self.map.grid
-            self.create_enemies()
+        self.grid = self.map.grid
+        self.create_enemies(prepared)
+        if self.level is None:
+            self.level_pregen.request(self.difficulty)
+        self.level_transition = LEVEL_TRANSITION_FRAMES
     
     def render(self):
         """Render the game"""
@@ -477,13 +446,18 @@ class GameController:
         # Draw power-ups
         self.powerup_manager.draw(self.screen)
         
+        quality = self.config.get_current_quality_settings()
+        
         # Draw bombs
         for bomb in self.bombs:
-            bomb.draw(self.screen)
+            bomb.draw(self.screen, quality)
         
         # Draw explosions
         for explosion in self.explosions:
-            explosion.draw(self.screen)
+            explosion.draw(self.screen, quality)
+        
+        # Draw particles
+        self.particles.draw(self.screen)
         
         # Draw enemies
         for enemy in self.enemies:
@@ -499,18 +473,35 @@ class GameController:
         # Draw UI
         self.render_ui()
         
+        # Level-cleared banner fading out over the new level
+        if self.level_transition > 0:
+            self.render_level_transition()
+        
         # Draw pause or game over overlay if needed
         if self.paused:
             self.render_pause_overlay()
         elif self.game_over:
             self.render_game_over_overlay()
         elif self.changing_difficulty:
-            # This is handled in show_difficulty_selection with in_game=True
+            # Drawn by DifficultyScene over the board
             pass
     
+    def hud_rect(self):
+        """Screen area of the HUD below the map"""
+        return pygame.Rect(0, self.grid_size * TILE_SIZE, self.grid_size * TILE_SIZE, 60)
+    
+    def hud_state(self):
+        """Values shown in the HUD, the HUD needs repainting when these change"""
+        player = self.player
+        return (player.lives, player.health, self.score, player.current_bomb_type,
+                player.speed_boost // 60, player.shield, player.shield_time // 60,
+                player.armor, player.armor_time // 60, player.slow_immune // 60,
+                player.has_remote_bomb, len(player.remote_bombs), player.bomb_range,
+                player.max_bombs, len(self.enemies), self.difficulty["size"], self.debug_mode)
+    
     def render_ui(self):
         """Render the game UI"""
-        ui_rect = pygame.Rect(0, self.grid_size * TILE_SIZE, self.grid_size * TILE_SIZE, 60)
+        ui_rect = self.hud_rect()
         pygame.draw.rect(self.screen, GRAY, ui_rect)
         
         # Draw lives
@@ -601,7 +592,7 @@ class GameController:
         self.screen.blit(enemies_text, ((ui_width * 3) // 4, self.grid_size * TILE_SIZE + 40))
         
         # Draw current difficulty
-        diff_name = "Easy" if self.difficulty == Difficulty.EASY else "Normal" if self.difficulty == Difficulty.NORMAL else "Hard"
+        diff_name = self.difficulty["name"].capitalize()
         diff_text = self.small_font.render(f"Diff: {diff_name}", True, WHITE)
         self.screen.blit(diff_text, (ui_width - 100, self.grid_size * TILE_SIZE + 15))
         
@@ -614,6 +605,14 @@ class GameController:
             debug_text = self.small_font.render("DEBUG MODE (F1)", True, YELLOW)
             self.screen.blit(debug_text, (10, self.grid_size * TILE_SIZE + 40))
     
+    def render_level_transition(self):
+        """Render the fading level-cleared banner"""
+        text = self.big_font.render("LEVEL CLEARED", True, NEON_BLUE)
+        text.set_alpha(255 * self.level_transition // LEVEL_TRANSITION_FRAMES)
+        center_x = self.grid_size * TILE_SIZE // 2
+        center_y = self.grid_size * TILE_SIZE // 2
+        self.screen.blit(text, (center_x - text.get_width() // 2, center_y - text.get_height() // 2))
+    
     def render_pause_overlay(self):
         """Render pause screen overlay"""
         overlay = pygame.Surface((self.grid_size * TILE_SIZE, self.grid_size * TILE_SIZE))
@@ -0,0 +1,103 @@
+"""
+Player input: keys buffered between simulation ticks and speed-aware movement
+"""
+from collections import deque
+import pygame
+
+# Step direction per arrow key
+MOVE_KEYS = {
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+}
+
+# Keys applied once per press
+ACTION_KEYS = (pygame.K_SPACE, pygame.K_TAB, pygame.K_e)
+
+# Frames between steps while a direction is held, normally, with a speed boost and slowed by an ice bomb
+MOVE_REPEAT_FRAMES = 8
+BOOSTED_REPEAT_FRAMES = 5
+SLOWED_REPEAT_FRAMES = 14
+
+# Taps waiting for the step cooldown; older ones are dropped beyond this
+MAX_BUFFERED_STEPS = 2
+
+def repeat_frames(player):
+    """Frames between two steps for the player's current speed"""
+    if player.speed_boost > 0:
+        return BOOSTED_REPEAT_FRAMES
+    if player.speed_boost < 0:
+        return SLOWED_REPEAT_FRAMES
+    return MOVE_REPEAT_FRAMES
+
+class PlayerInput:
+    """Collects gameplay keys between ticks and applies them once per tick.
+
+    Presses are queued as they arrive so a tap that starts and ends between
+    two ticks still moves the player. Each tick first uses a queued tap, then
+    the held direction keys, and every step starts a cooldown whose length
+    depends on speed boost or slow. Taps wait for the cooldown too, so
+    tapping is no faster than holding.
+    """
+
+    def __init__(self):
+        self.steps = deque(maxlen=MAX_BUFFERED_STEPS)
+        self.actions = deque()
+        self.cooldown = 0
+        self.last_direction = None  # Most recently pressed direction, preferred while held
+
+    def reset(self):
+        """Forget buffered presses, e.g. after a menu or a new level"""
+        self.steps.clear()
+        self.actions.clear()
+        self.cooldown = 0
+        self.last_direction = None
+
+    def key_down(self, key):
+        """Buffer a gameplay key, returns False for keys that are not gameplay keys"""
+        if key in MOVE_KEYS:
+            self.steps.append(MOVE_KEYS[key])
+            self.last_direction = key
+        elif key in ACTION_KEYS:
+            self.actions.append(key)
+        else:
+            return False
+        return True
+
+    def held_direction(self, pressed):
+        """Direction of a held arrow key, the last one pressed first"""
+        if self.last_direction is not None and pressed[self.last_direction]:
+            return MOVE_KEYS[self.last_direction]
+        for key, direction in MOVE_KEYS.items():
+            if pressed[key]:
+                return direction
+        return None
+
+    def apply(self, game, pressed=None):
+        """Apply this tick's input to the player"""
+        if pressed is None:
+            pressed = pygame.key.get_pressed()
+        player = game.player
+
+        while self.actions:
+            key = self.actions.popleft()
+            if key == pygame.K_SPACE:
+                if player.place_bomb(game):
+                    game.assets.play_sound("place")
+            elif key == pygame.K_TAB:
+                player.switch_bomb_type()
+            elif key == pygame.K_e:
+                # Detonate remote bombs if player has them
+                if player.detonate_remote_bombs(game):
+                    game.assets.play_sound("pickup")
+
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            if self.cooldown > 0:
+                return
+
+        direction = self.steps.popleft() if self.steps else self.held_direction(pressed)
+        if direction is not None:
+            player.move(direction[0], direction[1], game)
+            self.cooldown = repeat_frames(player)
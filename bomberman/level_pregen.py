@@ -0,0 +1,78 @@
+"""
+Next-level preparation on a worker thread while the current level is played
+"""
+import random
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from .map import generate_tiles, pick_spawns
+from .blast_table import BlastTable
+from .enemy_ai import roll_traits
+
+# Everything a generated level needs before its first frame: grid rows, hidden skills
+# (x, y, BombType), blast distances for the grid and each enemy's spawn tile and traits
+PreparedLevel = namedtuple("PreparedLevel", ["name", "size", "grid", "skills", "reach",
+                                             "spawns", "traits"])
+
+def prepare_level(difficulty, seed):
+    """Build the next level of a difficulty, reproducible from the seed"""
+    rng = random.Random(seed)
+    size = difficulty["size"]
+    tiles, skills = generate_tiles(difficulty, rng)
+    grid = [list(tiles[y * size:(y + 1) * size]) for y in range(size)]
+
+    blast_table = BlastTable()
+    blast_table.rebuild(grid, size)
+
+    spawns = pick_spawns(tiles, size, difficulty["enemies"], rng)
+    traits = [roll_traits(difficulty["name"], rng) for _ in spawns]
+    return PreparedLevel(difficulty["name"], size, grid, skills, blast_table.reach, spawns, traits)
+
+class LevelPregenerator:
+    """Prepares the next generated level in the background.
+
+    request() starts building a level for a difficulty; take() hands it
+    over when it is finished and still matches the difficulty being
+    played, otherwise None so the caller generates synchronously. Seeds
+    come from seeds[difficulty name] when a list was loaded (for example
+    the fair seeds of map_fairness), otherwise from the global random
+    generator at request time, so seeded games stay reproducible.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-pregen")
+        self.pending = None
+        self.pending_name = None
+        self.seeds = {}  # Difficulty name to the seeds levels are drawn from
+        self.hits = 0  # Levels handed over ready (for debugging)
+        self.misses = 0  # Levels that were not ready or did not match
+
+    def request(self, difficulty):
+        """Start preparing the level that follows the current one"""
+        if self.pending is not None:
+            self.pending.cancel()
+        self.pending_name = difficulty["name"]
+        self.pending = self.executor.submit(prepare_level, difficulty, self.next_seed(difficulty))
+
+    def next_seed(self, difficulty):
+        """Seed of the next level of a difficulty"""
+        seeds = self.seeds.get(difficulty["name"])
+        if seeds:
+            return random.choice(seeds)
+        return random.getrandbits(32)
+
+    def take(self, difficulty):
+        """The prepared level if it is done and matches the difficulty, else None"""
+        pending = self.pending
+        self.pending = None
+        if pending is None or not pending.done() or pending.cancelled() or self.pending_name != difficulty["name"]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pending.result()
+
+    def stop(self):
+        """Drop any pending level and let the worker finish"""
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,335 @@
+"""
+Hand-built levels: a compact binary format, an ASCII authoring format and memory-mapped level packs
+"""
+import mmap
+import os
+import struct
+from .constants import *
+from .powerups import POWERUP_TABLE, POWERUP_TYPES
+
+LEVEL_MAGIC = b"BMLV"
+LEVEL_VERSION = 1
+PACK_MAGIC = b"BMPK"
+PACK_VERSION = 1
+
+# Magic, version, grid size, AI level, player x, player y, spawn count, skill count,
+# power-up table length, name length in bytes
+LEVEL_HEADER = struct.Struct("<4sBBBBBHHBB")
+SPAWN = struct.Struct("<BB")  # x, y
+SKILL = struct.Struct("<BBB")  # x, y, bomb type
+POWERUP_WEIGHT = struct.Struct("<BH")  # Index in POWERUP_TYPES, weight in thousandths
+
+# Magic, version, level count; followed by one index entry per level
+PACK_HEADER = struct.Struct("<4sHI")
+PACK_ENTRY = struct.Struct("<QI")  # Offset and length of the level in the pack
+
+AI_LEVELS = ("EASY", "NORMAL", "HARD")
+
+# Characters of the ASCII format; start and spawn tiles are empty
+ASCII_TILES = {"#": WALL, "+": DESTRUCTIBLE, ".": EMPTY, " ": EMPTY, "P": EMPTY, "E": EMPTY}
+ASCII_SKILLS = {"f": BombType.FIRE, "i": BombType.ICE, "m": BombType.MEGA}  # Wall hiding a skill
+ASCII_CHARS = {WALL: "#", DESTRUCTIBLE: "+", EMPTY: "."}
+
+class Level:
+    """A hand-built map: tiles, start and spawn points, hidden skills and power-up weights.
+
+    tiles holds the grid row by row, one byte per tile. Enemies spawn at
+    enemy_spawns, one each, and skills are (x, y, BombType) under
+    destructible walls.
+    """
+
+    def __init__(self, name, size, tiles, player_start=(1, 1), enemy_spawns=(), skills=(),
+                 powerups=POWERUP_TABLE, ai="NORMAL"):
+        self.name = name
+        self.size = size
+        self.tiles = bytes(tiles)
+        self.player_start = tuple(player_start)
+        self.enemy_spawns = [tuple(spawn) for spawn in enemy_spawns]
+        self.skills = [tuple(skill) for skill in skills]
+        self.powerups = tuple(powerups)
+        self.ai = ai
+        self.validate()
+
+    def validate(self):
+        """Raise ValueError when the level can not be played"""
+        size = self.size
+        if not 5 <= size <= 255 or len(self.tiles) != size * size:
+            raise ValueError(f"Level {self.name!r}: expected a square grid of 5 to 255 tiles a side")
+        if any(tile not in (EMPTY, WALL, DESTRUCTIBLE) for tile in set(self.tiles)):
+            raise ValueError(f"Level {self.name!r}: unknown tile value")
+        for i in range(size):
+            for x, y in ((i, 0), (i, size - 1), (0, i), (size - 1, i)):
+                if self.tile(x, y) != WALL:
+                    raise ValueError(f"Level {self.name!r}: border tile ({x}, {y}) is not a wall")
+        for x, y in [self.player_start] + self.enemy_spawns:
+            if not (0 <= x < size and 0 <= y < size) or self.tile(x, y) != EMPTY:
+                raise ValueError(f"Level {self.name!r}: start or spawn ({x}, {y}) is not an empty tile")
+        for x, y, bomb_type in self.skills:
+            if not (0 <= x < size and 0 <= y < size) or self.tile(x, y) != DESTRUCTIBLE:
+                raise ValueError(f"Level {self.name!r}: skill at ({x}, {y}) is not under a destructible wall")
+        if self.ai not in AI_LEVELS:
+            raise ValueError(f"Level {self.name!r}: AI level must be one of {', '.join(AI_LEVELS)}")
+        if not self.powerups or any(power_type not in POWERUP_TYPES for power_type, _ in self.powerups):
+            raise ValueError(f"Level {self.name!r}: bad power-up table")
+
+    def tile(self, x, y):
+        return self.tiles[y * self.size + x]
+
+    def grid(self):
+        """A fresh grid, as Map keeps it"""
+        size = self.size
+        return [list(self.tiles[y * size:(y + 1) * size]) for y in range(size)]
+
+    @property
+    def difficulty(self):
+        """Difficulty settings for this level, based on its AI level"""
+        destructible = self.tiles.count(DESTRUCTIBLE)
+        return {**getattr(Difficulty, self.ai), "size": self.size, "enemies": len(self.enemy_spawns),
+                "walls_percent": destructible / (self.size * self.size), "skills_count": len(self.skills)}
+
+    @classmethod
+    def from_map(cls, game_map, name, enemy_spawns=(), powerups=POWERUP_TABLE):
+        """Save a generated Map as a level"""
+        tiles = bytes(tile for row in game_map.grid for tile in row)
+        skills = [(skill.x, skill.y, skill.bomb_type) for skill in game_map.skills]
+        return cls(name, game_map.grid_size, tiles, (1, 1), enemy_spawns, skills, powerups,
+                   game_map.difficulty.get("name", "NORMAL"))
+
+def encode_level(level):
+    """The binary form of a level"""
+    name = level.name.encode("utf-8")[:255]
+    out = bytearray(LEVEL_HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, level.size, AI_LEVELS.index(level.ai),
+                                      level.player_start[0], level.player_start[1], len(level.enemy_spawns),
+                                      len(level.skills), len(level.powerups), len(name)))
+    out += name
+    out += level.tiles
+    for x, y in level.enemy_spawns:
+        out += SPAWN.pack(x, y)
+    for x, y, bomb_type in level.skills:
+        out += SKILL.pack(x, y, bomb_type.value)
+    for power_type, weight in level.powerups:
+        out += POWERUP_WEIGHT.pack(POWERUP_TYPES.index(power_type), round(weight * 1000))
+    return bytes(out)
+
+def decode_level(data):
+    """A Level from its binary form"""
+    try:
+        (magic, version, size, ai, start_x, start_y, spawn_count, skill_count,
+         powerup_count, name_length) = LEVEL_HEADER.unpack_from(data)
+        if magic != LEVEL_MAGIC:
+            raise ValueError("Not a level")
+        if version != LEVEL_VERSION:
+            raise ValueError(f"Unsupported level version {version}")
+
+        offset = LEVEL_HEADER.size
+        name = bytes(data[offset:offset + name_length]).decode("utf-8")
+        offset += name_length
+        tiles = bytes(data[offset:offset + size * size])
+        offset += size * size
+
+        spawns = [SPAWN.unpack_from(data, offset + i * SPAWN.size) for i in range(spawn_count)]
+        offset += spawn_count * SPAWN.size
+        skills = []
+        for _ in range(skill_count):
+            x, y, bomb_type = SKILL.unpack_from(data, offset)
+            skills.append((x, y, BombType(bomb_type)))
+            offset += SKILL.size
+        powerups = []
+        for _ in range(powerup_count):
+            index, weight = POWERUP_WEIGHT.unpack_from(data, offset)
+            powerups.append((POWERUP_TYPES[index], weight / 1000))
+            offset += POWERUP_WEIGHT.size
+        ai = AI_LEVELS[ai]
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Damaged level: {e}") from None
+    return Level(name, size, tiles, (start_x, start_y), spawns, skills, powerups, ai)
+
+def parse_ascii(text, name="untitled"):
+    """A Level from the ASCII authoring format.
+
+    Optional "key: value" lines (name, ai, powerups) come first, then a
+    "map:" line and the rows of the map:
+
+        name: Crossroads
+        ai: NORMAL
+        powerups: speed=0.3 extra_bomb=0.3 bomb_range=0.4
+        map:
+        #######
+        #P.+.E#
+        ...
+
+    # is a wall, + a destructible wall, . or a space an empty tile, P the
+    player start and E an enemy spawn. f, i and m are destructible walls
+    hiding a fire, ice or mega bomb skill.
+    """
+    fields = {"name": name, "ai": "NORMAL", "powerups": None}
+    lines = text.splitlines()
+    rows = None
+    for number, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.lower() == "map:":
+            rows = [row.rstrip("\n") for row in lines[number + 1:]]
+            break
+        if not stripped or stripped.startswith(";"):
+            continue
+        key, separator, value = stripped.partition(":")
+        if not separator or key.strip().lower() not in fields:
+            raise ValueError(f"Line {number + 1}: expected name, ai, powerups or map")
+        fields[key.strip().lower()] = value.strip()
+    if not rows:
+        raise ValueError("No map: section")
+    while rows and not rows[-1].strip():
+        rows.pop()
+
+    size = len(rows)
+    tiles = bytearray()
+    player_start = None
+    spawns = []
+    skills = []
+    for y, row in enumerate(rows):
+        row = row.ljust(size)
+        if len(row) != size:
+            raise ValueError(f"Map row {y + 1} is {len(row)} tiles wide, the map is {size} rows high")
+        for x, char in enumerate(row):
+            if char in ASCII_SKILLS:
+                skills.append((x, y, ASCII_SKILLS[char]))
+                tiles.append(DESTRUCTIBLE)
+            elif char in ASCII_TILES:
+                tiles.append(ASCII_TILES[char])
+            else:
+                raise ValueError(f"Unknown map character {char!r} at ({x}, {y})")
+            if char == "P":
+                player_start = (x, y)
+            elif char == "E":
+                spawns.append((x, y))
+
+    powerups = POWERUP_TABLE
+    if fields["powerups"]:
+        powerups = []
+        for entry in fields["powerups"].split():
+            power_type, _, weight = entry.partition("=")
+            if power_type not in POWERUP_TYPES:
+                raise ValueError(f"Unknown power-up {power_type!r}")
+            powerups.append((power_type, float(weight or 1)))
+    return Level(fields["name"], size, tiles, player_start or (1, 1), spawns, skills, powerups,
+                 fields["ai"].upper())
+
+def format_ascii(level):
+    """The ASCII authoring form of a level"""
+    chars = [ASCII_CHARS[tile] for tile in level.tiles]
+    size = level.size
+    for x, y, bomb_type in level.skills:
+        chars[y * size + x] = {value: key for key, value in ASCII_SKILLS.items()}[bomb_type]
+    for x, y in level.enemy_spawns:
+        chars[y * size + x] = "E"
+    chars[level.player_start[1] * size + level.player_start[0]] = "P"
+
+    lines = [f"name: {level.name}", f"ai: {level.ai}"]
+    if tuple(level.powerups) != POWERUP_TABLE:
+        lines.append("powerups: " + " ".join(f"{power_type}={weight:g}" for power_type, weight in level.powerups))
+    lines.append("map:")
+    lines.extend("".join(chars[y * size:(y + 1) * size]) for y in range(size))
+    return "\n".join(lines) + "\n"
+
+def write_pack(path, levels):
+    """Write levels to a pack file"""
+    blobs = [encode_level(level) for level in levels]
+    offset = PACK_HEADER.size + PACK_ENTRY.size * len(blobs)
+    with open(path, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(blobs)))
+        for blob in blobs:
+            f.write(PACK_ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+        for blob in blobs:
+            f.write(blob)
+
+class LevelPack:
+    """Levels in a pack file, decoded one at a time on demand.
+
+    The file is memory-mapped, so opening a pack reads only its header, and
+    a level only touches the pages it is stored on.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path}: empty level pack") from None
+
+        try:
+            magic, version, self.count = PACK_HEADER.unpack_from(self.data)
+        except struct.error:
+            magic, version = None, None
+        if magic != PACK_MAGIC or version != PACK_VERSION or \
+                PACK_HEADER.size + self.count * PACK_ENTRY.size > len(self.data):
+            self.close()
+            raise ValueError(f"{path}: not a level pack of version {PACK_VERSION}")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        offset, length = self.entry(index)
+        return decode_level(self.data[offset:offset + length])
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def entry(self, index):
+        """Offset and length of a level"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("level index out of range")
+        offset, length = PACK_ENTRY.unpack_from(self.data, PACK_HEADER.size + index * PACK_ENTRY.size)
+        if offset + length > len(self.data):
+            raise ValueError(f"{self.path}: level {index} lies outside the file")
+        return offset, length
+
+    def name(self, index):
+        """Name of a level, read from its header only"""
+        offset, _ = self.entry(index)
+        name_length = self.data[offset + LEVEL_HEADER.size - 1]
+        start = offset + LEVEL_HEADER.size
+        return self.data[start:start + name_length].decode("utf-8")
+
+    def find(self, name):
+        """Index of the first level with a name, or None"""
+        for index in range(self.count):
+            if self.name(index) == name:
+                return index
+        return None
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+def load_level(path, index=0):
+    """A level from a pack (by index or name) or from an ASCII file"""
+    with open(path, "rb") as f:
+        magic = f.read(len(PACK_MAGIC))
+    if magic == PACK_MAGIC:
+        with LevelPack(path) as pack:
+            if isinstance(index, str) and not index.isdigit():
+                found = pack.find(index)
+                if found is None:
+                    raise ValueError(f"{path}: no level named {index!r}")
+                index = found
+            return pack[int(index)]
+    if magic == LEVEL_MAGIC:
+        with open(path, "rb") as f:
+            return decode_level(f.read())
+    with open(path, encoding="utf-8") as f:
+        return parse_ascii(f.read(), os.path.splitext(os.path.basename(path))[0])
@@ -5,79 +5,188 @@ import random
 import pygame
 from .constants import *
 from .sprites import BombSkill
+from .blast_table import BlastTable
+from .levels import Level
+
+BOMB_TYPES = list(BombType)
+
+# Random tries for an empty spawn tile before listing all of them
+SPAWN_PROBES = 16
+
+# Fixed walls and candidate cells of each grid size, see base_layout
+_layouts = {}
+
+def base_layout(size):
+    """Border and pillar walls of a grid size as flat tiles, with the cells that may get
+    destructible walls and the cells enemies may spawn on (both as flat indexes)"""
+    layout = _layouts.get(size)
+    if layout is None:
+        tiles = bytearray(size * size)
+        for y in range(size):
+            for x in range(size):
+                # Border walls and pattern walls (every other tile)
+                if x == 0 or y == 0 or x == size - 1 or y == size - 1 or (x % 2 == 0 and y % 2 == 0):
+                    tiles[y * size + x] = WALL
+        # Destructible walls keep clear of the player start
+        wall_cells = tuple(y * size + x for y in range(size) for x in range(size)
+                           if tiles[y * size + x] == EMPTY and not (x <= 2 and y <= 2))
+        spawn_cells = tuple(y * size + x for y in range(3, size - 1) for x in range(3, size - 1)
+                            if tiles[y * size + x] == EMPTY)
+        layout = (bytes(tiles), wall_cells, spawn_cells)
+        _layouts[size] = layout
+    return layout
+
+def generate_tiles(difficulty, rng=random):
+    """Random flat tiles and hidden skills (x, y, BombType) for a difficulty.
+
+    Walls and skills are sampled from the precomputed free cells, so this
+    takes time linear in the grid size whatever the wall density. A wall
+    share above the free space simply fills all of it.
+    """
+    size = difficulty["size"]
+    base, wall_cells, _ = base_layout(size)
+    tiles = bytearray(base)
+    
+    wall_count = min(int(size * size * difficulty["walls_percent"]), len(wall_cells))
+    walls = rng.sample(wall_cells, wall_count)
+    for i in walls:
+        tiles[i] = DESTRUCTIBLE
+    
+    # Skill bombs go under distinct destructible walls
+    skill_cells = rng.sample(walls, min(difficulty["skills_count"], len(walls)))
+    skills = [(i % size, i // size, rng.choice(BOMB_TYPES)) for i in skill_cells]
+    return tiles, skills
+
+def pick_spawns(tiles, size, count, rng=random):
+    """Distinct empty spawn tiles (x, y) for count enemies on flat tiles, repeating only
+    when there are too few"""
+    _, _, spawn_cells = base_layout(size)
+    empty = [i for i in spawn_cells if tiles[i] == EMPTY]
+    if len(empty) >= count:
+        cells = rng.sample(empty, count)
+    else:
+        cells = [rng.choice(empty) for _ in range(count)] if empty else []
+    return [(i % size, i // size) for i in cells]
+
+def generate_many(n, seed, difficulty=Difficulty.NORMAL):
+    """Yield n generated levels (levels.Level) with enemy spawns, reproducible from the seed.
+
+    Skips the Map objects, images and blast tables of a played map, for
+    filling large map pools; write_pack in levels stores them.
+    """
+    rng = random.Random(seed)
+    size = difficulty["size"]
+    enemies = difficulty["enemies"]
+    for index in range(n):
+        tiles, skills = generate_tiles(difficulty, rng)
+        spawns = pick_spawns(tiles, size, enemies, rng)
+        yield Level(f"{seed}-{index}", size, tiles, (1, 1), spawns, skills, ai=difficulty.get("name", "NORMAL"))
 
 class Map:
-    def __init__(self, difficulty, game_assets):
+    def __init__(self, difficulty, game_assets, level=None, prepared=None):
         self.difficulty = difficulty
         self.grid_size = difficulty["size"]
         self.grid = [[EMPTY for _ in range(self.grid_size)] for _ in range(self.grid_size)]
         self.assets = game_assets
         self.skills = []
+        self.version = 0  # Incremented whenever any tile changes
+        self.base_version = 0  # Version right after the last full generation
+        self.change_log = []  # Tile changed at each version step since base_version
+        self.blast_table = BlastTable()  # Distances to the next blocking tile, kept in sync with the grid
+        self.level = level  # Hand-built level used instead of generating one
+        self.spawns = []  # Level spawn points not handed out yet
         
-        # Generate the map
-        self.generate_map()
+        # Generate the map, or take over one built ahead of time (see level_pregen.PreparedLevel)
+        if prepared is not None:
+            self.install(prepared)
+        else:
+            self.generate_map()
     
     def generate_map(self):
-        # Reset grid
-        self.grid = [[EMPTY for _ in range(self.grid_size)] for _ in range(self.grid_size)]
-        self.skills = []
-        
-        # Place indestructible walls (border and pattern)
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                # Border walls
-                if x == 0 or y == 0 or x == self.grid_size - 1 or y == self.grid_size - 1:
-                    self.grid[y][x] = WALL
-                # Pattern walls (every other tile)
-                elif x % 2 == 0 and y % 2 == 0:
-                    self.grid[y][x] = WALL
+        if self.level is not None:
+            self.load_level(self.level)
+            return
         
-        # Place destructible walls
-        wall_count = int(self.grid_size * self.grid_size * self.difficulty["walls_percent"])
-        placed = 0
+        # Indestructible border and pattern walls, then destructible walls and the skills under them
+        size = self.grid_size
+        tiles, skills = generate_tiles(self.difficulty)
+        self.grid = [list(tiles[y * size:(y + 1) * size]) for y in range(size)]
+        self.skills = [BombSkill(x, y, bomb_type, self.skill_image(bomb_type)) for x, y, bomb_type in skills]
+        self.change_log = []
+        self.version += 1
+        self.base_version = self.version
         
-        while placed < wall_count:
-            x = random.randint(1, self.grid_size - 2)
-            y = random.randint(1, self.grid_size - 2)
-            
-            # Skip if already a wall or too close to player start
-            if self.grid[y][x] != EMPTY or (x <= 2 and y <= 2):
-                continue
-            
-            self.grid[y][x] = DESTRUCTIBLE
-            placed += 1
-        
-        # Place skill bombs under destructible walls
-        for _ in range(self.difficulty["skills_count"]):
-            attempts = 0
-            while attempts < 100:  # Prevent infinite loop
-                x = random.randint(1, self.grid_size - 2)
-                y = random.randint(1, self.grid_size - 2)
-                
-                if self.grid[y][x] == DESTRUCTIBLE:
-                    bomb_type = random.choice(list(BombType))
-                    
-                    # Select appropriate image based on bomb type
-                    if bomb_type == BombType.FIRE:
-                        image = self.assets.fire_bomb_img
-                    elif bomb_type == BombType.ICE:
-                        image = self.assets.ice_bomb_img
-                    else:  # MEGA
-                        image = self.assets.mega_bomb_img
-                    
-                    self.skills.append(BombSkill(x, y, bomb_type, image))
-                    break
-                
-                attempts += 1
+        # Blast lines only change when walls do
+        self.blast_table.rebuild(self.grid, self.grid_size)
+    
+    def skill_image(self, bomb_type):
+        """Image of a skill bomb of the given type"""
+        if bomb_type == BombType.FIRE:
+            return self.assets.fire_bomb_img
+        elif bomb_type == BombType.ICE:
+            return self.assets.ice_bomb_img
+        else:  # MEGA
+            return self.assets.mega_bomb_img
+    
+    def load_level(self, level):
+        """Use a hand-built level (see levels.Level) instead of generating one"""
+        self.grid = level.grid()
+        self.skills = [BombSkill(x, y, bomb_type, self.skill_image(bomb_type)) for x, y, bomb_type in level.skills]
+        self.spawns = list(level.enemy_spawns)
+        self.change_log = []
+        self.version += 1
+        self.base_version = self.version
+        self.blast_table.rebuild(self.grid, self.grid_size)
+    
+    def install(self, prepared):
+        """Switch to a layout built ahead of time (see level_pregen.PreparedLevel).
+
+        The grid and blast distances are taken over as they are, only the
+        skill sprites are created here.
+        """
+        self.grid = prepared.grid
+        self.skills = [BombSkill(x, y, bomb_type, self.skill_image(bomb_type)) for x, y, bomb_type in prepared.skills]
+        self.change_log = []
+        self.version += 1
+        self.base_version = self.version
+        self.blast_table.grid = self.grid
+        self.blast_table.grid_size = self.grid_size
+        self.blast_table.reach = prepared.reach
+    
+    def set_tile(self, x, y, tile):
+        """Change a single tile and mark the map as modified"""
+        if self.grid[y][x] == tile:
+            return
+        self.grid[y][x] = tile
+        self.blast_table.tile_changed(x, y)
+        self.change_log.append((x, y))
+        self.version += 1
+    
+    def changes_since(self, version):
+        """Tiles changed after the given version, or None if the map was regenerated since"""
+        if version < self.base_version:
+            return None
+        return self.change_log[version - self.base_version:]
     
     def get_valid_spawn_position(self):
         """Get a valid position for spawning enemies"""
-        while True:
-            x = random.randint(3, self.grid_size - 2)
-            y = random.randint(3, self.grid_size - 2)
-            
-            if self.grid[y][x] == EMPTY:
-                return x, y
+        if self.spawns:
+            return self.spawns.pop(0)
+        size = self.grid_size
+        _, _, spawn_cells = base_layout(size)
+        
+        # On most maps a few random tries find an empty tile
+        for _ in range(SPAWN_PROBES if spawn_cells else 0):
+            i = random.choice(spawn_cells)
+            if self.grid[i // size][i % size] == EMPTY:
+                return i % size, i // size
+        
+        # Crowded map: choose among the empty tiles, anywhere if the spawn area is full
+        empty = [i for i in spawn_cells if self.grid[i // size][i % size] == EMPTY]
+        if not empty:
+            empty = [y * size + x for y in range(size) for x in range(size) if self.grid[y][x] == EMPTY]
+        i = random.choice(empty)
+        return i % size, i // size
     
     def is_valid_move(self, x, y, bombs):
         """Check if a position is valid for movement"""
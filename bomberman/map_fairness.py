@@ -0,0 +1,212 @@
+"""
+Fairness metrics for generated maps, scored over many seeds in a process pool
+"""
+import multiprocessing
+import random
+from collections import Counter, deque, namedtuple
+from .constants import *
+from .map import generate_tiles, pick_spawns
+from .input import MOVE_REPEAT_FRAMES
+
+START = (1, 1)
+START_BOMB_RANGE = 2  # Player.bomb_range before any power-up
+ESCAPE_STEPS = 120 // MOVE_REPEAT_FRAMES  # Steps a player walks before a fresh bomb (2 s fuse) goes off
+
+# Metrics of one map. Distances are in steps over empty tiles, None when there is no
+# such path; dig counts are destructible walls to blast on the cheapest route
+MapMetrics = namedtuple("MapMetrics", [
+    "seed",
+    "open_tiles",        # Empty tiles reachable from the start without blasting anything
+    "escape_steps",      # Steps from the start to a tile safe from a bomb dropped there
+    "spawn_distances",   # Open path length to each enemy spawn
+    "nearest_spawn",     # Shortest of those, None when no enemy can walk to the start
+    "spawn_digs",        # Walls between the start and each enemy spawn
+    "pockets",           # Enclosed groups of empty tiles cut off from the start
+    "skill_digs",        # Walls to blast to uncover each hidden skill
+])
+
+# Limits a map must meet to be kept, see criteria_for
+FairnessCriteria = namedtuple("FairnessCriteria", ["min_open_tiles", "max_escape_steps", "min_spawn_distance",
+                                                   "max_pockets", "max_skill_digs"])
+CHECKS = ("open area", "no escape", "close spawn", "pockets", "buried skill")
+MIN_OPEN_TILES = 3  # The start tile and its two neighbours
+MIN_SPAWN_DISTANCE = 6  # An enemy walking in over fewer steps reaches the player within seconds
+
+def criteria_for(difficulty):
+    """Default limits for a difficulty.
+
+    Pockets and buried skills grow with the grid and the wall share, so
+    their limits scale with the grid size and only cut off outliers.
+    """
+    size = difficulty["size"]
+    return FairnessCriteria(MIN_OPEN_TILES, ESCAPE_STEPS, MIN_SPAWN_DISTANCE, size * 2, size // 2)
+
+def neighbours(i, size):
+    """Flat indexes of the four tiles next to a tile (the border is always wall)"""
+    return (i + 1, i - 1, i + size, i - size)
+
+def open_distances(tiles, size, start):
+    """Steps over empty tiles from a flat index to every empty tile it can reach"""
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        i = queue.popleft()
+        for j in neighbours(i, size):
+            if tiles[j] == EMPTY and j not in distances:
+                distances[j] = distances[i] + 1
+                queue.append(j)
+    return distances
+
+def dig_counts(tiles, size, start):
+    """Fewest destructible walls to blast on the way from a flat index to every other tile.
+
+    A 0-1 breadth-first search: entering an empty tile is free, entering a
+    destructible wall costs one.
+    """
+    digs = {start: 0}
+    queue = deque([start])
+    while queue:
+        i = queue.popleft()
+        for j in neighbours(i, size):
+            tile = tiles[j]
+            if tile == WALL:
+                continue
+            cost = digs[i] + (tile == DESTRUCTIBLE)
+            if cost < digs.get(j, cost + 1):
+                digs[j] = cost
+                if tile == EMPTY:
+                    queue.appendleft(j)
+                else:
+                    queue.append(j)
+    return digs
+
+def blast_tiles(tiles, size, origin, bomb_range):
+    """Flat indexes covered by a bomb, the same way explode_bomb stops at the first non-empty tile"""
+    covered = {origin}
+    for step in (1, -1, size, -size):
+        i = origin
+        for _ in range(bomb_range):
+            i += step
+            covered.add(i)
+            if tiles[i] != EMPTY:
+                break
+    return covered
+
+def count_pockets(tiles, size, reached):
+    """Groups of connected empty tiles not reached from the start"""
+    seen = set(reached)
+    pockets = 0
+    for i, tile in enumerate(tiles):
+        if tile == EMPTY and i not in seen:
+            pockets += 1
+            seen.update(open_distances(tiles, size, i))
+    return pockets
+
+def map_metrics(tiles, size, spawns, skills, start=START, seed=None):
+    """Score one map given as flat tiles, enemy spawns (x, y) and skills (x, y, BombType)"""
+    origin = start[1] * size + start[0]
+    reached = open_distances(tiles, size, origin)
+    digs = dig_counts(tiles, size, origin)
+
+    covered = blast_tiles(tiles, size, origin, START_BOMB_RANGE)
+    safe = [steps for i, steps in reached.items() if i not in covered]
+    escape_steps = min(safe) if safe else None
+
+    spawn_distances = tuple(reached.get(y * size + x) for x, y in spawns)
+    walkable = [distance for distance in spawn_distances if distance is not None]
+    return MapMetrics(seed, len(reached), escape_steps, spawn_distances,
+                      min(walkable) if walkable else None,
+                      tuple(digs.get(y * size + x) for x, y in spawns),
+                      count_pockets(tiles, size, reached),
+                      tuple(digs.get(y * size + x) for x, y, _ in skills))
+
+def seed_metrics(difficulty, seed):
+    """Score the map level_pregen.prepare_level builds from a seed"""
+    rng = random.Random(seed)
+    size = difficulty["size"]
+    tiles, skills = generate_tiles(difficulty, rng)
+    spawns = pick_spawns(tiles, size, difficulty["enemies"], rng)
+    return map_metrics(tiles, size, spawns, skills, seed=seed)
+
+def failed_checks(metrics, criteria):
+    """Names of the criteria a map does not meet"""
+    failed = []
+    if metrics.open_tiles < criteria.min_open_tiles:
+        failed.append("open area")
+    if metrics.escape_steps is None or metrics.escape_steps > criteria.max_escape_steps:
+        failed.append("no escape")
+    if metrics.nearest_spawn is not None and metrics.nearest_spawn < criteria.min_spawn_distance:
+        failed.append("close spawn")
+    if metrics.pockets > criteria.max_pockets:
+        failed.append("pockets")
+    if any(digs is None or digs > criteria.max_skill_digs for digs in metrics.skill_digs):
+        failed.append("buried skill")
+    return failed
+
+def is_fair(metrics, criteria):
+    """Whether a map meets the criteria"""
+    return not failed_checks(metrics, criteria)
+
+def _score_chunk(args):
+    """Pool task: metrics of a range of seeds"""
+    difficulty, first, last = args
+    return [seed_metrics(difficulty, seed) for seed in range(first, last)]
+
+def analyze_seeds(difficulty, first_seed, count, processes=None, chunk=500):
+    """Metrics of count consecutive seeds, spread over all cores, in seed order"""
+    tasks = [(difficulty, start, min(start + chunk, first_seed + count))
+             for start in range(first_seed, first_seed + count, chunk)]
+    if processes == 1 or len(tasks) <= 1:
+        return [metrics for task in tasks for metrics in _score_chunk(task)]
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes) as pool:
+        return [metrics for results in pool.imap(_score_chunk, tasks) for metrics in results]
+
+def fair_seeds(results, criteria):
+    """Seeds of the results that meet the criteria"""
+    return [metrics.seed for metrics in results if is_fair(metrics, criteria)]
+
+def write_seed_list(path, difficulty, seeds):
+    """Save seeds for a difficulty, one per line after a difficulty line"""
+    with open(path, "w") as f:
+        f.write(f"difficulty: {difficulty['name']}\n")
+        for seed in seeds:
+            f.write(f"{seed}\n")
+
+def read_seed_list(path):
+    """Difficulty name and seeds of a file written by write_seed_list"""
+    name = None
+    seeds = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("difficulty:"):
+                name = line.split(":", 1)[1].strip().upper()
+                continue
+            try:
+                seeds.append(int(line))
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: expected a seed, got {line!r}")
+    if name is None:
+        raise ValueError(f"{path}: missing difficulty line")
+    return name, seeds
+
+def format_fairness_report(difficulty, results, seeds, criteria):
+    """Human readable summary of a seed analysis"""
+    count = len(results)
+    if not count:
+        return "Maps: 0"
+    lines = [f"Maps: {count}  difficulty: {difficulty['name']}  fair: {len(seeds)} ({len(seeds) / count:.1%})"]
+
+    rejected = Counter(check for metrics in results for check in failed_checks(metrics, criteria))
+    lines.append("rejected  " + "  ".join(f"{check}: {rejected[check]}" for check in CHECKS))
+
+    nearest = [m.nearest_spawn for m in results if m.nearest_spawn is not None]
+    lines.append(f"open tiles avg {sum(m.open_tiles for m in results) / count:.1f}  "
+                 f"pockets avg {sum(m.pockets for m in results) / count:.1f}  "
+                 f"nearest spawn min {min(nearest) if nearest else '-'}  "
+                 f"maps no enemy can walk into {count - len(nearest)}")
+    return "\n".join(lines)
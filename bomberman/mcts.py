@@ -0,0 +1,239 @@
+"""
+Anytime Monte-Carlo tree search controller for enemy robots
+"""
+import math
+import random
+import time
+from .constants import *
+from .blast_table import DIRECTIONS
+
+# Actions available to a searching enemy
+STAY, RIGHT, LEFT, DOWN, UP, BOMB = range(6)
+ACTION_MOVES = {STAY: (0, 0), RIGHT: (1, 0), LEFT: (-1, 0), DOWN: (0, 1), UP: (0, -1)}
+
+class ForwardModel:
+    """Lightweight simulation of one enemy, the player, bombs and blasts.
+
+    A state is a tuple (enemy_x, enemy_y, player_x, player_y, bombs, enemy_has_bomb)
+    where bombs is a tuple of (x, y, timer, range, is_enemy_bomb). One step is
+    one enemy decision. Walls are treated as static during a search.
+    """
+
+    def __init__(self, grid, grid_size, blast_table, bomb_range, step_frames, rng, player_skill=0.5):
+        self.grid = grid
+        self.grid_size = grid_size
+        self.blast_table = blast_table
+        self.bomb_range = bomb_range
+        self.step_frames = step_frames
+        self.rng = rng
+        self.player_skill = player_skill  # Chance the modelled player steps away from danger
+
+    def initial_state(self, game, enemy):
+        """Capture the live game as a search state"""
+        bombs = tuple((bomb.x, bomb.y, bomb.timer, getattr(bomb, 'range', 2), bomb.owner is enemy)
+                      for bomb in game.bombs)
+        return (enemy.x, enemy.y, game.player.x, game.player.y, bombs, enemy.active_bomb)
+
+    def is_walkable(self, x, y, bombs):
+        """Check if a tile can be entered"""
+        if x < 0 or x >= self.grid_size or y < 0 or y >= self.grid_size:
+            return False
+        if self.grid[y][x] != EMPTY:
+            return False
+        return not any(bomb[0] == x and bomb[1] == y for bomb in bombs)
+
+    def legal_actions(self, state):
+        """Actions that change something in the given state"""
+        ex, ey, _, _, bombs, has_bomb = state
+        actions = [STAY]
+        for action in (RIGHT, LEFT, DOWN, UP):
+            dx, dy = ACTION_MOVES[action]
+            if self.is_walkable(ex + dx, ey + dy, bombs):
+                actions.append(action)
+        if not has_bomb and not any(bomb[0] == ex and bomb[1] == ey for bomb in bombs):
+            actions.append(BOMB)
+        return actions
+
+    def step(self, state, action):
+        """Advance one decision; returns (next_state, reward, terminal)"""
+        ex, ey, px, py, bombs, has_bomb = state
+
+        # Enemy acts first
+        if action == BOMB:
+            bombs = bombs + ((ex, ey, 120, self.bomb_range, True),)
+            has_bomb = True
+        else:
+            dx, dy = ACTION_MOVES[action]
+            if (dx or dy) and self.is_walkable(ex + dx, ey + dy, bombs):
+                ex, ey = ex + dx, ey + dy
+
+        # The player takes a random step, sometimes avoiding tiles a bomb is about to cover
+        moves = [(px, py)]
+        for dx, dy in DIRECTIONS:
+            if self.is_walkable(px + dx, py + dy, bombs):
+                moves.append((px + dx, py + dy))
+        if self.rng.random() < self.player_skill:
+            moves = [move for move in moves if not self.is_threatened(move[0], move[1], bombs)] or moves
+        px, py = self.rng.choice(moves)
+
+        # Count down bombs and collect blast tiles
+        blasted = set()
+        remaining = []
+        for bx, by, timer, bomb_range, is_enemy in bombs:
+            timer -= self.step_frames
+            if timer <= 0:
+                blasted.update(self.blast_table.covered_tiles(bx, by, bomb_range))
+                if is_enemy:
+                    has_bomb = False
+            else:
+                remaining.append((bx, by, timer, bomb_range, is_enemy))
+
+        reward = 0.0
+        terminal = False
+        if (px, py) in blasted:
+            reward += 1.0
+            terminal = True
+        if (ex, ey) in blasted:
+            reward -= 1.0
+            terminal = True
+
+        return (ex, ey, px, py, tuple(remaining), has_bomb), reward, terminal
+
+    def is_threatened(self, x, y, bombs):
+        """Check if a bomb exploding within two steps would cover a tile"""
+        for bx, by, timer, bomb_range, _ in bombs:
+            if timer <= self.step_frames * 2 and self.blast_table.is_exposed(x, y, bx, by, bomb_range):
+                return True
+        return False
+
+    def evaluate(self, state):
+        """Heuristic value of a non-terminal state at the search horizon"""
+        ex, ey, px, py, bombs, _ = state
+        value = -0.02 * (abs(ex - px) + abs(ey - py))
+        if self.is_threatened(ex, ey, bombs):
+            value -= 0.5
+        if self.is_threatened(px, py, bombs):
+            value += 0.3
+        return value
+
+class SearchNode:
+    """Open-loop tree node: statistics for a sequence of actions"""
+
+    def __init__(self):
+        self.children = {}
+        self.visits = 0
+        self.value = 0.0
+
+    def best_child(self, actions, exploration):
+        """Pick an untried action, otherwise the child with the best UCB score"""
+        untried = [action for action in actions if action not in self.children]
+        if untried:
+            return untried[0], None
+
+        log_visits = math.log(self.visits + 1)
+        best_action = None
+        best_score = -float('inf')
+        for action in actions:
+            child = self.children[action]
+            score = child.value / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best_action = action
+        return best_action, self.children[best_action]
+
+class MCTSController:
+    """Anytime search that returns the best action found when its time budget runs out"""
+
+    def __init__(self, budget_ms=2.0, slices=2, horizon=8, exploration=1.4, seed=None):
+        self.budget_ms = budget_ms  # Search time per frame
+        self.slices = slices  # Frames a single decision may spread over
+        self.horizon = horizon  # Decisions simulated per rollout
+        self.exploration = exploration
+        self.discount = 0.95
+        self.rng = random.Random(seed)
+        self.root = SearchNode()
+        self.expected_position = None
+        self.iterations = 0  # Iterations in the last decision (for debugging)
+
+    def think(self, game, ai):
+        """Search in slices of budget_ms, yielding between slices so work spans frames"""
+        model = ForwardModel(game.grid, game.grid_size, game.blast_table,
+                             3 if ai.difficulty == "HARD" else 2, ai.decision_cooldown, self.rng)
+
+        # Keep the subtree of our last action if the move worked out as planned
+        if self.expected_position != (ai.enemy.x, ai.enemy.y):
+            self.root = SearchNode()
+
+        self.iterations = 0
+        for slice_index in range(self.slices):
+            root_state = model.initial_state(game, ai.enemy)
+            deadline = time.perf_counter() + self.budget_ms / 1000.0
+            # Never run past the scheduler's frame budget
+            scheduler = getattr(game, 'ai_scheduler', None)
+            if scheduler is not None and scheduler.frame_deadline is not None:
+                deadline = min(deadline, scheduler.frame_deadline)
+            while True:
+                self.iterate(model, root_state)
+                self.iterations += 1
+                if time.perf_counter() >= deadline:
+                    break
+            if slice_index < self.slices - 1:
+                yield
+
+    def iterate(self, model, root_state):
+        """One selection, expansion, rollout and backup pass"""
+        node = self.root
+        state = root_state
+        visited = [node]
+        rewards = []
+        terminal = False
+
+        # Selection and expansion down the tree
+        depth = 0
+        while not terminal and depth < self.horizon:
+            actions = model.legal_actions(state)
+            action, child = node.best_child(actions, self.exploration)
+            state, reward, terminal = model.step(state, action)
+            rewards.append(reward)
+            depth += 1
+            if child is None:
+                child = SearchNode()
+                node.children[action] = child
+                visited.append(child)
+                break
+            node = child
+            visited.append(node)
+
+        # Random rollout to the horizon
+        while not terminal and depth < self.horizon:
+            action = self.rng.choice(model.legal_actions(state))
+            state, reward, terminal = model.step(state, action)
+            rewards.append(reward)
+            depth += 1
+
+        # Discounted return seen from every depth, leaf value first
+        total = 0.0 if terminal else model.evaluate(state)
+        returns = [total]
+        for reward in reversed(rewards):
+            total = reward + self.discount * total
+            returns.append(total)
+        returns.reverse()
+
+        # Back up along the selected path. Each node is credited with the return from its
+        # parent's state: the reward of the action leading to it plus the discounted rest.
+        # The root gets the discounted total
+        for depth, node in enumerate(visited):
+            node.visits += 1
+            node.value += returns[max(depth - 1, 0)]
+
+    def choose_action(self, ai):
+        """Commit to the most visited action and reuse its subtree next time"""
+        if not self.root.children:
+            return STAY
+
+        action = max(self.root.children, key=lambda a: self.root.children[a].visits)
+        self.root = self.root.children[action]
+
+        dx, dy = ACTION_MOVES.get(action, (0, 0))
+        self.expected_position = (ai.enemy.x + dx, ai.enemy.y + dy)
+        return action
@@ -0,0 +1,586 @@
+"""
+Networked multiplayer: an authoritative UDP server, predicting clients and loopback bots
+"""
+import random
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import deque, namedtuple
+from .constants import *
+from .powerups import POWERUP_TYPES
+from .simulation import (Simulation, SimPlayer, HeadlessAssets, INPUT_MOVES, INPUT_ACTIONS,
+                         INPUT_BOMB)
+
+DEFAULT_PORT = 47800
+
+# Server simulation rate and ticks between two snapshots to each client
+TICK_RATE = 60
+SNAPSHOT_INTERVAL = 3
+
+# Newest unacknowledged inputs repeated in every input packet, so a lost packet costs nothing
+INPUT_REDUNDANCY = 8
+
+# Queued inputs beyond this are skipped, a client running ahead should not build up lag
+MAX_INPUT_BACKLOG = 6
+
+# Snapshots kept per client as delta bases; older ones fall back to a full snapshot
+MAX_HISTORY = 64
+
+# Seconds without a packet before a client is dropped
+CLIENT_TIMEOUT = 5.0
+
+MAX_PLAYERS = 4
+MAX_PACKET = 65507
+
+# Payloads shorter than this are not worth compressing
+COMPRESS_MIN_BYTES = 96
+
+# IPv4 and UDP headers, counted in the bandwidth reports
+UDP_OVERHEAD = 28
+
+# Message types, the first byte of every packet
+MSG_HELLO = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_SNAPSHOT = 4
+MSG_BYE = 5
+
+MESSAGE = struct.Struct("!B")
+WELCOME = struct.Struct("!BBBI")  # Type, player id, grid size, server tick
+INPUT_HEADER = struct.Struct("!BIB")  # Type, newest snapshot tick received, input count
+INPUT_ENTRY = struct.Struct("!IB")  # Input sequence number, input bits
+SNAPSHOT_HEADER = struct.Struct("!BIIIB")  # Type, tick, base tick (0 for none), last input applied, flags
+SNAPSHOT_COMPRESSED = 1
+
+# Delta sections
+COUNT = struct.Struct("!H")
+KEY = struct.Struct("!H")
+TILE_CHANGE = struct.Struct("!HB")
+FULL_TILES = 0xFFFF  # Tile count marking a raw copy of the whole grid
+
+# Entity tables of a state with the record layout of each entry.
+# players: x, y, health, lives, flags, bomb types, range, max bombs, move cooldown, speed boost, score
+# enemies: x, y, frozen
+# bombs: x, y, bomb type, owner (0x80 set for remote), tick it explodes at (16 bits)
+# powerups: x, y, index in POWERUP_TYPES
+# skills: bomb type of an uncovered skill, keyed by tile index
+# explosions: burning tiles, keyed by tile index
+TABLES = (
+    ("players", struct.Struct("!BBbbBBBBBhI")),
+    ("enemies", struct.Struct("!BBB")),
+    ("bombs", struct.Struct("!BBBBH")),
+    ("powerups", struct.Struct("!BBB")),
+    ("skills", struct.Struct("!B")),
+    ("explosions", struct.Struct("!")),
+)
+
+# Player record flags
+PLAYER_ALIVE = 1
+PLAYER_SHIELD = 2
+PLAYER_REMOTE = 4
+
+REMOTE_BOMB_OWNER = 0x80
+
+EMPTY_STATE = {"tiles": b"", **{name: {} for name, _ in TABLES}}
+
+def player_record(player):
+    """Snapshot entry of a player"""
+    flags = ((PLAYER_ALIVE if player.alive else 0) | (PLAYER_SHIELD if player.shield else 0) |
+             (PLAYER_REMOTE if player.has_remote_bomb else 0))
+    # Current bomb type in the low nibble, one bit per owned type above it
+    owned = sum(1 << (bomb_type.value - 1) for bomb_type in player.bomb_types)
+    bomb_types = player.current_bomb_type.value | owned << 4
+    return (player.x, player.y, max(-128, player.health), max(-128, player.lives), flags, bomb_types,
+            min(player.bomb_range, 255), min(player.max_bombs, 255), player.move_cooldown,
+            player.speed_boost, player.score)
+
+def encode_state(sim):
+    """Everything a client needs to show a Simulation tick, as comparable tables"""
+    size = sim.grid_size
+    owners = {}
+    for bomb in sim.bombs:
+        owner = bomb.owner.id if isinstance(bomb.owner, SimPlayer) else 0
+        owners[bomb.net_id] = owner | (REMOTE_BOMB_OWNER if bomb.is_remote else 0)
+
+    return {
+        "tiles": bytes(tile for row in sim.grid for tile in row),
+        "players": {player.id: player_record(player) for player in sim.players.values()},
+        "enemies": {enemy.net_id: (enemy.x, enemy.y, 1 if enemy.frozen > 0 else 0)
+                    for enemy in sim.enemies},
+        "bombs": {bomb.net_id: (bomb.x, bomb.y, bomb.bomb_type.value, owners[bomb.net_id],
+                                (sim.tick + bomb.timer) & 0xFFFF) for bomb in sim.bombs},
+        "powerups": {powerup.net_id: (powerup.x, powerup.y, POWERUP_TYPES.index(powerup.type))
+                     for powerup in sim.powerup_manager.powerups},
+        "skills": {skill.y * size + skill.x: (skill.bomb_type.value,) for skill in sim.map.skills
+                   if sim.grid[skill.y][skill.x] == EMPTY},
+        "explosions": {explosion.y * size + explosion.x: () for explosion in sim.explosions},
+    }
+
+def encode_delta(base, state):
+    """Bytes turning base into state: changed tiles, then changed and removed entries per table.
+
+    With no base every entry counts as new and the grid is sent whole.
+    """
+    if base is None:
+        base = EMPTY_STATE
+    out = bytearray()
+
+    tiles, base_tiles = state["tiles"], base["tiles"]
+    if len(tiles) != len(base_tiles):
+        out += COUNT.pack(FULL_TILES) + COUNT.pack(len(tiles)) + tiles
+    else:
+        changed = [i for i in range(len(tiles)) if tiles[i] != base_tiles[i]] if tiles != base_tiles else []
+        out += COUNT.pack(len(changed))
+        for i in changed:
+            out += TILE_CHANGE.pack(i, tiles[i])
+
+    for name, record in TABLES:
+        table, base_table = state[name], base[name]
+        changed = [(key, values) for key, values in table.items() if base_table.get(key) != values]
+        removed = [key for key in base_table if key not in table]
+        out += COUNT.pack(len(changed))
+        for key, values in changed:
+            out += KEY.pack(key) + record.pack(*values)
+        out += COUNT.pack(len(removed))
+        for key in removed:
+            out += KEY.pack(key)
+    return bytes(out)
+
+def apply_delta(base, data):
+    """The state encode_delta(base, state) was made from"""
+    if base is None:
+        base = EMPTY_STATE
+    state = {}
+    offset = 0
+
+    (count,), offset = COUNT.unpack_from(data, offset), offset + COUNT.size
+    if count == FULL_TILES:
+        (length,), offset = COUNT.unpack_from(data, offset), offset + COUNT.size
+        state["tiles"] = bytes(data[offset:offset + length])
+        offset += length
+    else:
+        tiles = bytearray(base["tiles"])
+        for _ in range(count):
+            i, tile = TILE_CHANGE.unpack_from(data, offset)
+            tiles[i] = tile
+            offset += TILE_CHANGE.size
+        state["tiles"] = bytes(tiles)
+
+    for name, record in TABLES:
+        table = dict(base[name])
+        (count,), offset = COUNT.unpack_from(data, offset), offset + COUNT.size
+        for _ in range(count):
+            (key,) = KEY.unpack_from(data, offset)
+            table[key] = record.unpack_from(data, offset + KEY.size)
+            offset += KEY.size + record.size
+        (count,), offset = COUNT.unpack_from(data, offset), offset + COUNT.size
+        for _ in range(count):
+            (key,) = KEY.unpack_from(data, offset)
+            table.pop(key, None)
+            offset += KEY.size
+        state[name] = table
+    return state
+
+class ClientSession:
+    """Server side of one connected client"""
+
+    def __init__(self, player_id, address):
+        self.player_id = player_id
+        self.address = address
+        self.inputs = {}  # Input bits waiting for their tick, by sequence number
+        self.next_seq = None  # Sequence number of the input for the next tick
+        self.applied_seq = 0  # Last input applied, reported back for client reconciliation
+        self.last_bits = 0
+        self.acked_tick = 0  # Newest snapshot the client confirmed, the base for deltas
+        self.history = {}  # States sent to the client by tick
+        self.last_heard = time.perf_counter()
+        self.bytes_sent = 0
+
+    def next_input(self):
+        """Input bits for this tick"""
+        if self.next_seq is None or not self.inputs:
+            # Nothing arrived yet; the input is applied once it does
+            return 0
+        if len(self.inputs) > MAX_INPUT_BACKLOG:
+            # The client runs ahead of the server, catch up to its recent inputs
+            newest = max(self.inputs)
+            self.next_seq = newest - MAX_INPUT_BACKLOG // 2
+            self.inputs = {seq: bits for seq, bits in self.inputs.items() if seq >= self.next_seq}
+
+        bits = self.inputs.pop(self.next_seq, None)
+        if bits is None:
+            # Lost on the way, keep moving the way the player was
+            bits = self.last_bits & ~INPUT_ACTIONS
+        self.last_bits = bits
+        self.applied_seq = self.next_seq
+        self.next_seq += 1
+        return bits
+
+    def remember(self, tick, state):
+        """Keep a sent state until the client acknowledges a newer one"""
+        self.history[tick] = state
+        for old in [t for t in self.history if t < self.acked_tick]:
+            del self.history[old]
+        while len(self.history) > MAX_HISTORY:
+            del self.history[min(self.history)]
+
+class GameServer:
+    """Runs a Simulation for networked players and streams delta snapshots to them.
+
+    Clients send input bits for each of their ticks and acknowledge the
+    newest snapshot they received. Every snapshot is a delta against the
+    last state the client acknowledged, so lost packets never need to be
+    resent: the next delta covers them.
+    """
+
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, difficulty=Difficulty.NORMAL, seed=0,
+                 snapshot_interval=SNAPSHOT_INTERVAL):
+        self.sim = Simulation(difficulty, seed, players=0)
+        self.snapshot_interval = snapshot_interval
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        self.sessions = {}  # By client address
+        self.bytes_sent = {}  # Total by player id, including clients that left
+        self.running = False
+
+    def run(self, seconds=None):
+        """Serve at TICK_RATE until stop is called or seconds have passed"""
+        self.running = True
+        next_tick = time.perf_counter()
+        end = None if seconds is None else next_tick + seconds
+        while self.running and (end is None or next_tick < end):
+            self.receive()
+            self.step()
+            next_tick += 1 / TICK_RATE
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -0.25:
+                # Too far behind to catch up, drop the missed ticks
+                next_tick = time.perf_counter()
+        self.sock.close()
+
+    def stop(self):
+        self.running = False
+
+    def send(self, session, packet):
+        try:
+            self.sock.sendto(packet, session.address)
+        except OSError:
+            return
+        session.bytes_sent += len(packet) + UDP_OVERHEAD
+        self.bytes_sent[session.player_id] = self.bytes_sent.get(session.player_id, 0) + len(packet) + UDP_OVERHEAD
+
+    def receive(self):
+        """Handle every waiting packet"""
+        while True:
+            try:
+                data, address = self.sock.recvfrom(MAX_PACKET)
+            except BlockingIOError:
+                return
+            except OSError:
+                continue  # E.g. an ICMP error from a client that went away
+            if not data:
+                continue
+
+            try:
+                session = self.sessions.get(address)
+                if data[0] == MSG_HELLO:
+                    self.welcome(address)
+                elif session is None:
+                    continue
+                elif data[0] == MSG_INPUT:
+                    self.receive_input(session, data)
+                elif data[0] == MSG_BYE:
+                    self.drop(session)
+            except struct.error:
+                continue  # Malformed packet
+
+    def welcome(self, address):
+        """Add a player for a new client, or repeat the welcome to a known one"""
+        session = self.sessions.get(address)
+        if session is None:
+            taken = {session.player_id for session in self.sessions.values()}
+            free = [player_id for player_id in range(1, MAX_PLAYERS + 1) if player_id not in taken]
+            if not free:
+                self.sock.sendto(MESSAGE.pack(MSG_BYE), address)
+                return
+            session = ClientSession(free[0], address)
+            self.sessions[address] = session
+            self.sim.add_player(session.player_id)
+        self.send(session, WELCOME.pack(MSG_WELCOME, session.player_id, self.sim.grid_size, self.sim.tick))
+
+    def receive_input(self, session, data):
+        _, ack, count = INPUT_HEADER.unpack_from(data)
+        session.last_heard = time.perf_counter()
+        if ack in session.history:
+            session.acked_tick = max(session.acked_tick, ack)
+
+        offset = INPUT_HEADER.size
+        for _ in range(count):
+            seq, bits = INPUT_ENTRY.unpack_from(data, offset)
+            offset += INPUT_ENTRY.size
+            if session.next_seq is None:
+                session.next_seq = seq
+            if seq >= session.next_seq:
+                session.inputs[seq] = bits
+
+    def drop(self, session):
+        """Remove a client and its player"""
+        del self.sessions[session.address]
+        self.sim.players.pop(session.player_id, None)
+
+    def step(self):
+        """One server tick"""
+        now = time.perf_counter()
+        for session in list(self.sessions.values()):
+            if now - session.last_heard > CLIENT_TIMEOUT:
+                self.drop(session)
+
+        inputs = {session.player_id: session.next_input() for session in self.sessions.values()}
+        self.sim.step(inputs)
+        if self.sim.tick % self.snapshot_interval == 0:
+            self.send_snapshots()
+
+    def send_snapshots(self):
+        """Send each client the current state as a delta against its acknowledged one"""
+        tick = self.sim.tick
+        state = encode_state(self.sim)
+        for session in self.sessions.values():
+            base = session.history.get(session.acked_tick)
+            base_tick = session.acked_tick if base is not None else 0
+            payload = encode_delta(base, state)
+            flags = 0
+            if len(payload) >= COMPRESS_MIN_BYTES:
+                packed = zlib.compress(payload)
+                if len(packed) < len(payload):
+                    payload, flags = packed, SNAPSHOT_COMPRESSED
+            header = SNAPSHOT_HEADER.pack(MSG_SNAPSHOT, tick, base_tick, session.applied_seq, flags)
+            self.send(session, header + payload)
+            session.remember(tick, state)
+
+BombPosition = namedtuple("BombPosition", "x y")
+
+class PredictionWorld:
+    """The parts of a snapshot that player movement checks"""
+
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.grid = [[EMPTY] * grid_size for _ in range(grid_size)]
+        self.bombs = []
+        self.assets = HeadlessAssets()
+
+    def load(self, state):
+        size = self.grid_size
+        tiles = state["tiles"]
+        self.grid = [list(tiles[y * size:(y + 1) * size]) for y in range(size)]
+        self.bombs = [BombPosition(x, y) for x, y, *_ in state["bombs"].values()]
+
+class GameClient:
+    """Connects to a GameServer, sends input and predicts its own player.
+
+    The local player moves as soon as input is sent. When a snapshot
+    arrives, the prediction restarts from the server's player and replays
+    the inputs the server had not applied yet, so only real disagreements
+    (an enemy in the way, a bomb the client did not know about) show up as
+    corrections. Actions are not predicted; bombs appear with the snapshot.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.server = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.player_id = None
+        self.grid_size = None
+        self.world = None
+        self.states = {}  # Received states by tick, possible bases of the next deltas
+        self.state = None  # Newest received state
+        self.tick = 0  # Tick of self.state
+        self.seq = 0  # Sequence number of the last input sent
+        self.pending = deque(maxlen=TICK_RATE * 2)  # (seq, bits) the server has not applied yet
+        self.predicted = None  # SimPlayer moved by local input ahead of the server
+        self.snapshots = 0
+        self.bytes_received = 0
+        self.corrections = 0
+
+    def connect(self, attempts=10, timeout=0.5):
+        """Say hello until the server answers"""
+        self.sock.settimeout(timeout)
+        for _ in range(attempts):
+            self.sock.sendto(MESSAGE.pack(MSG_HELLO), self.server)
+            try:
+                data, _ = self.sock.recvfrom(MAX_PACKET)
+            except socket.timeout:
+                continue
+            if data and data[0] == MSG_WELCOME:
+                _, self.player_id, self.grid_size, self.tick = WELCOME.unpack_from(data)
+                self.world = PredictionWorld(self.grid_size)
+                self.sock.setblocking(False)
+                return
+            if data and data[0] == MSG_BYE:
+                raise ConnectionError("Server is full")
+        raise ConnectionError(f"No answer from {self.server[0]}:{self.server[1]}")
+
+    def close(self):
+        try:
+            self.sock.sendto(MESSAGE.pack(MSG_BYE), self.server)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def send_input(self, bits):
+        """Send this tick's input, with the recent unacknowledged ones, and predict it"""
+        self.seq += 1
+        self.pending.append((self.seq, bits))
+        entries = list(self.pending)[-INPUT_REDUNDANCY:]
+        packet = INPUT_HEADER.pack(MSG_INPUT, self.tick, len(entries))
+        packet += b"".join(INPUT_ENTRY.pack(seq, entry_bits) for seq, entry_bits in entries)
+        try:
+            self.sock.sendto(packet, self.server)
+        except OSError:
+            pass
+        if self.predicted is not None:
+            self.predict(self.predicted, bits)
+
+    def predict(self, player, bits):
+        player.apply_input(bits & ~INPUT_ACTIONS, self.world)
+        player.update()
+
+    def poll(self):
+        """Handle waiting snapshots, returns True when the state changed"""
+        changed = False
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(MAX_PACKET)
+            except (BlockingIOError, socket.timeout):
+                return changed
+            except OSError:
+                return changed
+            if data and data[0] == MSG_SNAPSHOT:
+                self.bytes_received += len(data) + UDP_OVERHEAD
+                try:
+                    changed = self.receive_snapshot(data) or changed
+                except (struct.error, zlib.error, IndexError):
+                    continue  # Malformed packet
+
+    def receive_snapshot(self, data):
+        _, tick, base_tick, ack_seq, flags = SNAPSHOT_HEADER.unpack_from(data)
+        if tick <= self.tick:
+            return False  # Duplicate or out of order
+        base = None
+        if base_tick:
+            base = self.states.get(base_tick)
+            if base is None:
+                return False  # Based on a state we no longer have; the server sends a full one later
+
+        payload = data[SNAPSHOT_HEADER.size:]
+        if flags & SNAPSHOT_COMPRESSED:
+            payload = zlib.decompress(payload)
+        state = apply_delta(base, payload)
+
+        # The server never goes back to a base older than the one it just used
+        self.states = {t: s for t, s in self.states.items() if t >= base_tick}
+        self.states[tick] = state
+        self.state = state
+        self.tick = tick
+        self.snapshots += 1
+        self.reconcile(ack_seq)
+        return True
+
+    def reconcile(self, ack_seq):
+        """Restart prediction from the server's player and replay unapplied input"""
+        while self.pending and self.pending[0][0] <= ack_seq:
+            self.pending.popleft()
+        record = self.state["players"].get(self.player_id)
+        if record is None:
+            return
+        self.world.load(self.state)
+
+        x, y, *_, move_cooldown, speed_boost, _ = record
+        player = SimPlayer(self.player_id, x, y)
+        player.move_cooldown = move_cooldown
+        player.speed_boost = speed_boost
+        for _, bits in self.pending:
+            self.predict(player, bits)
+
+        if self.predicted is not None and (self.predicted.x, self.predicted.y) != (player.x, player.y):
+            self.corrections += 1
+        self.predicted = player
+
+class BotClient(threading.Thread):
+    """A GameClient wandering the map and dropping bombs, for load and latency tests"""
+
+    def __init__(self, host, port, seconds, seed=0):
+        super().__init__(daemon=True)
+        self.client = GameClient(host, port)
+        self.seconds = seconds
+        self.rng = random.Random(seed)
+        self.error = None
+
+    def run(self):
+        try:
+            self.client.connect()
+        except ConnectionError as e:
+            self.error = e
+            return
+
+        bits = 0
+        ticks = 0
+        next_tick = time.perf_counter()
+        end = next_tick + self.seconds
+        while next_tick < end:
+            self.client.poll()
+            if ticks % 30 == 0:
+                bits = self.rng.choice(INPUT_MOVES)[0]
+                if self.rng.random() < 0.3:
+                    bits |= INPUT_BOMB
+            elif ticks % 30 == 1:
+                bits &= ~INPUT_BOMB
+            self.client.send_input(bits)
+
+            ticks += 1
+            next_tick += 1 / TICK_RATE
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.client.close()
+
+    def report(self):
+        client = self.client
+        return {
+            "player": client.player_id,
+            "snapshots": client.snapshots,
+            "kb_per_second": client.bytes_received / 1024 / self.seconds,
+            "corrections": client.corrections,
+            "error": str(self.error) if self.error else None,
+        }
+
+def run_loopback(bots=3, seconds=10.0, difficulty=Difficulty.NORMAL, seed=0, port=0):
+    """Serve a match to local bots over loopback and report what each one received"""
+    server = GameServer("127.0.0.1", port, difficulty, seed)
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+
+    host, port = server.address
+    clients = [BotClient(host, port, seconds, seed + i) for i in range(bots)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    server.stop()
+    server_thread.join()
+    return [client.report() for client in clients]
+
+def format_loopback_report(reports):
+    """Readable lines for run_loopback results"""
+    lines = ["player  snapshots  KB/s  corrections"]
+    for report in reports:
+        if report["error"]:
+            lines.append(f"bot failed: {report['error']}")
+            continue
+        lines.append(f"{report['player']:>6}  {report['snapshots']:>9}  {report['kb_per_second']:>4.1f}"
+                     f"  {report['corrections']:>11}")
+    return "\n".join(lines)
@@ -0,0 +1,217 @@
+"""
+Pooled particle effects for explosions, smoke and light
+"""
+import pygame
+try:
+    import numpy as np
+except ImportError:  # Particle effects are skipped without NumPy
+    np = None
+from .constants import *
+
+# Particle kinds
+SPARK, SMOKE, GLOW = 0, 1, 2
+
+# Pre-rendered fade steps per kind and colour variant
+FADE_STEPS = 8
+KIND_COLORS = {
+    SPARK: [YELLOW, ORANGE, (255, 90, 30)],
+    SMOKE: [(90, 90, 90), (120, 120, 120), (150, 150, 150)],
+    GLOW: [(255, 200, 120), (120, 200, 255), (200, 120, 255)],
+}
+VARIANTS = 3
+
+# Motion per kind: velocity kept per frame and downward pull in tiles per frame^2
+KIND_DRAG = [0.92, 0.96, 1.0]
+KIND_GRAVITY = [0.004, -0.002, 0.0]
+
+# Pool size as a multiple of the per-burst particle count of the quality level
+POOL_BURSTS = 100
+
+class ParticleSystem:
+    """Fixed-size pool of particles stored in parallel arrays.
+
+    Live particles are packed at the front of the arrays, so updating them is
+    a few vectorized operations and dead ones are dropped by compaction. The
+    pool size is the global particle budget: bursts that do not fit are cut
+    short. Drawing picks one of a few cached sprites per particle and blits
+    them all in one call.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.enabled = np is not None
+        self.quality = None
+        self.capacity = 0
+        self.count = 0
+        self.sprites = []
+        self.sprite_offsets = None
+        self.rng = np.random.default_rng() if self.enabled else None  # Keeps game randomness untouched
+        if self.enabled:
+            self.configure()
+
+    def configure(self):
+        """Size the pool and build sprites for the current graphics quality"""
+        quality = self.config.get_current_quality_settings()
+        if quality is self.quality:
+            return
+        self.quality = quality
+
+        capacity = quality["particles"] * POOL_BURSTS
+        if capacity != self.capacity:
+            self.capacity = capacity
+            self.positions = np.zeros((capacity, 2), dtype=np.float32)  # In tiles
+            self.velocities = np.zeros((capacity, 2), dtype=np.float32)  # Tiles per frame
+            self.life = np.zeros(capacity, dtype=np.int16)  # Frames left
+            self.max_life = np.ones(capacity, dtype=np.int16)
+            self.kinds = np.zeros(capacity, dtype=np.int8)
+            self.variants = np.zeros(capacity, dtype=np.int8)
+            self.count = 0
+
+        self.drag = np.array(KIND_DRAG, dtype=np.float32)
+        self.gravity = np.array(KIND_GRAVITY, dtype=np.float32)
+        self.build_sprites()
+
+    def build_sprites(self):
+        """Render every kind, colour variant and fade step once"""
+        self.sprites = []
+        offsets = []
+        for kind in (SPARK, SMOKE, GLOW):
+            for color in KIND_COLORS[kind]:
+                for step in range(FADE_STEPS):
+                    fade = 1 - step / FADE_STEPS
+                    if kind == SPARK:
+                        radius = max(1, int(TILE_SIZE * 0.06 * fade + 1))
+                        alpha = int(255 * fade)
+                    elif kind == SMOKE:
+                        radius = int(TILE_SIZE * (0.12 + 0.18 * (1 - fade)))
+                        alpha = int(140 * fade)
+                    else:
+                        radius = int(TILE_SIZE * (0.9 + 0.3 * (1 - fade)))
+                        alpha = int(110 * fade)
+
+                    sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+                    if kind == GLOW:
+                        # Soft light: concentric circles getting brighter toward the centre
+                        for ring in range(4, 0, -1):
+                            pygame.draw.circle(sprite, (*color, alpha // ring), (radius, radius),
+                                               radius * ring // 4)
+                    else:
+                        pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+                    if pygame.display.get_surface() is not None:
+                        sprite = sprite.convert_alpha()
+                    self.sprites.append(sprite)
+                    offsets.append((radius, radius))
+        self.sprite_offsets = np.array(offsets, dtype=np.int32)
+
+    def clear(self):
+        """Remove all particles"""
+        self.count = 0
+
+    def seed(self, seed):
+        """Make particle motion repeatable, e.g. for benchmarks"""
+        if self.enabled:
+            self.rng = np.random.default_rng(seed)
+
+    def emit(self, x, y, kind, count, speed, life):
+        """Spawn up to count particles at (x, y) in tile units, within the budget"""
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return 0
+
+        start, end = self.count, self.count + count
+        angles = self.rng.uniform(0, 2 * np.pi, count)
+        speeds = self.rng.uniform(0.3, 1.0, count) * speed
+        self.positions[start:end, 0] = x
+        self.positions[start:end, 1] = y
+        self.velocities[start:end, 0] = np.cos(angles) * speeds
+        self.velocities[start:end, 1] = np.sin(angles) * speeds
+        lives = self.rng.integers(life // 2, life + 1, count)
+        self.life[start:end] = lives
+        self.max_life[start:end] = lives
+        self.kinds[start:end] = kind
+        self.variants[start:end] = self.rng.integers(0, VARIANTS, count)
+        self.count = end
+        return count
+
+    def explosion(self, x, y, variant=0):
+        """Sparks, smoke and a flash of light for a bomb going off at tile (x, y)"""
+        if not self.enabled or not self.config.particle_effects:
+            return
+        self.configure()
+
+        cx, cy = x + 0.5, y + 0.5
+        amount = self.quality["particles"]
+        if self.quality["glow_effects"]:
+            if self.emit(cx, cy, GLOW, 1, 0.0, 20):
+                self.variants[self.count - 1] = variant
+        self.emit(cx, cy, SPARK, amount, 0.15, 40)
+        self.emit(cx, cy, SMOKE, max(1, amount // 2), 0.03, 70)
+
+    def debris(self, x, y):
+        """Smoke puff for a destroyed wall at tile (x, y)"""
+        if not self.enabled or not self.config.particle_effects:
+            return
+        self.configure()
+        self.emit(x + 0.5, y + 0.5, SMOKE, max(1, self.quality["particles"] // 3), 0.02, 50)
+
+    def update(self):
+        """Advance all particles one frame and drop the dead ones"""
+        n = self.count
+        if n == 0:
+            return
+
+        kinds = self.kinds[:n]
+        velocities = self.velocities[:n]
+        velocities *= self.drag[kinds][:, None]
+        velocities[:, 1] += self.gravity[kinds]
+        self.positions[:n] += velocities
+        self.life[:n] -= 1
+
+        alive = self.life[:n] > 0
+        remaining = int(np.count_nonzero(alive))
+        if remaining < n:
+            for array in (self.positions, self.velocities, self.life, self.max_life,
+                          self.kinds, self.variants):
+                array[:remaining] = array[:n][alive]
+            self.count = remaining
+
+    def bounds(self):
+        """Screen rectangle covering every live particle, or None if there are none"""
+        n = self.count
+        if n == 0:
+            return None
+        pixels = self.positions[:n] * TILE_SIZE
+        left, top = pixels.min(axis=0)
+        right, bottom = pixels.max(axis=0)
+        margin = int(self.sprite_offsets.max()) + 1
+        return pygame.Rect(int(left) - margin, int(top) - margin,
+                           int(right - left) + margin * 2, int(bottom - top) + margin * 2)
+
+    def draw(self, screen):
+        """Blit every particle with its cached sprite"""
+        n = self.count
+        if n == 0:
+            return
+        if not self.config.particle_effects:
+            self.clear()
+            return
+
+        # Sprite index from kind, colour variant and how far the particle has faded
+        steps = ((1 - self.life[:n] / self.max_life[:n]) * FADE_STEPS).astype(np.int32)
+        np.clip(steps, 0, FADE_STEPS - 1, out=steps)
+        indices = (self.kinds[:n].astype(np.int32) * VARIANTS + self.variants[:n]) * FADE_STEPS + steps
+        corners = (self.positions[:n] * TILE_SIZE).astype(np.int32) - self.sprite_offsets[indices]
+
+        sprites = self.sprites
+        glow = self.kinds[:n] == GLOW
+        index_list = indices.tolist()
+        corner_list = corners.tolist()
+        glow_list = glow.tolist()
+
+        screen.blits([(sprites[i], corner) for i, corner, lit in zip(index_list, corner_list, glow_list)
+                      if not lit], doreturn=False)
+        if any(glow_list):
+            # Light adds to what is underneath
+            screen.blits([(sprites[i], corner, None, pygame.BLEND_RGB_ADD)
+                          for i, corner, lit in zip(index_list, corner_list, glow_list) if lit],
+                         doreturn=False)
@@ -71,28 +71,35 @@ class PowerUpType:
     HEALTH = "health"         # Restores health points
     ICE_IMMUNITY = "ice_immunity" # Immunity to ice bomb slow effect
 
+# Power-up types with their drop probabilities
+POWERUP_TABLE = (
+    (PowerUpType.SPEED, 0.20),
+    (PowerUpType.EXTRA_BOMB, 0.20),
+    (PowerUpType.BOMB_RANGE, 0.15),
+    (PowerUpType.SHIELD, 0.10),
+    (PowerUpType.EXTRA_LIFE, 0.05),
+    (PowerUpType.REMOTE_BOMB, 0.10),
+    (PowerUpType.ARMOR, 0.10),
+    (PowerUpType.HEALTH, 0.05),
+    (PowerUpType.ICE_IMMUNITY, 0.05),
+)
+
+# Fixed order of the power-up types, for compact encodings
+POWERUP_TYPES = tuple(power_type for power_type, _ in POWERUP_TABLE)
+
 class PowerUpManager:
     def __init__(self, game_assets):
         self.assets = game_assets
         self.powerups = []
+        self.table = POWERUP_TABLE  # Drop weights, a level can bring its own
         
-    def create_powerup(self, x, y):
-        """Create a random power-up at the specified position"""
+    def create_powerup(self, x, y, rng=random):
+        """Create a random power-up at the specified position (rng picks the type)"""
         # Determine power-up type with different probabilities
-        power_types = [
-            (PowerUpType.SPEED, 0.20),
-            (PowerUpType.EXTRA_BOMB, 0.20),
-            (PowerUpType.BOMB_RANGE, 0.15),
-            (PowerUpType.SHIELD, 0.10),
-            (PowerUpType.EXTRA_LIFE, 0.05),
-            (PowerUpType.REMOTE_BOMB, 0.10),
-            (PowerUpType.ARMOR, 0.10),
-            (PowerUpType.HEALTH, 0.05),
-            (PowerUpType.ICE_IMMUNITY, 0.05)
-        ]
+        power_types = self.table
         
         # Select power-up type based on probability
-        power_type = random.choices(
+        power_type = rng.choices(
             [p[0] for p in power_types],
             weights=[p[1] for p in power_types],
             k=1
@@ -135,11 +142,11 @@ class PowerUpManager:
             powerup.draw(screen)
     
     def check_collision(self, player):
-        """Check if player collides with any power-up"""
+        """Apply a power-up the player stands on, returns it (None if there was none)"""
         for powerup in self.powerups[:]:
             if powerup.x == player.x and powerup.y == player.y and not powerup.collected:
                 powerup.apply(player)
                 powerup.collected = True
                 self.powerups.remove(powerup)
-                return True
-        return False
\ No newline at end of file
+                return powerup
+        return None
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Adaptive graphics quality driven by measured frame time
+"""
+from collections import deque
+from .constants import *
+
+# Quality levels from cheapest to most expensive
+QUALITY_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+
+class QualityGovernor:
+    """Steps GameConfig.graphics_quality down when frames run over budget and back up with headroom.
+
+    Frame times are averaged over a window of frames. One slow window steps
+    quality down; stepping up needs several consecutive windows well under
+    budget, and every change is followed by a cooldown so the level does not
+    oscillate around the threshold.
+    """
+
+    def __init__(self, config, target_ms=1000 / FPS, window=60, up_ratio=0.6,
+                 up_windows=5, cooldown_windows=3):
+        self.config = config
+        self.target_ms = target_ms
+        self.window = window  # Frames per measurement window
+        self.up_ratio = up_ratio  # Step up only when frames take less than this share of the budget
+        self.up_windows = up_windows  # Consecutive fast windows needed to step up
+        self.cooldown_windows = cooldown_windows  # Windows ignored after a change
+        self.frame_times = deque(maxlen=window)
+        self.frames = 0
+        self.fast_windows = 0
+        self.cooldown = 0
+        self.skip_frames = 0  # Samples to drop, e.g. a frame that included a menu
+        self.changes = 0  # Number of quality changes made (for debugging)
+
+    def reset(self):
+        """Forget measurements, e.g. after a menu or level change"""
+        self.frame_times.clear()
+        self.frames = 0
+        self.fast_windows = 0
+        self.cooldown = 0
+        # The frame in progress includes the interruption, do not count it
+        self.skip_frames = 1
+
+    def average_ms(self):
+        """Rolling average frame time"""
+        if not self.frame_times:
+            return 0.0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    def record(self, frame_ms):
+        """Add one frame's time, adjusting quality at the end of each window"""
+        if self.skip_frames > 0:
+            self.skip_frames -= 1
+            return
+        self.frame_times.append(frame_ms)
+        self.frames += 1
+        if self.frames % self.window == 0:
+            self.evaluate()
+
+    def evaluate(self):
+        """Compare the last window against the budget and step quality if needed"""
+        if not self.config.adaptive_quality:
+            return
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return
+
+        average = self.average_ms()
+        if average > self.target_ms:
+            self.fast_windows = 0
+            self.step(-1)
+        elif average < self.target_ms * self.up_ratio:
+            self.fast_windows += 1
+            if self.fast_windows >= self.up_windows:
+                self.step(1)
+        else:
+            self.fast_windows = 0
+
+    def step(self, direction):
+        """Move one quality level down (-1) or up (1)"""
+        index = QUALITY_LEVELS.index(self.config.graphics_quality) + direction
+        self.fast_windows = 0
+        if 0 <= index < len(QUALITY_LEVELS):
+            self.config.set_graphics_quality(QUALITY_LEVELS[index])
+            self.cooldown = self.cooldown_windows
+            self.changes += 1
@@ -0,0 +1,181 @@
+"""
+Connected-component labelling of walkable tiles for O(1) reachability queries
+"""
+from collections import deque
+from .constants import *
+
+class RegionLabels:
+    """Labels every walkable tile (empty, no bomb) with the region it belongs to.
+
+    Opening a tile (destroyed wall, exploded bomb) merges the neighbouring
+    regions with a union-find; closing a tile (new bomb) relabels only the
+    region it may have split. "Is B reachable from A" is then a label compare.
+    """
+
+    def __init__(self, max_changes=32):
+        self.max_changes = max_changes  # More changes than this triggers a full rebuild
+        self.grid = None
+        self.grid_size = 0
+        self.labels = []  # Flat list of raw labels, -1 for blocked tiles
+        self.parent = {}  # Union-find parent of each raw label
+        self.next_label = 0
+        self.bomb_tiles = frozenset()
+        self.map_version = -1
+        self.rebuilds = 0  # Number of full rebuilds (for debugging)
+
+    def sync(self, game):
+        """Bring the labels up to date with the current grid and bombs"""
+        bomb_tiles = frozenset((bomb.x, bomb.y) for bomb in game.bombs)
+        changes = None
+        if self.grid is game.grid and self.grid_size == game.grid_size:
+            changes = game.map.changes_since(self.map_version)
+
+        if changes is None:
+            self.rebuild(game.grid, game.grid_size, bomb_tiles)
+        else:
+            changed_tiles = set(changes)
+            if bomb_tiles != self.bomb_tiles:
+                changed_tiles.update(bomb_tiles.symmetric_difference(self.bomb_tiles))
+            self.bomb_tiles = bomb_tiles
+
+            if len(changed_tiles) > self.max_changes:
+                self.rebuild(game.grid, game.grid_size, bomb_tiles)
+            else:
+                self.refresh_tiles(changed_tiles)
+
+        self.map_version = game.map.version
+
+    def is_walkable(self, x, y):
+        """Check the live grid and bombs for a walkable tile"""
+        return (0 <= x < self.grid_size and 0 <= y < self.grid_size and
+                self.grid[y][x] == EMPTY and (x, y) not in self.bomb_tiles)
+
+    def rebuild(self, grid, grid_size, bomb_tiles):
+        """Label all regions from scratch"""
+        self.grid = grid
+        self.grid_size = grid_size
+        self.bomb_tiles = bomb_tiles
+        self.labels = [-1] * (grid_size * grid_size)
+        self.parent = {}
+        self.next_label = 0
+        self.rebuilds += 1
+
+        for y in range(grid_size):
+            for x in range(grid_size):
+                if self.labels[y * grid_size + x] < 0 and self.is_walkable(x, y):
+                    self.flood_fill(x, y, self.new_label())
+
+    def new_label(self):
+        """Allocate a fresh region label"""
+        label = self.next_label
+        self.next_label += 1
+        self.parent[label] = label
+        return label
+
+    def find(self, label):
+        """Union-find root of a raw label"""
+        root = label
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Path compression
+        while self.parent[label] != root:
+            self.parent[label], label = root, self.parent[label]
+        return root
+
+    def flood_fill(self, x, y, label):
+        """Assign a label to every walkable tile connected to (x, y)"""
+        size = self.grid_size
+        self.labels[y * size + x] = label
+        queue = deque([(x, y)])
+
+        while queue:
+            cx, cy = queue.popleft()
+            for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+                nx, ny = cx + dx, cy + dy
+                if self.is_walkable(nx, ny) and self.labels[ny * size + nx] != label:
+                    self.labels[ny * size + nx] = label
+                    queue.append((nx, ny))
+
+    def refresh_tiles(self, tiles):
+        """Update labels after the walkability of some tiles may have changed.
+
+        Opened tiles are joined first; closed tiles are then blocked all
+        together before any region is relabelled, so adjacent tiles closing
+        in the same batch do not count each other as walkable.
+        """
+        closed = []
+        for x, y in tiles:
+            was_walkable = self.labels[y * self.grid_size + x] >= 0
+            walkable = self.is_walkable(x, y)
+            if walkable and not was_walkable:
+                self.open_tile(x, y)
+            elif was_walkable and not walkable:
+                closed.append((x, y))
+
+        if closed:
+            self.close_tiles(closed)
+
+    def open_tile(self, x, y):
+        """A tile became walkable: join it to its neighbouring regions"""
+        roots = set()
+        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+            nx, ny = x + dx, y + dy
+            if self.is_walkable(nx, ny) and self.labels[ny * self.grid_size + nx] >= 0:
+                roots.add(self.find(self.labels[ny * self.grid_size + nx]))
+
+        if not roots:
+            self.labels[y * self.grid_size + x] = self.new_label()
+            return
+
+        # Union all neighbouring regions under one root
+        root = roots.pop()
+        for other in roots:
+            self.parent[other] = root
+        self.labels[y * self.grid_size + x] = root
+
+    def close_tiles(self, tiles):
+        """Tiles became blocked: relabel the regions they may have split"""
+        for x, y in tiles:
+            self.labels[y * self.grid_size + x] = -1
+
+        neighbors = {(x + dx, y + dy) for x, y in tiles for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]
+                     if self.is_walkable(x + dx, y + dy)}
+
+        # A dead end or a single passage cannot split a region, as long as only one tile closed
+        if len(tiles) == 1 and len(neighbors) <= 1:
+            return
+
+        relabeled = set()
+        for nx, ny in neighbors:
+            label = self.labels[ny * self.grid_size + nx]
+            if label in relabeled:
+                continue
+            label = self.new_label()
+            self.flood_fill(nx, ny, label)
+            relabeled.add(label)
+
+    def region_of(self, x, y):
+        """Region id of a walkable tile, or None if it is blocked"""
+        if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
+            return None
+        label = self.labels[y * self.grid_size + x]
+        return self.find(label) if label >= 0 else None
+
+    def connected(self, ax, ay, bx, by):
+        """Check if (bx, by) can be reached by walking from (ax, ay)"""
+        if (ax, ay) == (bx, by):
+            return True
+
+        target = self.region_of(bx, by)
+        if target is None:
+            return False
+
+        start = self.region_of(ax, ay)
+        if start is not None:
+            return start == target
+
+        # Standing on a bomb: any walkable neighbour leads out
+        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+            if self.region_of(ax + dx, ay + dy) == target:
+                return True
+        return False
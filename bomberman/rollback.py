@@ -0,0 +1,328 @@
+"""
+Rollback netcode for two-player versus matches over UDP
+"""
+import heapq
+import multiprocessing
+import random
+import socket
+import struct
+import time
+import zlib
+from .constants import *
+from .simulation import Simulation, INPUT_MOVES, INPUT_ACTIONS, INPUT_BOMB
+
+TICK_RATE = 60
+
+# Frame time the rollback and re-simulation must fit in
+FRAME_BUDGET_MS = 16.0
+
+# Ticks between pressing a key and the input taking effect; hides that much latency without rollback
+INPUT_DELAY = 2
+
+# Furthest the simulation may run ahead of the newest confirmed remote input
+MAX_ROLLBACK = 8
+
+# Local inputs repeated per packet until the peer confirms them
+MAX_INPUTS_PER_PACKET = 32
+
+# Ticks between state checksums compared with the peer to detect desyncs
+CHECKSUM_INTERVAL = 30
+
+MAX_PACKET = 1024
+
+# Type, newest remote tick confirmed, checksum tick, checksum, first input tick, input count
+INPUT_PACKET = struct.Struct("!BIIIIB")
+MSG_INPUTS = 1
+
+def state_checksum(state):
+    """Checksum of a Simulation.save_state result that two peers can compare"""
+    fields = {key: value for key, value in state.items() if key != "skills"}
+    fields["skills"] = [(skill.x, skill.y, skill.bomb_type.value) for skill in state["skills"]]
+    return zlib.crc32(repr(fields).encode())
+
+class LossyLink:
+    """UDP socket that can delay and drop outgoing packets, to test bad networks locally"""
+
+    def __init__(self, port, remote, delay_ms=0, jitter_ms=0, loss=0.0, seed=0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", port))
+        self.sock.setblocking(False)
+        self.remote = remote
+        self.delay = delay_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.queue = []  # (due time, order, packet), a heap
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, packet):
+        self.sent += 1
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        due = time.perf_counter() + self.delay + self.rng.uniform(0, self.jitter)
+        heapq.heappush(self.queue, (due, self.sent, packet))
+        self.flush()
+
+    def flush(self):
+        """Send the delayed packets that are due"""
+        now = time.perf_counter()
+        while self.queue and self.queue[0][0] <= now:
+            _, _, packet = heapq.heappop(self.queue)
+            try:
+                self.sock.sendto(packet, self.remote)
+            except OSError:
+                pass
+
+    def receive(self):
+        """Packets that arrived since the last call"""
+        self.flush()
+        packets = []
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(MAX_PACKET)
+            except BlockingIOError:
+                return packets
+            except OSError:
+                continue  # E.g. an ICMP error while the peer is not up yet
+            packets.append(data)
+
+    def close(self):
+        self.sock.close()
+
+class RollbackSession:
+    """Runs one side of a versus match, rolling back when a guess about the peer was wrong.
+
+    Both peers step identical Simulations with the same inputs. Local input
+    is scheduled INPUT_DELAY ticks ahead and sent to the peer with every
+    input it has not confirmed yet. Missing remote input is predicted by
+    repeating the peer's last movement; when the real input differs, the
+    state saved before that tick is loaded and the ticks since are
+    simulated again within the same frame. The simulation never runs more
+    than MAX_ROLLBACK ticks ahead of the peer's confirmed input, so one
+    rollback never re-simulates more than that.
+    """
+
+    def __init__(self, sim, local_id, remote_id, link, input_delay=INPUT_DELAY, max_rollback=MAX_ROLLBACK):
+        self.sim = sim
+        self.local_id = local_id
+        self.remote_id = remote_id
+        self.link = link
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+
+        self.local_inputs = {tick: 0 for tick in range(1, input_delay + 1)}  # By tick
+        self.remote_inputs = {}  # Real inputs from the peer, by tick
+        self.predicted = {}  # Remote input guessed for ticks simulated without the real one
+        self.states = {}  # Simulation state at the start of each tick that may be rolled back
+        self.confirmed = 0  # Every remote input up to this tick has arrived
+        self.peer_confirmed = 0  # Every local input up to this tick reached the peer
+        self.rollback_from = None  # First tick simulated with a wrong guess
+
+        self.checksums = {}  # Own checksums every CHECKSUM_INTERVAL ticks, by tick
+        self.peer_checksums = {}  # The peer's checksums not compared yet
+        self.peer_check_tick = 0  # Tick of the newest checksum from the peer
+        self.latest_checksum = (0, 0)  # Newest own checksum, sent to the peer
+
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.deepest_rollback = 0
+        self.slowest_rollback_ms = 0.0
+        self.stalls = 0
+        self.checks = 0
+        self.desyncs = 0
+
+    def frame(self, local_bits):
+        """One frame: take in peer input, fix mispredictions, then step once.
+
+        Returns False when the frame waited for the peer instead of stepping.
+        """
+        self.receive()
+        if self.rollback_from is not None:
+            self.rollback()
+        self.check_desyncs()
+
+        # Later rollbacks start after the confirmed tick. Inputs are kept until they are
+        # simulated, and the newest confirmed one for predict.
+        for tick in [tick for tick in self.states if tick <= self.confirmed]:
+            del self.states[tick]
+        for tick in [tick for tick in self.remote_inputs if tick < min(self.confirmed, self.sim.tick + 1)]:
+            del self.remote_inputs[tick]
+
+        next_tick = self.sim.tick + 1
+        if next_tick - self.confirmed > self.max_rollback:
+            # Too far ahead of the peer, wait so a rollback stays within budget
+            self.stalls += 1
+            self.send()
+            return False
+
+        self.local_inputs[next_tick + self.input_delay] = local_bits
+        self.send()
+        self.advance()
+        return True
+
+    def predict(self, tick):
+        """Guess the peer's input: keep moving the way it last moved, no new actions"""
+        return self.remote_inputs.get(self.confirmed, 0) & ~INPUT_ACTIONS
+
+    def advance(self):
+        """Save the state and step one tick with the best inputs known"""
+        tick = self.sim.tick + 1
+        self.states[tick] = self.sim.save_state()
+        remote = self.remote_inputs.get(tick)
+        if remote is None:
+            remote = self.predict(tick)
+            self.predicted[tick] = remote
+        else:
+            self.predicted.pop(tick, None)
+        self.sim.step({self.local_id: self.local_inputs.get(tick, 0), self.remote_id: remote})
+
+        if tick % CHECKSUM_INTERVAL == 0:
+            # Final once the tick is confirmed, until then a rollback may replace it
+            self.checksums[tick] = state_checksum(self.sim.save_state())
+
+    def rollback(self):
+        """Load the state before the first wrong guess and simulate up to the present again"""
+        start, self.rollback_from = self.rollback_from, None
+        end = self.sim.tick
+        started = time.perf_counter()
+        self.sim.load_state(self.states[start])
+        while self.sim.tick < end:
+            self.advance()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.rollbacks += 1
+        self.resimulated += end - start + 1
+        self.deepest_rollback = max(self.deepest_rollback, end - start + 1)
+        self.slowest_rollback_ms = max(self.slowest_rollback_ms, elapsed_ms)
+
+    def send(self):
+        """Send every local input the peer has not confirmed, oldest first"""
+        first = self.peer_confirmed + 1
+        last = min(max(self.local_inputs), first + MAX_INPUTS_PER_PACKET - 1)
+        bits = bytes(self.local_inputs[tick] for tick in range(first, last + 1))
+        check_tick, checksum = self.latest_checksum
+        self.link.send(INPUT_PACKET.pack(MSG_INPUTS, self.confirmed, check_tick, checksum, first, len(bits)) + bits)
+
+        # Kept while the peer may still need them or a rollback may replay them
+        done = min(self.peer_confirmed, self.confirmed, self.sim.tick)
+        for tick in [tick for tick in self.local_inputs if tick <= done]:
+            del self.local_inputs[tick]
+
+    def receive(self):
+        for data in self.link.receive():
+            try:
+                kind, peer_confirmed, check_tick, checksum, first, count = INPUT_PACKET.unpack_from(data)
+            except struct.error:
+                continue
+            if kind != MSG_INPUTS:
+                continue
+            self.peer_confirmed = max(self.peer_confirmed, peer_confirmed)
+            if check_tick > self.peer_check_tick:
+                self.peer_check_tick = check_tick
+                self.peer_checksums[check_tick] = checksum
+
+            for i, bits in enumerate(data[INPUT_PACKET.size:INPUT_PACKET.size + count]):
+                tick = first + i
+                if tick <= self.confirmed or tick in self.remote_inputs:
+                    continue
+                self.remote_inputs[tick] = bits
+                guess = self.predicted.pop(tick, None)
+                if guess is not None and guess != bits:
+                    self.rollback_from = tick if self.rollback_from is None else min(self.rollback_from, tick)
+
+        while self.confirmed + 1 in self.remote_inputs:
+            self.confirmed += 1
+
+    def check_desyncs(self):
+        """Publish checksums of confirmed ticks and compare them with the peer's"""
+        for tick in sorted(self.checksums):
+            if tick > self.confirmed:
+                break
+            if tick > self.latest_checksum[0]:
+                self.latest_checksum = (tick, self.checksums[tick])
+            if tick in self.peer_checksums:
+                self.checks += 1
+                if self.checksums.pop(tick) != self.peer_checksums.pop(tick):
+                    self.desyncs += 1
+            elif tick < self.peer_check_tick:
+                del self.checksums[tick]  # The peer's packet with this one was lost
+
+    def report(self):
+        return {
+            "player": self.local_id,
+            "ticks": self.sim.tick,
+            "rollbacks": self.rollbacks,
+            "resimulated": self.resimulated,
+            "deepest_rollback": self.deepest_rollback,
+            "slowest_rollback_ms": self.slowest_rollback_ms,
+            "stalls": self.stalls,
+            "checks": self.checks,
+            "desyncs": self.desyncs,
+            "packets_dropped": self.link.dropped,
+        }
+
+def bot_input(rng, tick, bits):
+    """Wander and drop a bomb now and then, like netplay.BotClient"""
+    if tick % 30 == 0:
+        bits = rng.choice(INPUT_MOVES)[0]
+        if rng.random() < 0.3:
+            bits |= INPUT_BOMB
+    elif tick % 30 == 1:
+        bits &= ~INPUT_BOMB
+    return bits
+
+def run_peer(player_id, port, peer_port, seconds, difficulty, seed, delay_ms, jitter_ms, loss, results):
+    """One bot-controlled side of a local match, reporting into the results queue"""
+    sim = Simulation(difficulty, seed, players=2, enemies=False)
+    link = LossyLink(port, ("127.0.0.1", peer_port), delay_ms, jitter_ms, loss, seed + player_id)
+    session = RollbackSession(sim, player_id, 3 - player_id, link)
+    rng = random.Random(seed * 31 + player_id)
+
+    bits = 0
+    frames = 0
+    next_frame = time.perf_counter()
+    end = next_frame + seconds
+    while next_frame < end:
+        if session.frame(bits):
+            bits = bot_input(rng, frames, bits)
+            frames += 1
+        next_frame += 1 / TICK_RATE
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    link.close()
+    results.put(session.report())
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def run_local_match(seconds=10.0, delay_ms=60, jitter_ms=10, loss=0.05, difficulty=Difficulty.NORMAL, seed=0):
+    """Two bot peers in separate processes over a delayed, lossy loopback link"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    ports = (free_port(), free_port())
+    peers = [context.Process(target=run_peer, args=(player_id, ports[player_id - 1], ports[2 - player_id],
+                                                    seconds, difficulty, seed, delay_ms, jitter_ms, loss, results))
+             for player_id in (1, 2)]
+    for peer in peers:
+        peer.start()
+    reports = [results.get() for _ in peers]
+    for peer in peers:
+        peer.join()
+    return sorted(reports, key=lambda report: report["player"])
+
+def format_match_report(reports):
+    """Readable lines for run_local_match results"""
+    lines = []
+    for report in reports:
+        lines.append(f"Player {report['player']}: {report['ticks']} ticks, {report['rollbacks']} rollbacks "
+                     f"({report['resimulated']} ticks re-simulated, deepest {report['deepest_rollback']}, "
+                     f"slowest {report['slowest_rollback_ms']:.2f} ms of {FRAME_BUDGET_MS:.0f} ms), "
+                     f"{report['stalls']} stalls, {report['packets_dropped']} packets dropped, "
+                     f"{report['desyncs']} desyncs in {report['checks']} checks")
+    return "\n".join(lines)
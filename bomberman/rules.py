@@ -0,0 +1,133 @@
+"""
+Bomb, blast and pickup rules shared by the game and the headless simulation
+"""
+from .constants import *
+from .sprites import Enemy, Explosion
+from .blast_table import DIRECTIONS as BLAST_DIRECTIONS
+
+POWERUP_DROP_CHANCE = 0.2  # Chance that a destroyed wall leaves a power-up
+
+class BombRules:
+    """Rule steps GameController and simulation.Simulation have in common.
+
+    The host provides grid, map, bombs, explosions, enemies,
+    powerup_manager and rng (the random module or a random.Random), and
+    overrides the hooks below for what differs between the two: which
+    players a blast can reach, scores, sounds, events and particles.
+    """
+
+    def update_bombs(self):
+        """Tick bombs and explosions, exploding the bombs whose fuse ran out"""
+        for bomb in self.bombs[:]:
+            bomb.update()
+            if bomb.exploded:
+                self.explode_bomb(bomb)
+                self.bombs.remove(bomb)
+
+        for explosion in self.explosions[:]:
+            explosion.update()
+            if explosion.finished:
+                self.explosions.remove(explosion)
+
+    def explode_bomb(self, bomb):
+        """Blast lines, damage, destroyed walls and power-up drops of one bomb"""
+        explosion_img = self.explosion_image(bomb.bomb_type)
+        self.explosions.append(Explosion(bomb.x, bomb.y, explosion_img))
+
+        # Get explosion range based on bomb type and bomb range
+        base_range = 4 if bomb.bomb_type == BombType.MEGA else 2
+        explosion_range = bomb.range if hasattr(bomb, 'range') else base_range
+        self.bomb_detonated(bomb, explosion_range)
+
+        damage = BOMB_DAMAGE.get(bomb.bomb_type, 1)
+        effect = BOMB_EFFECTS.get(bomb.bomb_type, None)
+        hit_player = False  # Whether this bomb hit a player (for AI tracking)
+
+        for direction, (dx, dy) in enumerate(BLAST_DIRECTIONS):
+            # Empty tiles up to the first wall come straight from the blast table
+            open_count, blocker = self.map.blast_table.blast_line(bomb.x, bomb.y, direction, explosion_range)
+
+            for i in range(1, open_count + 1):
+                x, y = bomb.x + dx * i, bomb.y + dy * i
+                self.explosions.append(Explosion(x, y, explosion_img))
+
+                for player in self.players_at(x, y):
+                    hit_player = True
+                    self.damage_player(player, damage, effect)
+
+                for enemy in self.enemies[:]:
+                    if enemy.x == x and enemy.y == y:
+                        if bomb.bomb_type == BombType.ICE:
+                            enemy.freeze()
+                            self.enemy_frozen(enemy, bomb)
+                        else:
+                            self.enemies.remove(enemy)
+                            self.enemy_killed(enemy, bomb)
+
+            # Destroy a destructible wall at the end of the blast (indestructible walls just stop it)
+            if blocker is not None and self.grid[blocker[1]][blocker[0]] == DESTRUCTIBLE:
+                x, y = blocker
+                self.map.set_tile(x, y, EMPTY)
+                self.explosions.append(Explosion(x, y, explosion_img))
+                self.wall_destroyed(x, y, bomb)
+                if self.rng.random() < POWERUP_DROP_CHANCE:
+                    self.powerup_spawned(self.powerup_manager.create_powerup(x, y, self.rng))
+
+        # Update AI tracking for enemy bombs
+        if isinstance(bomb.owner, Enemy) and hasattr(bomb.owner, 'ai'):
+            bomb.owner.ai.bombs_placed += 1
+            if hit_player:
+                bomb.owner.ai.successful_hits += 1
+
+        self.bomb_exploded(bomb)
+
+    def pick_up_skills(self, player):
+        """Collect an uncovered skill bomb under a player"""
+        for skill in self.map.skills[:]:
+            if skill.x == player.x and skill.y == player.y and self.grid[skill.y][skill.x] == EMPTY:
+                if skill.bomb_type not in player.bomb_types:
+                    player.bomb_types.append(skill.bomb_type)
+                player.current_bomb_type = skill.bomb_type
+                self.map.skills.remove(skill)
+                self.skill_picked(player, skill)
+
+    def burn_players(self, players):
+        """Hit the players standing in an explosion, once a tick however many cover the tile"""
+        burning = {(explosion.x, explosion.y) for explosion in self.explosions}
+        for player in players:
+            if (player.x, player.y) in burning:
+                self.damage_player(player)
+
+    # Hooks, called by the steps above
+
+    def explosion_image(self, bomb_type):
+        """Image for the explosions of a bomb type"""
+        return None
+
+    def players_at(self, x, y):
+        """Players a blast reaching a tile hits"""
+        return ()
+
+    def damage_player(self, player, damage=1, effect=None):
+        """A blast or explosion hit a player"""
+
+    def bomb_detonated(self, bomb, explosion_range):
+        """A bomb goes off, called before its blast lines"""
+
+    def bomb_exploded(self, bomb):
+        """A bomb's blast is done"""
+
+    def enemy_frozen(self, enemy, bomb):
+        """An ice blast froze an enemy"""
+
+    def enemy_killed(self, enemy, bomb):
+        """A blast killed an enemy, already removed from enemies"""
+
+    def wall_destroyed(self, x, y, bomb):
+        """A blast destroyed the destructible wall at a tile"""
+
+    def powerup_spawned(self, powerup):
+        """A destroyed wall dropped a power-up"""
+
+    def skill_picked(self, player, skill):
+        """A player collected a skill bomb"""
@@ -0,0 +1,144 @@
+"""
+Reproducible worst-case boards for stress testing
+"""
+import random
+from .constants import *
+from .sprites import Bomb
+
+# Names accepted by ScenarioBuilder.build
+SCENARIOS = ("remote_bombs", "chain_reaction", "enemy_swarm", "powerup_flood")
+
+class ScenarioBuilder:
+    """Sets up a game on a seeded level and then pushes it into a worst case.
+
+    Every scenario starts from game.setup_game, so it works the same on an
+    interactive game, the frame benchmark or any other headless runner. The
+    level, enemy traits and every random choice below come from the seed.
+    """
+
+    def __init__(self, game, seed=1234):
+        self.game = game
+        self.seed = seed
+        self.scenarios = {
+            "remote_bombs": self.remote_bombs,
+            "chain_reaction": self.chain_reaction,
+            "enemy_swarm": self.enemy_swarm,
+            "powerup_flood": self.powerup_flood,
+        }
+
+    def build(self, name, difficulty=Difficulty.HARD, **options):
+        """Start a level with the given difficulty and apply the named scenario"""
+        if name not in self.scenarios:
+            raise ValueError(f"Unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+
+        random.seed(self.seed)
+        self.game.setup_game(difficulty)
+        self.game.particles.seed(self.seed)
+        self.scenarios[name](**options)
+
+        # The map and entities changed outside of play
+        self.game.display_tracker.invalidate()
+        return self.game
+
+    def open_tiles(self, exclude=()):
+        """Empty tiles without a bomb, in scan order"""
+        game = self.game
+        taken = {(bomb.x, bomb.y) for bomb in game.bombs}
+        taken.update(exclude)
+        return [(x, y) for y in range(game.grid_size) for x in range(game.grid_size)
+                if game.grid[y][x] == EMPTY and (x, y) not in taken]
+
+    def clear_destructible_walls(self):
+        """Remove every destructible wall, leaving skills uncovered"""
+        game = self.game
+        for y in range(game.grid_size):
+            for x in range(game.grid_size):
+                if game.grid[y][x] == DESTRUCTIBLE:
+                    game.map.set_tile(x, y, EMPTY)
+
+    def add_bomb(self, x, y, bomb_type, owner, timer, bomb_range):
+        """Put a bomb on the board"""
+        assets = self.game.assets
+        if bomb_type == BombType.ICE:
+            image = assets.ice_bomb_img
+        elif bomb_type == BombType.MEGA:
+            image = assets.mega_bomb_img
+        else:
+            image = assets.fire_bomb_img
+
+        bomb = Bomb(x, y, image, bomb_type, owner)
+        bomb.timer = timer
+        bomb.range = bomb_range
+        self.game.bombs.append(bomb)
+        return bomb
+
+    def remote_bombs(self, fuse=60, bomb_range=8):
+        """Remote bombs on every free tile, detonated together after fuse frames.
+
+        The player holds them as remote bombs, so pressing the detonate key
+        before the fuse runs out sets them all off at once as well.
+        """
+        game = self.game
+        player = game.player
+        player.has_remote_bomb = True
+        player.bomb_range = bomb_range
+        player.bomb_types = list(BombType)
+
+        player.remote_bombs = []
+        for x, y in self.open_tiles(exclude=[(player.x, player.y)]):
+            bomb = self.add_bomb(x, y, random.choice(player.bomb_types), player, fuse, bomb_range)
+            bomb.is_remote = True
+            player.remote_bombs.append(bomb)
+        player.max_bombs = len(player.remote_bombs)
+
+    def chain_reaction(self, first_fuse=30, ripple=3, bomb_range=3):
+        """A bomb on every free tile, going off in a wave from the middle of the map.
+
+        Bombs do not set each other off in this game, so the chain is built
+        from fuses that grow by ripple frames per tile of distance: explosions
+        keep overlapping the next ring of bombs across the whole screen.
+        """
+        game = self.game
+        middle = game.grid_size // 2
+        player = game.player
+        for x, y in self.open_tiles(exclude=[(player.x, player.y)]):
+            distance = abs(x - middle) + abs(y - middle)
+            bomb_type = BombType.MEGA if distance % 4 == 0 else BombType.FIRE
+            self.add_bomb(x, y, bomb_type, player, first_fuse + distance * ripple, bomb_range)
+
+    def enemy_swarm(self, count=300, bomb_spacing=4, fuse=60):
+        """Hundreds of enemies crowded around bombs about to explode.
+
+        Bombs sit on a lattice every bomb_spacing tiles with a fuse short
+        enough to count as danger, enemies are spread over the free tiles and
+        all start in escape mode with their decisions due on the first frame.
+        """
+        game = self.game
+        player = game.player
+        self.clear_destructible_walls()
+
+        for x, y in self.open_tiles(exclude=[(player.x, player.y)]):
+            if x % bomb_spacing == 1 and y % bomb_spacing == 1:
+                self.add_bomb(x, y, BombType.FIRE, player, fuse, 2)
+
+        tiles = self.open_tiles(exclude=[(player.x, player.y)])
+        random.shuffle(tiles)
+        game.enemies = []
+        for i in range(count):
+            x, y = tiles[i % len(tiles)]
+            enemy = game.spawn_enemy(x, y)
+            enemy.ai.state = "escape"
+            enemy.ai.last_decision_time = 0
+
+        # No staggering: every decision is due at once
+        game.ai_scheduler.reset(AI_FRAME_BUDGET_US[game.ai_difficulty])
+
+    def powerup_flood(self, clear_walls=True):
+        """A power-up on every free tile, by default with the destructible walls cleared first"""
+        game = self.game
+        if clear_walls:
+            self.clear_destructible_walls()
+
+        player = game.player
+        for x, y in self.open_tiles(exclude=[(player.x, player.y)]):
+            game.powerup_manager.create_powerup(x, y)
@@ -0,0 +1,274 @@
+"""
+Scene stack driven by the game's single main loop
+"""
+import pygame
+from .constants import *
+from .screen_utils import create_screen
+
+# Loop rate while a menu is on top; menus only redraw after input
+MENU_FPS = 30
+
+# Events after which the top scene is redrawn
+REDRAW_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.VIDEOEXPOSE, pygame.VIDEORESIZE,
+                 pygame.WINDOWFOCUSGAINED)
+
+class Scene:
+    """One screen of the game. Only the top scene of the stack gets events, updates and draws."""
+
+    def __init__(self, game):
+        self.game = game
+        self.dirty = True  # Draw on the next frame
+
+    def enter(self):
+        """Called when the scene is pushed"""
+
+    def exit(self):
+        """Called when the scene is popped"""
+
+    def resume(self):
+        """Called when the scene above this one is popped"""
+        self.dirty = True
+
+    def wait(self):
+        """Wait for the next frame"""
+        self.game.clock.tick(MENU_FPS)
+
+    def handle_event(self, event):
+        """React to one event"""
+
+    def update(self):
+        """Advance the scene by one frame"""
+
+    def draw(self):
+        """Draw the scene to the screen"""
+
+    def present(self):
+        """Show what draw produced"""
+        pygame.display.flip()
+
+class SceneStack:
+    """Scenes on top of each other, e.g. settings over pause over the game"""
+
+    def __init__(self):
+        self.scenes = []
+
+    @property
+    def top(self):
+        """The active scene, or None when the stack is empty"""
+        return self.scenes[-1] if self.scenes else None
+
+    def push(self, scene):
+        """Put a scene on top"""
+        self.scenes.append(scene)
+        scene.enter()
+
+    def pop(self):
+        """Remove the top scene and resume the one below"""
+        scene = self.scenes.pop()
+        scene.exit()
+        if self.scenes:
+            self.scenes[-1].resume()
+        return scene
+
+    def switch(self, scene):
+        """Replace the whole stack with one scene"""
+        while self.scenes:
+            self.scenes.pop().exit()
+        self.push(scene)
+
+class DifficultyScene(Scene):
+    """Difficulty selection, at startup or over a running game"""
+
+    def __init__(self, game, in_game=False):
+        super().__init__(game)
+        self.in_game = in_game
+        self.screen = None
+
+    def enter(self):
+        if self.in_game:
+            # Use existing screen if changing difficulty during gameplay
+            self.screen = self.game.screen
+            self.game.changing_difficulty = True
+        else:
+            # Use optimal size for laptop screens
+            width = min(800, int(self.game.screen_width * 0.8))
+            height = min(600, int(self.game.screen_height * 0.8))
+            self.screen = create_screen(width, height)
+
+    def exit(self):
+        self.game.changing_difficulty = False
+
+    def buttons(self):
+        """Button rects by difficulty, plus "back" when over a running game"""
+        center_x = self.screen.get_width() // 2
+        button_width = min(200, int(self.screen.get_width() * 0.3))
+        button_x = center_x - button_width // 2
+        buttons = {
+            "EASY": pygame.Rect(button_x, 250, button_width, 50),
+            "NORMAL": pygame.Rect(button_x, 320, button_width, 50),
+            "HARD": pygame.Rect(button_x, 390, button_width, 50),
+        }
+        if self.in_game:
+            buttons["back"] = pygame.Rect(button_x, 460, button_width, 50)
+        return buttons
+
+    def draw(self):
+        screen = self.screen
+        game = self.game
+        screen.fill(BLACK)
+
+        # Draw title
+        title = game.big_font.render("Bomberman", True, WHITE)
+        subtitle = game.font.render("Select Difficulty", True, WHITE)
+        center_x = screen.get_width() // 2
+        screen.blit(title, (center_x - title.get_width()//2, 100))
+        screen.blit(subtitle, (center_x - subtitle.get_width()//2, 160))
+
+        buttons = self.buttons()
+        labels = [("EASY", "Easy", GREEN, "15x15 grid, 3 enemies"),
+                  ("NORMAL", "Normal", YELLOW, "20x20 grid, 5 enemies"),
+                  ("HARD", "Hard", RED, "25x25 grid, 8 enemies")]
+        for name, label, color, details in labels:
+            rect = buttons[name]
+            pygame.draw.rect(screen, color, rect)
+            text = game.font.render(label, True, BLACK)
+            screen.blit(text, (center_x - text.get_width()//2, rect.y + 15))
+            details_text = game.small_font.render(details, True, WHITE)
+            screen.blit(details_text, (center_x - details_text.get_width()//2, rect.bottom))
+
+        # Add back button if changing difficulty during gameplay
+        if self.in_game:
+            rect = buttons["back"]
+            pygame.draw.rect(screen, GRAY, rect)
+            back_text = game.font.render("Back to Game", True, BLACK)
+            screen.blit(back_text, (center_x - back_text.get_width()//2, rect.y + 15))
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and self.in_game:
+            self.game.scenes.pop()
+
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            for name, rect in self.buttons().items():
+                if rect.collidepoint(event.pos):
+                    if name == "back":
+                        self.game.scenes.pop()
+                    else:
+                        self.game.setup_game(getattr(Difficulty, name))
+                        self.game.scenes.switch(GameScene(self.game))
+                    return
+
+class BoardScene(Scene):
+    """Base for scenes that show the game board"""
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return
+        game = self.game
+        if event.key == pygame.K_F1:
+            game.debug_mode = not game.debug_mode
+        elif event.key == pygame.K_F11:
+            # Toggle fullscreen mode
+            game.fullscreen_handler.toggle_fullscreen()
+            game.display_tracker.invalidate()
+        elif event.key == pygame.K_d and pygame.key.get_mods() & pygame.KMOD_CTRL:
+            # Ctrl+D changes difficulty at any time
+            game.scenes.push(DifficultyScene(game, in_game=True))
+        else:
+            self.handle_key(event.key)
+
+    def handle_key(self, key):
+        """React to a key not handled by every board scene"""
+
+    def draw(self):
+        self.game.render()
+
+    def present(self):
+        self.game.present()
+
+class GameScene(BoardScene):
+    """Gameplay: updates and draws every frame at the configured frame pacing"""
+
+    def enter(self):
+        self.resume()
+
+    def resume(self):
+        # A menu owned the display, and the time spent there is not a frame
+        self.dirty = True
+        self.game.player_input.reset()
+        self.game.display_tracker.invalidate()
+        self.game.quality_governor.reset()
+
+    def wait(self):
+        game = self.game
+        game.frame_pacer.wait()
+
+        # Time spent on the previous frame, excluding the wait for the frame rate
+        game.quality_governor.record(game.frame_pacer.work_ms)
+
+    def handle_key(self, key):
+        if key == pygame.K_ESCAPE:
+            self.game.scenes.push(PauseScene(self.game))
+        else:
+            # Gameplay keys are applied at the start of the next tick
+            self.game.player_input.key_down(key)
+
+    def update(self):
+        self.game.player_input.apply(self.game)
+        self.game.update()
+        self.dirty = True
+        if self.game.game_over:
+            self.game.scenes.push(GameOverScene(self.game))
+
+class OverlayScene(BoardScene):
+    """The frozen board under an overlay, redrawn only after input"""
+
+    def handle_key(self, key):
+        game = self.game
+        if key == pygame.K_d:
+            game.scenes.push(DifficultyScene(game, in_game=True))
+        elif key == pygame.K_s:
+            game.scenes.push(SettingsScene(game))
+        else:
+            self.handle_overlay_key(key)
+
+    def handle_overlay_key(self, key):
+        """Keys specific to this overlay"""
+
+class PauseScene(OverlayScene):
+    """Paused game"""
+
+    def enter(self):
+        self.game.paused = True
+
+    def exit(self):
+        self.game.paused = False
+
+    def handle_overlay_key(self, key):
+        if key == pygame.K_ESCAPE:
+            self.game.scenes.pop()
+
+class GameOverScene(OverlayScene):
+    """Game over, waiting for a restart"""
+
+    def handle_overlay_key(self, key):
+        if key == pygame.K_r:
+            # Reset the game with the same difficulty or level
+            self.game.setup_game(self.game.level or self.game.difficulty)
+            self.game.scenes.switch(GameScene(self.game))
+
+class SettingsScene(Scene):
+    """Settings menu drawn over the frozen board"""
+
+    def enter(self):
+        self.game.settings_menu.active = True
+
+    def exit(self):
+        self.game.settings_menu.active = False
+
+    def handle_event(self, event):
+        if not self.game.settings_menu.handle_event(event):
+            self.game.scenes.pop()
+
+    def draw(self):
+        self.game.render()
+        self.game.settings_menu.draw(self.game.screen)
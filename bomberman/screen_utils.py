@@ -53,7 +53,20 @@ def calculate_tile_size(grid_size, screen_width, screen_height, ui_height=60):
     # Use the smaller dimension to ensure everything fits
     return min(tile_size_width, tile_size_height)
 
-def create_screen(width, height):
-    """Create a centered pygame screen with the specified dimensions"""
+def create_screen(width, height, vsync=False, fullscreen=False):
+    """Create a centered pygame screen with the specified dimensions.
+
+    A vsync fullscreen keeps the given size and is scaled to the display;
+    otherwise fullscreen uses the display's own resolution.
+    """
     center_window()
+    if vsync:
+        flags = pygame.SCALED | (pygame.FULLSCREEN if fullscreen else 0)
+        try:
+            # pygame only honours vsync for scaled or OpenGL displays
+            return pygame.display.set_mode((width, height), flags, vsync=1)
+        except pygame.error:
+            pass  # Not available on this display, the frame cap still applies
+    if fullscreen:
+        return pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
     return pygame.display.set_mode((width, height))
\ No newline at end of file
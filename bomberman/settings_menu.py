@@ -3,6 +3,7 @@ Settings menu for the Bomberman game
 """
 import pygame
 from .constants import *
+from .assets import GameAssets
 
 class SettingsMenu:
     def __init__(self, game):
@@ -10,15 +11,27 @@ class SettingsMenu:
         self.active = False
         self.current_tab = "Graphics"  # Graphics, Sound, Game
         
-    def show(self):
-        """Display the settings menu"""
-        self.active = True
+    def layout(self, screen):
+        """Menu rect on the screen and the rects of its tabs and back button, relative to the menu"""
+        menu_width = int(screen.get_width() * 0.8)
+        menu_height = int(screen.get_height() * 0.8)
+        menu_rect = pygame.Rect((screen.get_width() - menu_width) // 2,
+                                (screen.get_height() - menu_height) // 2, menu_width, menu_height)
         
-        # Create a surface for the settings menu
-        menu_width = int(self.game.screen.get_width() * 0.8)
-        menu_height = int(self.game.screen.get_height() * 0.8)
-        menu_x = (self.game.screen.get_width() - menu_width) // 2
-        menu_y = (self.game.screen.get_height() - menu_height) // 2
+        tab_width = menu_width // 3
+        tab_height = 40
+        tab_y = 80
+        tabs = {tab: pygame.Rect(i * tab_width, tab_y, tab_width, tab_height)
+                for i, tab in enumerate(["Graphics", "Sound", "Game"])}
+        
+        back_rect = pygame.Rect(menu_width//2 - 100, menu_height - 60, 200, 40)
+        content_y = tab_y + tab_height + 20
+        return menu_rect, tabs, back_rect, content_y
+    
+    def draw(self, screen):
+        """Draw the settings menu over the screen"""
+        menu_rect, tabs, back_rect, content_y = self.layout(screen)
+        menu_width, menu_height = menu_rect.size
         
         menu_surface = pygame.Surface((menu_width, menu_height))
         menu_surface.fill((40, 40, 50))
@@ -31,15 +44,7 @@ class SettingsMenu:
         menu_surface.blit(title, (menu_width//2 - title.get_width()//2, 20))
         
         # Draw tabs
-        tab_width = menu_width // 3
-        tab_height = 40
-        tab_y = 80
-        
-        tabs = ["Graphics", "Sound", "Game"]
-        for i, tab in enumerate(tabs):
-            tab_x = i * tab_width
-            tab_rect = pygame.Rect(tab_x, tab_y, tab_width, tab_height)
-            
+        for tab, tab_rect in tabs.items():
             # Highlight current tab
             if tab == self.current_tab:
                 pygame.draw.rect(menu_surface, TECH_BLUE, tab_rect)
@@ -48,11 +53,10 @@ class SettingsMenu:
             
             pygame.draw.rect(menu_surface, WHITE, tab_rect, 1)
             tab_text = self.game.font.render(tab, True, WHITE)
-            menu_surface.blit(tab_text, (tab_x + tab_width//2 - tab_text.get_width()//2, 
-                                         tab_y + tab_height//2 - tab_text.get_height()//2))
+            menu_surface.blit(tab_text, (tab_rect.centerx - tab_text.get_width()//2, 
+                                         tab_rect.centery - tab_text.get_height()//2))
         
         # Draw settings based on current tab
-        content_y = tab_y + tab_height + 20
         if self.current_tab == "Graphics":
             self.draw_graphics_settings(menu_surface, content_y)
         elif self.current_tab == "Sound":
@@ -61,7 +65,6 @@ class SettingsMenu:
             self.draw_game_settings(menu_surface, content_y)
         
         # Draw back button
-        back_rect = pygame.Rect(menu_width//2 - 100, menu_height - 60, 200, 40)
         pygame.draw.rect(menu_surface, TECH_RED, back_rect)
         pygame.draw.rect(menu_surface, WHITE, back_rect, 1)
         back_text = self.game.font.render("Back", True, WHITE)
@@ -69,49 +72,39 @@ class SettingsMenu:
                                      menu_height - 60 + 20 - back_text.get_height()//2))
         
         # Blit menu to screen
-        self.game.screen.blit(menu_surface, (menu_x, menu_y))
-        pygame.display.flip()
-        
-        # Handle events
-        waiting = True
-        while waiting and self.active:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.active = False
-                        waiting = False
-                
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
-                    # Adjust mouse position relative to menu
-                    rel_x = mouse_pos[0] - menu_x
-                    rel_y = mouse_pos[1] - menu_y
-                    
-                    # Check if clicked on tabs
-                    if tab_y <= rel_y <= tab_y + tab_height:
-                        for i, tab in enumerate(tabs):
-                            tab_x = i * tab_width
-                            if tab_x <= rel_x <= tab_x + tab_width:
-                                self.current_tab = tab
-                                self.show()  # Refresh menu
-                                return
-                    
-                    # Check if clicked on back button
-                    if back_rect.collidepoint(rel_x, rel_y):
-                        self.active = False
-                        waiting = False
-                    
-                    # Handle settings interactions
-                    if self.current_tab == "Graphics":
-                        self.handle_graphics_click(rel_x, rel_y, content_y)
-                    elif self.current_tab == "Sound":
-                        self.handle_sound_click(rel_x, rel_y, content_y)
-                    elif self.current_tab == "Game":
-                        self.handle_game_click(rel_x, rel_y, content_y)
+        screen.blit(menu_surface, menu_rect.topleft)
+    
+    def handle_event(self, event):
+        """Handle one event, returns False when the menu is closed"""
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.active = False
+        
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            menu_rect, tabs, back_rect, content_y = self.layout(self.game.screen)
+            # Adjust mouse position relative to menu
+            rel_x = event.pos[0] - menu_rect.x
+            rel_y = event.pos[1] - menu_rect.y
+            
+            # Check if clicked on tabs
+            for tab, tab_rect in tabs.items():
+                if tab_rect.collidepoint(rel_x, rel_y):
+                    self.current_tab = tab
+                    return self.active
+            
+            # Check if clicked on back button
+            if back_rect.collidepoint(rel_x, rel_y):
+                self.active = False
+                return self.active
+            
+            # Handle settings interactions
+            if self.current_tab == "Graphics":
+                self.handle_graphics_click(rel_x, rel_y, content_y)
+            elif self.current_tab == "Sound":
+                self.handle_sound_click(rel_x, rel_y, content_y)
+            elif self.current_tab == "Game":
+                self.handle_game_click(rel_x, rel_y, content_y)
+        
+        return self.active
     
     def draw_graphics_settings(self, surface, start_y):
         """Draw graphics settings options"""
@@ -339,7 +332,8 @@ class SettingsMenu:
                 btn_x = button_x + i * (button_width + button_spacing)
                 if btn_x <= x <= btn_x + button_width:
                     self.game.config.set_graphics_quality(quality)
-                    self.show()  # Refresh menu
+                    # A quality picked by hand is kept
+                    self.game.config.adaptive_quality = False
                     return
         
         # Fullscreen toggle
@@ -347,7 +341,6 @@ class SettingsMenu:
         toggle_rect = pygame.Rect(width - padding - 60, toggle_y, 60, 30)
         if toggle_rect.collidepoint(x, y):
             self.game.config.toggle_fullscreen()
-            self.show()  # Refresh menu
             return
         
         # Show FPS toggle
@@ -355,7 +348,6 @@ class SettingsMenu:
         toggle_rect = pygame.Rect(width - padding - 60, toggle_y, 60, 30)
         if toggle_rect.collidepoint(x, y):
             self.game.config.show_fps = not self.game.config.show_fps
-            self.show()  # Refresh menu
             return
         
         # VSync toggle
@@ -363,7 +355,6 @@ class SettingsMenu:
         toggle_rect = pygame.Rect(width - padding - 60, toggle_y, 60, 30)
         if toggle_rect.collidepoint(x, y):
             self.game.config.vsync = not self.game.config.vsync
-            self.show()  # Refresh menu
             return
     
     def handle_sound_click(self, x, y, start_y):
@@ -377,7 +368,6 @@ class SettingsMenu:
         toggle_rect = pygame.Rect(width - padding - 60, toggle_y, 60, 30)
         if toggle_rect.collidepoint(x, y):
             self.game.config.sound_enabled = not self.game.config.sound_enabled
-            self.show()  # Refresh menu
             return
         
         # Music volume slider
@@ -389,7 +379,6 @@ class SettingsMenu:
                 # Calculate volume based on x position
                 self.game.config.music_volume = (x - slider_rect.x) / slider_width
                 self.game.config.music_volume = max(0, min(1, self.game.config.music_volume))
-                self.show()  # Refresh menu
                 return
         
         # SFX volume slider
@@ -400,7 +389,6 @@ class SettingsMenu:
                 # Calculate volume based on x position
                 self.game.config.sfx_volume = (x - slider_rect.x) / slider_width
                 self.game.config.sfx_volume = max(0, min(1, self.game.config.sfx_volume))
-                self.show()  # Refresh menu
                 return
     
     def handle_game_click(self, x, y, start_y):
@@ -414,7 +402,6 @@ class SettingsMenu:
         toggle_rect = pygame.Rect(width - padding - 60, toggle_y, 60, 30)
         if toggle_rect.collidepoint(x, y):
             self.game.config.toggle_robot_theme()
-            self.show()  # Refresh menu
             return
         
         # Particle effects toggle
@@ -422,7 +409,6 @@ class SettingsMenu:
         toggle_rect = pygame.Rect(width - padding - 60, toggle_y, 60, 30)
         if toggle_rect.collidepoint(x, y):
             self.game.config.toggle_particle_effects()
-            self.show()  # Refresh menu
             return
         
         # Screen shake toggle
@@ -430,7 +416,6 @@ class SettingsMenu:
         toggle_rect = pygame.Rect(width - padding - 60, toggle_y, 60, 30)
         if toggle_rect.collidepoint(x, y):
             self.game.config.screen_shake = not self.game.config.screen_shake
-            self.show()  # Refresh menu
             return
         
         # Apply button
@@ -441,5 +426,5 @@ class SettingsMenu:
             # Reload assets if robot theme changed
             if self.game.config.robot_theme:
                 self.game.assets = GameAssets()
-            self.show()  # Refresh menu
+                self.game.convert_images()
             return
\ No newline at end of file
@@ -0,0 +1,322 @@
+"""
+Headless game simulation for several players, driven by per-tick input bits
+"""
+import random
+from .constants import *
+from .sprites import Player, Enemy, Bomb, Explosion
+from .map import Map
+from .powerups import PowerUp, PowerUpManager
+from .enemy_ai import EnemyAI
+from .level_pregen import prepare_level
+from .flow_field import FlowField
+from .utility_maps import UtilityMaps
+from .input import repeat_frames
+from .rules import BombRules
+
+# Input bits, one byte per player per tick
+INPUT_UP = 1
+INPUT_DOWN = 2
+INPUT_LEFT = 4
+INPUT_RIGHT = 8
+INPUT_BOMB = 16
+INPUT_DETONATE = 32
+INPUT_SWITCH = 64
+
+# Step direction per movement bit, checked in this order
+INPUT_MOVES = ((INPUT_UP, (0, -1)), (INPUT_DOWN, (0, 1)), (INPUT_LEFT, (-1, 0)), (INPUT_RIGHT, (1, 0)))
+
+# Bits that act once when pressed rather than while held
+INPUT_ACTIONS = INPUT_BOMB | INPUT_DETONATE | INPUT_SWITCH
+
+def copy_object(cls, fields):
+    """A new instance of cls with the given attributes, without calling __init__"""
+    obj = cls.__new__(cls)
+    obj.__dict__.update(fields)
+    return obj
+
+def ai_difficulty_name(difficulty):
+    """EnemyAI difficulty level for a difficulty setting"""
+    return difficulty["name"]
+
+def spawn_points(grid_size):
+    """Player start tiles, one corner per player"""
+    far = grid_size - 2 if grid_size % 2 else grid_size - 3  # Even indexes inside the border are pillars
+    return [(1, 1), (far, far), (far, 1), (1, far)]
+
+class HeadlessAssets:
+    """Stand-in for GameAssets without images or sound"""
+
+    def __getattr__(self, name):
+        if name.endswith("_img"):
+            return None
+        raise AttributeError(name)
+
+    def play_sound(self, sound_name):
+        pass
+
+class SimPlayer(Player):
+    """A player moved by input bits instead of key events"""
+
+    def __init__(self, player_id, x, y):
+        super().__init__(x, y, None)
+        self.id = player_id
+        self.alive = True
+        self.score = 0
+        self.move_cooldown = 0  # Frames until the next step, see input.repeat_frames
+        self.last_input = 0
+
+    def apply_input(self, bits, world):
+        """Act on one tick of input: actions on the press, movement while held"""
+        pressed = bits & ~self.last_input
+        self.last_input = bits
+
+        if pressed & INPUT_BOMB:
+            self.place_bomb(world)
+        if pressed & INPUT_DETONATE:
+            self.detonate_remote_bombs(world)
+        if pressed & INPUT_SWITCH:
+            self.switch_bomb_type()
+
+        if self.move_cooldown > 0:
+            self.move_cooldown -= 1
+            if self.move_cooldown > 0:
+                return
+        for bit, (dx, dy) in INPUT_MOVES:
+            if bits & bit:
+                self.move(dx, dy, world)
+                self.move_cooldown = repeat_frames(self)
+                break
+
+class Simulation(BombRules):
+    """The game rules without display, sound or a single local player.
+
+    Used by the network server as the authoritative world. Enemies hunt the
+    nearest living player; bombs, blasts and pickups follow the same
+    rules.BombRules as GameController. Levels, enemy spawns and traits are built from the seed
+    (see level_pregen.prepare_level), later levels and drops during play
+    from self.rng, so the global random module is left alone. Enemy AI
+    decisions still use it, as they do in the game.
+    """
+
+    def __init__(self, difficulty=Difficulty.NORMAL, seed=0, players=2, enemies=True):
+        self.difficulty = difficulty
+        self.grid_size = difficulty["size"]
+        self.ai_difficulty = ai_difficulty_name(difficulty)
+        self.rng = random.Random(seed)
+        self.assets = HeadlessAssets()
+        self.with_enemies = enemies
+        self.tick = 0
+        self.level_cleared = False
+        self.next_id = 1  # Ids for bombs, enemies and power-ups, see assign_ids
+
+        self.prepared = prepare_level(difficulty, seed)  # Spawns and traits for create_enemies
+        self.map = Map(difficulty, self.assets, prepared=self.prepared)
+        self.grid = self.map.grid
+        self.blast_table = self.map.blast_table
+        self.seen_map_version = self.map.version
+
+        self.players = {}
+        self.player = None  # The player the enemy being updated is hunting
+        for player_id in range(1, players + 1):
+            self.add_player(player_id)
+
+        self.enemies = []
+        self.bombs = []
+        self.explosions = []
+        self.powerup_manager = PowerUpManager(self.assets)
+        self.flow_field = FlowField()
+        self.utility_maps = UtilityMaps()
+        if enemies:
+            self.create_enemies()
+        self.assign_ids()
+
+    def add_player(self, player_id):
+        """Add a player at the next free start corner"""
+        x, y = spawn_points(self.grid_size)[(player_id - 1) % 4]
+        player = SimPlayer(player_id, x, y)
+        self.players[player_id] = player
+        self.clear_start(player)
+        return player
+
+    def clear_start(self, player):
+        """Remove destructible walls on and next to a player's start tile.
+
+        Map generation only keeps the top left corner free.
+        """
+        for dx, dy in ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)):
+            x, y = player.x + dx, player.y + dy
+            if self.grid[y][x] == DESTRUCTIBLE:
+                self.map.set_tile(x, y, EMPTY)
+
+    def create_enemies(self):
+        """Spawn the difficulty's enemies with AI at the spawns of the prepared level"""
+        self.enemies = []
+        for (x, y), traits in zip(self.prepared.spawns, self.prepared.traits):
+            enemy = Enemy(x, y, None)
+            enemy.ai = EnemyAI(enemy, self.ai_difficulty, traits)
+            self.enemies.append(enemy)
+
+    def living_players(self):
+        return [player for player in self.players.values() if player.alive]
+
+    def assign_ids(self):
+        """Give new bombs, enemies and power-ups a net_id so snapshots can track them"""
+        for obj in self.bombs + self.enemies + self.powerup_manager.powerups:
+            if getattr(obj, 'net_id', None) is None:
+                obj.net_id = self.next_id
+                self.next_id = self.next_id % 65535 + 1
+
+    def step(self, inputs):
+        """Advance one tick; inputs maps player ids to input bits"""
+        self.tick += 1
+        living = self.living_players()
+
+        for player in living:
+            player.apply_input(inputs.get(player.id, 0), self)
+            player.update()
+
+        self.update_bombs()
+        self.powerup_manager.update()
+
+        living = self.living_players()
+        if living and self.enemies:
+            self.update_enemies(living)
+
+        for player in living:
+            self.pick_up_skills(player)
+        self.burn_players(living)
+
+        if self.level_cleared:
+            self.next_level()
+        self.assign_ids()
+
+    def save_state(self):
+        """Everything step changes, detached from the live objects.
+
+        Cheap enough to call every tick for rollback. Enemies and their AI
+        are not covered, so this needs a simulation without enemies.
+        """
+        if self.enemies:
+            raise ValueError("save_state does not cover enemies, use Simulation(enemies=False)")
+        bomb_index = {id(bomb): i for i, bomb in enumerate(self.bombs)}
+
+        players = []
+        for player in self.players.values():
+            fields = player.__dict__.copy()
+            fields["bomb_types"] = tuple(player.bomb_types)
+            fields["remote_bombs"] = tuple(bomb_index[id(bomb)] for bomb in player.remote_bombs
+                                           if id(bomb) in bomb_index)
+            players.append(fields)
+
+        bombs = []
+        for bomb in self.bombs:
+            fields = bomb.__dict__.copy()
+            fields["owner"] = bomb.owner.id if isinstance(bomb.owner, SimPlayer) else None
+            bombs.append(fields)
+
+        return {
+            "tick": self.tick,
+            "next_id": self.next_id,
+            "level_cleared": self.level_cleared,
+            "rng": self.rng.getstate(),
+            "grid": tuple(tuple(row) for row in self.grid),
+            "reach": tuple(tuple(reach) for reach in self.blast_table.reach),
+            "skills": tuple(self.map.skills),  # Only ever removed, never changed
+            "map_version": (self.map.version, self.map.base_version, len(self.map.change_log)),
+            "players": players,
+            "bombs": bombs,
+            "explosions": [explosion.__dict__.copy() for explosion in self.explosions],
+            "powerups": [powerup.__dict__.copy() for powerup in self.powerup_manager.powerups],
+        }
+
+    def load_state(self, state):
+        """Go back to a state from save_state; the state can be loaded again later"""
+        self.tick = state["tick"]
+        self.next_id = state["next_id"]
+        self.level_cleared = state["level_cleared"]
+        self.rng.setstate(state["rng"])
+
+        self.map.grid = [list(row) for row in state["grid"]]
+        self.grid = self.map.grid
+        self.blast_table.grid = self.grid
+        self.blast_table.reach = [list(reach) for reach in state["reach"]]
+        self.map.skills = list(state["skills"])
+        self.map.version, self.map.base_version, log_length = state["map_version"]
+        del self.map.change_log[log_length:]
+
+        self.players = {}
+        for fields in state["players"]:
+            player = copy_object(SimPlayer, fields)
+            player.bomb_types = list(fields["bomb_types"])
+            self.players[player.id] = player
+
+        self.bombs = []
+        for fields in state["bombs"]:
+            bomb = copy_object(Bomb, fields)
+            bomb.owner = self.players.get(fields["owner"])
+            self.bombs.append(bomb)
+        for player in self.players.values():
+            player.remote_bombs = [self.bombs[i] for i in player.remote_bombs]
+
+        self.explosions = [copy_object(Explosion, fields) for fields in state["explosions"]]
+        self.powerup_manager.powerups = [copy_object(PowerUp, fields) for fields in state["powerups"]]
+
+    def update_enemies(self, living):
+        """Run enemy AI against the nearest living player"""
+        self.flow_field.update(self.grid, self.grid_size, self.bombs,
+                               [(player.x, player.y) for player in living], self.map.version)
+        self.utility_maps.update(self.grid, self.grid_size, self.bombs,
+                                 self.powerup_manager.powerups, self.map.version)
+
+        changed_tiles = self.map.changes_since(self.seen_map_version) or []
+        self.seen_map_version = self.map.version
+
+        for enemy in self.enemies[:]:
+            if changed_tiles:
+                enemy.ai.notify_tiles_changed(changed_tiles)
+            self.player = min(living, key=lambda player: abs(player.x - enemy.x) + abs(player.y - enemy.y))
+            enemy.ai.update(self)
+        self.player = None
+
+    def players_at(self, x, y):
+        """Living players on a tile"""
+        return [player for player in self.living_players() if player.x == x and player.y == y]
+
+    def damage_player(self, player, damage=1, effect=None):
+        if player.hit(damage, effect):
+            player.alive = False
+
+    def bomb_exploded(self, bomb):
+        """A new level once the enemies are gone, started at the end of the tick"""
+        if self.with_enemies and not self.enemies and not self.level_cleared:
+            self.level_cleared = True
+            self.add_score(bomb, 500)
+
+    def enemy_killed(self, enemy, bomb):
+        self.add_score(bomb, 100)
+
+    def wall_destroyed(self, x, y, bomb):
+        self.add_score(bomb, 10)
+
+    def skill_picked(self, player, skill):
+        player.score += 50
+
+    def add_score(self, bomb, points):
+        """Credit points to the player who placed a bomb"""
+        if isinstance(bomb.owner, SimPlayer):
+            bomb.owner.score += points
+
+    def next_level(self):
+        """Generate a new map and enemies, players back at their corners"""
+        self.level_cleared = False
+        self.prepared = prepare_level(self.difficulty, self.rng.getrandbits(32))
+        self.map.install(self.prepared)
+        self.grid = self.map.grid
+        self.bombs = []
+        self.explosions = []
+        self.powerup_manager.powerups = []
+        for player in self.players.values():
+            player.x, player.y = spawn_points(self.grid_size)[(player.id - 1) % 4]
+            player.remote_bombs = []
+            self.clear_start(player)
+        self.create_enemies()
@@ -0,0 +1,203 @@
+"""
+Procedurally synthesized sound effects, cached on disk, and a voice manager for playing them
+"""
+import math
+import os
+import wave
+import pygame
+try:
+    import numpy as np
+except ImportError:  # The game stays silent without NumPy
+    np = None
+
+# Bump when a synthesizer changes so stale cached files are not used
+SYNTH_VERSION = 1
+
+# Where generated sounds are kept between runs
+SOUND_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "robot-bomberman", "sounds")
+
+# Simultaneous instances per sound; the oldest one fades out to make room
+VOICE_LIMITS = {"explosion": 4, "pickup": 2, "freeze": 2, "place": 2}
+DEFAULT_VOICE_LIMIT = 2
+
+# Requests this soon after an instance started are folded into it
+MERGE_MS = 80
+
+# Extra gain per doubling of requests merged into one instance
+BURST_GAIN = 0.15
+
+# Fade for instances cut to make room
+STEAL_FADE_MS = 60
+
+def envelope(length, attack, decay_rate):
+    """Linear attack then exponential decay"""
+    t = np.arange(length, dtype=np.float32)
+    env = np.exp(-t * decay_rate)
+    if attack > 0:
+        env[:attack] *= np.linspace(0.0, 1.0, attack, dtype=np.float32)
+    return env
+
+def smooth(samples, width):
+    """Moving average, a cheap low-pass filter"""
+    if width <= 1:
+        return samples
+    kernel = np.ones(width, dtype=np.float32) / width
+    return np.convolve(samples, kernel, mode="same").astype(np.float32)
+
+def tone(frequencies, rate):
+    """Sine following a per-sample frequency curve"""
+    phase = np.cumsum(frequencies * (2 * math.pi / rate))
+    return np.sin(phase).astype(np.float32)
+
+def synth_explosion(rate, rng):
+    """Filtered noise burst over a falling low thump"""
+    length = int(rate * 0.9)
+    noise = smooth(rng.uniform(-1, 1, length).astype(np.float32), max(1, rate // 2500))
+    rumble = smooth(rng.uniform(-1, 1, length).astype(np.float32), max(1, rate // 400)) * 4
+    thump = tone(np.linspace(110, 35, length, dtype=np.float32), rate)
+    return (noise * envelope(length, rate // 500, 9.0 / rate) * 0.6 +
+            rumble * envelope(length, rate // 200, 4.0 / rate) * 0.5 +
+            thump * envelope(length, rate // 300, 7.0 / rate) * 0.7)
+
+def synth_pickup(rate, rng):
+    """Two quick rising notes"""
+    note = int(rate * 0.07)
+    samples = []
+    for frequency in (880, 1320):
+        wave_part = np.sign(tone(np.full(note, frequency, dtype=np.float32), rate)) * 0.35
+        samples.append(wave_part * envelope(note, rate // 1000, 25.0 / rate))
+    return np.concatenate(samples)
+
+def synth_freeze(rate, rng):
+    """Shimmering high tone sliding down with a breath of noise"""
+    length = int(rate * 0.6)
+    t = np.arange(length, dtype=np.float32) / rate
+    frequencies = np.linspace(2400, 1200, length, dtype=np.float32) * (1 + 0.03 * np.sin(2 * math.pi * 18 * t))
+    shimmer = tone(frequencies, rate) * 0.4 + tone(frequencies * 1.5, rate) * 0.2
+    hiss = (rng.uniform(-1, 1, length).astype(np.float32) -
+            smooth(rng.uniform(-1, 1, length).astype(np.float32), 8)) * 0.1
+    return (shimmer + hiss) * envelope(length, rate // 100, 6.0 / rate)
+
+def synth_place(rate, rng):
+    """Short low knock"""
+    length = int(rate * 0.12)
+    knock = tone(np.linspace(220, 90, length, dtype=np.float32), rate)
+    click = smooth(rng.uniform(-1, 1, length).astype(np.float32), 4) * envelope(length, 0, 120.0 / rate)
+    return (knock * 0.7 + click * 0.3) * envelope(length, rate // 2000, 30.0 / rate)
+
+SYNTHESIZERS = {
+    "explosion": synth_explosion,
+    "pickup": synth_pickup,
+    "freeze": synth_freeze,
+    "place": synth_place,
+}
+
+def to_pcm16(samples):
+    """Float samples in -1..1 as 16-bit integers"""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+def cache_path(name, rate):
+    """Cache file of a sound at a sample rate"""
+    return os.path.join(SOUND_CACHE_DIR, f"{name}-v{SYNTH_VERSION}-{rate}.wav")
+
+def write_wav(path, pcm, rate):
+    """Save mono 16-bit samples, ignoring an unwritable cache"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with wave.open(temp_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes(pcm.tobytes())
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+
+def make_sound(pcm):
+    """A mixer Sound from mono 16-bit samples, in the mixer's own format"""
+    _, size, channels = pygame.mixer.get_init()
+    samples = pcm
+    if size == -8:
+        samples = (pcm >> 8).astype(np.int8)
+    elif size == 8:
+        samples = ((pcm >> 8) + 128).astype(np.uint8)
+    elif size == 16:
+        samples = (pcm.astype(np.int32) + 32768).astype(np.uint16)
+    elif size == 32:
+        samples = pcm.astype(np.float32) / 32768
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(samples))
+
+def load_synth_sounds(seed=7):
+    """Every synthesized sound for the current mixer, from the disk cache when possible.
+
+    Returns an empty dict when the mixer is not available or NumPy is missing.
+    """
+    if np is None or not pygame.mixer.get_init():
+        return {}
+    rate = pygame.mixer.get_init()[0]
+    sounds = {}
+    for name, synthesize in SYNTHESIZERS.items():
+        path = cache_path(name, rate)
+        if os.path.exists(path):
+            try:
+                sounds[name] = pygame.mixer.Sound(path)
+                continue
+            except pygame.error:
+                pass  # Damaged file, synthesize it again
+        pcm = to_pcm16(synthesize(rate, np.random.default_rng(seed)))
+        write_wav(path, pcm, rate)
+        sounds[name] = make_sound(pcm)
+    return sounds
+
+class VoiceManager:
+    """Plays sounds with a cap on simultaneous instances per sound.
+
+    Requests are collected during a frame and played by flush. Requests for
+    the same sound in one frame, or right after an instance of it started,
+    become one louder instance, so a chain of explosions does not take over
+    every mixer channel.
+    """
+
+    def __init__(self, sounds):
+        self.sounds = sounds
+        self.pending = {}  # Requests this frame by sound name
+        self.voices = {}  # Channels playing each sound, oldest first
+        self.last_start = {}  # Tick the newest instance of each sound started
+
+    def request(self, name):
+        """Ask for a sound to be played on the next flush"""
+        if name in self.sounds:
+            self.pending[name] = self.pending.get(name, 0) + 1
+
+    def flush(self, enabled=True, volume=1.0, now=None):
+        """Play this frame's requests"""
+        if not self.pending:
+            return
+        if not enabled:
+            self.pending.clear()
+            return
+        if now is None:
+            now = pygame.time.get_ticks()
+
+        for name, count in self.pending.items():
+            sound = self.sounds[name]
+            gain = min(1.0, volume * (1 + BURST_GAIN * math.log2(count)))
+            voices = [channel for channel in self.voices.get(name, [])
+                      if channel.get_busy() and channel.get_sound() is sound]
+
+            if voices and now - self.last_start.get(name, now) < MERGE_MS:
+                # Part of a burst that just started, make that instance louder
+                voices[-1].set_volume(min(1.0, max(voices[-1].get_volume(), gain) * (1 + BURST_GAIN)))
+            else:
+                if len(voices) >= VOICE_LIMITS.get(name, DEFAULT_VOICE_LIMIT):
+                    voices.pop(0).fadeout(STEAL_FADE_MS)
+                channel = sound.play()
+                if channel is not None:
+                    channel.set_volume(gain)
+                    voices.append(channel)
+                    self.last_start[name] = now
+            self.voices[name] = voices
+        self.pending.clear()
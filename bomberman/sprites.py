@@ -1,10 +1,29 @@
 """
 Sprite classes for the Bomberman game
 """
+import itertools
 import pygame
 import random
 from .constants import *
 
+# Scaled copies of images, keyed by (image, size, smooth)
+scaled_images = {}
+
+def scale_image(image, size, smooth=False, cache=True):
+    """Scaled copy of an image, cached so animations reuse earlier frames"""
+    key = (image, size, smooth)
+    scaled = scaled_images.get(key) if cache else None
+    if scaled is None:
+        if smooth and image.get_bitsize() >= 24:
+            scaled = pygame.transform.smoothscale(image, (size, size))
+        else:
+            scaled = pygame.transform.scale(image, (size, size))
+        if cache:
+            if len(scaled_images) > 512:
+                scaled_images.clear()
+            scaled_images[key] = scaled
+    return scaled
+
 class Player:
     def __init__(self, x, y, image):
         self.x = x
@@ -40,7 +59,11 @@ class Player:
             
             # Check for power-up collision
             if hasattr(game, 'powerup_manager'):
-                game.powerup_manager.check_collision(self)
+                powerup = game.powerup_manager.check_collision(self)
+                if powerup:
+                    game.assets.play_sound("pickup")
+                    if hasattr(game, 'events'):
+                        game.events.publish("powerup_picked", powerup.x, powerup.y, powerup.type)
     
     def place_bomb(self, game):
         # Check if player already has max bombs placed
@@ -70,6 +93,8 @@ class Player:
             self.remote_bombs.append(bomb)
         
         game.bombs.append(bomb)
+        if hasattr(game, 'events'):
+            game.events.publish("bomb_placed", 0, self.x, self.y, bomb.bomb_type, bomb.range, bomb.is_remote)
         return True
     
     def switch_bomb_type(self):
@@ -194,7 +219,10 @@ class Player:
             screen.blit(immune_surf, (self.x * TILE_SIZE, self.y * TILE_SIZE))
 
 class Enemy:
+    serials = itertools.count(1)  # Stable enemy numbers for events and the AI worker, the player is 0 in events
+    
     def __init__(self, x, y, image):
+        self.serial = next(Enemy.serials)
         self.x = x
         self.y = y
         self.image = image
@@ -253,7 +281,7 @@ class Enemy:
         
         # On harder difficulties, enemies can use different bomb types
         if hasattr(game, 'difficulty'):
-            if game.difficulty == Difficulty.HARD:
+            if game.difficulty["name"] == "HARD":
                 # On hard difficulty, enemies can use all bomb types
                 # Check if player is nearby
                 player_distance = abs(self.x - game.player.x) + abs(self.y - game.player.y)
@@ -266,7 +294,7 @@ class Enemy:
                     # Sometimes use mega bomb for larger explosions
                     bomb_type = BombType.MEGA
                     bomb_img = game.assets.mega_bomb_img
-            elif game.difficulty == Difficulty.NORMAL:
+            elif game.difficulty["name"] == "NORMAL":
                 # On normal difficulty, enemies can sometimes use ice bombs
                 if random.random() < 0.2:
                     bomb_type = BombType.ICE
@@ -277,15 +305,17 @@ class Enemy:
         
         # Set bomb range based on difficulty
         if hasattr(game, 'difficulty'):
-            if game.difficulty == Difficulty.HARD:
+            if game.difficulty["name"] == "HARD":
                 bomb.range = 3  # Longer range on hard difficulty
-            elif game.difficulty == Difficulty.NORMAL:
+            elif game.difficulty["name"] == "NORMAL":
                 bomb.range = 2  # Default range on normal
             else:
                 bomb.range = 2  # Default range on easy
         
         game.bombs.append(bomb)
         self.active_bomb = True
+        if hasattr(game, 'events'):
+            game.events.publish("bomb_placed", self.serial, self.x, self.y, bomb_type, bomb.range, False)
         return True
     
     def freeze(self):
@@ -331,7 +361,9 @@ class Bomb:
             if isinstance(self.owner, Enemy):
                 self.owner.bomb_cooldown = 120  # Cooldown before placing another bomb
     
-    def draw(self, screen):
+    def draw(self, screen, quality=None):
+        smooth = quality["smooth_scaling"] if quality else False
+        
         # Make bomb pulse continuously
         scaled_size = int(TILE_SIZE * self.pulse_scale)
         offset = (TILE_SIZE - scaled_size) // 2
@@ -342,7 +374,7 @@ class Bomb:
             flash_img = self.image.copy()
             if self.timer % 30 < 15:  # Slow pulse for remote bombs
                 flash_img.fill((0, 100, 255, 100), special_flags=pygame.BLEND_RGBA_ADD)
-            scaled_img = pygame.transform.scale(flash_img, (scaled_size, scaled_size))
+            scaled_img = scale_image(flash_img, scaled_size, smooth, cache=False)
             
             # Draw "R" indicator for remote bomb
             font = pygame.font.SysFont('Arial', 12)
@@ -355,9 +387,9 @@ class Bomb:
             if self.timer < 30 and self.timer % 10 < 5:
                 flash_img = self.image.copy()
                 flash_img.fill((255, 0, 0, 128), special_flags=pygame.BLEND_RGBA_ADD)
-                scaled_img = pygame.transform.scale(flash_img, (scaled_size, scaled_size))
+                scaled_img = scale_image(flash_img, scaled_size, smooth, cache=False)
             else:
-                scaled_img = pygame.transform.scale(self.image, (scaled_size, scaled_size))
+                scaled_img = scale_image(self.image, scaled_size, smooth)
                 
             screen.blit(scaled_img, (self.x * TILE_SIZE + offset, self.y * TILE_SIZE + offset))
 
@@ -380,15 +412,25 @@ class Explosion:
         if self.timer <= 0:
             self.finished = True
     
-    def draw(self, screen):
+    def draw(self, screen, quality=None):
         # Scale and fade the explosion
-        alpha = int(255 * (self.timer / 30))
-        scaled_size = int(TILE_SIZE * self.scale)
+        fade = self.timer / 30
+        scale = self.scale
+        smooth = False
+        if quality:
+            # Snap to the quality's number of animation frames so scaled images can be reused
+            frames = quality["animation_frames"]
+            fade = round(fade * frames) / frames
+            scale = 0.5 + round((scale - 0.5) * 2 * frames) / (2 * frames)
+            smooth = quality["smooth_scaling"]
+        
+        alpha = int(255 * fade)
+        scaled_size = int(TILE_SIZE * scale)
         offset = (TILE_SIZE - scaled_size) // 2
         
-        img_copy = pygame.transform.scale(self.image, (scaled_size, scaled_size))
-        img_copy.set_alpha(alpha)
-        screen.blit(img_copy, (self.x * TILE_SIZE + offset, self.y * TILE_SIZE + offset))
+        img = scale_image(self.image, scaled_size, smooth)
+        img.set_alpha(alpha)
+        screen.blit(img, (self.x * TILE_SIZE + offset, self.y * TILE_SIZE + offset))
 
 class BombSkill:
     def __init__(self, x, y, bomb_type, image):
@@ -0,0 +1,179 @@
+"""
+Vectorized utility maps for enemy wander and escape targets
+"""
+try:
+    import numpy as np
+except ImportError:  # EnemyAI falls back to scanning tiles in Python
+    np = None
+from .constants import *
+
+# Wander priority of a tile, higher is better
+POWERUP_VALUE = 4
+MULTI_WALL_VALUE = 3
+WALL_VALUE = 2
+OPEN_VALUE = 1
+
+# Number of best targets kept per enemy (EASY picks among the top 5)
+RANKED_TARGETS = 5
+
+class UtilityMaps:
+    """Score maps shared by all enemies, rebuilt only when the world changes.
+
+    Target selection for every enemy is done in one batch: distances, search
+    windows and scores form (enemy, y, x) arrays and the best tiles are found
+    with a partial sort. Ranking matches the tile scans in EnemyAI exactly.
+    """
+
+    def __init__(self):
+        self.enabled = np is not None
+        self.grid_size = 0
+        self.grid_version = None
+        self.empty = None  # Tiles that are EMPTY
+        self.wall_value = None  # Wander priority from adjacent destructible walls
+        self.wander_value = None  # Wander priority including power-ups, 0 for non-targets
+        self.safe = None  # Empty, bomb-free tiles no bomb is about to cover
+        self.powerup_tiles = None
+        self.bomb_signature = None
+        self.ranked = {}  # (kind, x, y, radius) -> ranked targets from the last batch
+        self.batches = 0  # Number of batched rankings (for debugging)
+
+    def update(self, grid, grid_size, bombs, powerups, grid_version):
+        """Refresh the layers whose inputs changed"""
+        if not self.enabled:
+            return
+
+        if grid_version != self.grid_version or grid_size != self.grid_size:
+            self.grid_version = grid_version
+            self.grid_size = grid_size
+            self.update_walls(grid)
+            self.powerup_tiles = None
+            self.bomb_signature = None
+
+        powerup_tiles = frozenset((powerup.x, powerup.y) for powerup in powerups)
+        if powerup_tiles != self.powerup_tiles:
+            self.powerup_tiles = powerup_tiles
+            self.update_powerups()
+
+        self.sync_bombs(bombs)
+
+    def update_walls(self, grid):
+        """Empty tiles and their destructible-wall neighbour counts"""
+        tiles = np.array(grid, dtype=np.int8)
+        self.empty = tiles == EMPTY
+
+        walls = (tiles == DESTRUCTIBLE).astype(np.int8)
+        adjacent = np.zeros_like(walls)
+        adjacent[1:, :] += walls[:-1, :]
+        adjacent[:-1, :] += walls[1:, :]
+        adjacent[:, 1:] += walls[:, :-1]
+        adjacent[:, :-1] += walls[:, 1:]
+
+        value = np.full(tiles.shape, OPEN_VALUE, dtype=np.int64)
+        value[adjacent == 1] = WALL_VALUE
+        value[adjacent > 1] = MULTI_WALL_VALUE
+        self.wall_value = np.where(self.empty, value, 0)
+
+    def update_powerups(self):
+        """Power-ups on empty tiles outrank everything else"""
+        self.wander_value = self.wall_value.copy()
+        for x, y in self.powerup_tiles:
+            if 0 <= x < self.grid_size and 0 <= y < self.grid_size and self.empty[y, x]:
+                self.wander_value[y, x] = POWERUP_VALUE
+        self.ranked = {}
+
+    def sync_bombs(self, bombs):
+        """Recompute the safe layer if bombs were placed, exploded or became imminent"""
+        bomb_tiles = frozenset((bomb.x, bomb.y) for bomb in bombs)
+        # Only bombs exploding within the next second make tiles unsafe (see is_tile_in_danger)
+        imminent = frozenset((bomb.x, bomb.y, getattr(bomb, 'range', 2))
+                             for bomb in bombs if bomb.timer <= 60)
+        signature = (bomb_tiles, imminent)
+        if signature == self.bomb_signature:
+            return False
+
+        self.bomb_signature = signature
+        self.bomb_tiles = bomb_tiles
+        self.imminent = imminent
+        self.safe = None  # Built on first escape query, needs the blast table
+        self.ranked = {}
+        return True
+
+    def update_safe(self, blast_table):
+        """Empty tiles without a bomb that no imminent blast covers"""
+        safe = self.empty.copy()
+        for x, y in self.bomb_tiles:
+            safe[y, x] = False
+        for x, y, bomb_range in self.imminent:
+            for tx, ty in blast_table.covered_tiles(x, y, bomb_range):
+                safe[ty, tx] = False
+        self.safe = safe
+
+    def wander_targets(self, game, ai):
+        """Best wander targets as (x, y, priority), best first"""
+        self.sync_bombs(game.bombs)
+        return self.targets(game, ai, "wander", ai.wander_radius)
+
+    def escape_targets(self, game, ai):
+        """Closest safe tiles as (x, y, distance), closest first"""
+        self.sync_bombs(game.bombs)
+        if self.safe is None:
+            self.update_safe(game.blast_table)
+        return self.targets(game, ai, "escape", ai.escape_radius)
+
+    def targets(self, game, ai, kind, radius):
+        """Look up the ranking for an enemy, ranking all enemies together on a miss"""
+        key = (kind, ai.enemy.x, ai.enemy.y, radius)
+        if key not in self.ranked:
+            queries = {key}
+            for enemy in getattr(game, 'enemies', ()):
+                if enemy.ai:
+                    enemy_radius = enemy.ai.wander_radius if kind == "wander" else enemy.ai.escape_radius
+                    queries.add((kind, enemy.x, enemy.y, enemy_radius))
+            self.rank(kind, [query for query in queries if query not in self.ranked])
+        return self.ranked[key]
+
+    def rank(self, kind, queries):
+        """Score every tile for every query position and keep the best few"""
+        size = self.grid_size
+        tile_count = size * size
+        self.batches += 1
+
+        xs = np.array([query[1] for query in queries])[:, None, None]
+        ys = np.array([query[2] for query in queries])[:, None, None]
+        radii = np.array([query[3] for query in queries])[:, None, None]
+        coords = np.arange(size)
+
+        dx = np.abs(coords[None, None, :] - xs)  # (queries, 1, size)
+        dy = np.abs(coords[None, :, None] - ys)  # (queries, size, 1)
+        distance = dx + dy
+        in_window = (np.maximum(dx, dy) <= radii) & (distance > 0)
+
+        if kind == "wander":
+            value = np.where(in_window, self.wander_value[None], 0)
+        else:
+            value = (in_window & self.safe[None]).astype(np.int64)
+
+        # Priority first, then distance, then scan order (row by row) to break ties
+        tie_break = (tile_count - 1 - np.arange(tile_count)).reshape(size, size)
+        score = (value * (4 * size) - distance) * tile_count + tie_break[None]
+        score = np.where(value > 0, score, -1).reshape(len(queries), tile_count)
+
+        count = min(RANKED_TARGETS, tile_count)
+        best = np.argpartition(score, tile_count - count, axis=1)[:, tile_count - count:]
+        best_scores = np.take_along_axis(score, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+        for row, query in enumerate(queries):
+            _, qx, qy, _ = query
+            targets = []
+            for index, tile_score in zip(best[row].tolist(), best_scores[row].tolist()):
+                if tile_score < 0:
+                    break
+                x, y = index % size, index // size
+                if kind == "wander":
+                    targets.append((x, y, int(self.wander_value[y, x])))
+                else:
+                    targets.append((x, y, abs(x - qx) + abs(y - qy)))
+            self.ranked[query] = targets
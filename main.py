@@ -1,8 +1,112 @@
 """
 Main entry point for Bomberman game
 """
+import argparse
 from bomberman import GameController
+from bomberman.frame_pacing import PACING_MODES
+from bomberman.benchmark import BENCHMARK_DIFFICULTIES, FrameBenchmark, format_report
+from bomberman.scenarios import SCENARIOS, ScenarioBuilder
+from bomberman.netplay import DEFAULT_PORT, GameServer, run_loopback, format_loopback_report
+from bomberman.rollback import run_local_match, format_match_report
+from bomberman.levels import load_level, write_pack
+from bomberman.map_fairness import (analyze_seeds, criteria_for, fair_seeds, format_fairness_report,
+                                    read_seed_list, write_seed_list)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Robot Bomberman")
+    parser.add_argument("--pacing", choices=PACING_MODES,
+                        help="frame pacing mode (default: vsync setting)")
+    parser.add_argument("--benchmark", type=int, nargs="?", const=1200, metavar="FRAMES",
+                        help="play a fixed scripted scenario and report frame times")
+    parser.add_argument("--seed", type=int, default=1234, help="benchmark scenario seed")
+    parser.add_argument("--difficulty", choices=list(BENCHMARK_DIFFICULTIES), default="HARD",
+                        help="benchmark or scenario difficulty")
+    parser.add_argument("--scenario", choices=SCENARIOS,
+                        help="start from a worst-case stress scenario")
+    parser.add_argument("--level", metavar="FILE",
+                        help="play a hand-built level from an ASCII level file or a level pack")
+    parser.add_argument("--level-index", default="0", metavar="INDEX",
+                        help="level to play from a pack, by position or name")
+    parser.add_argument("--build-pack", nargs="+", metavar=("PACK", "LEVEL"),
+                        help="write the given level files into a level pack and exit")
+    parser.add_argument("--quality", choices=["LOW", "MEDIUM", "HIGH"],
+                        help="fixed graphics quality (turns adaptive quality off)")
+    parser.add_argument("--server", type=int, nargs="?", const=DEFAULT_PORT, metavar="PORT",
+                        help="run a headless multiplayer server")
+    parser.add_argument("--bots", type=int, default=0,
+                        help="with --server, let this many local bots play over loopback and report bandwidth")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the loopback bot match")
+    parser.add_argument("--rollback-test", action="store_true",
+                        help="play a rollback versus match between two local bot processes")
+    parser.add_argument("--latency", type=int, default=60, metavar="MS",
+                        help="one-way delay added to the rollback test link")
+    parser.add_argument("--loss", type=float, default=0.05, help="packet loss rate of the rollback test link")
+    parser.add_argument("--event-log", metavar="FILE",
+                        help="log gameplay events to FILE, JSON Lines if it ends in .jsonl, binary otherwise")
+    parser.add_argument("--fairness", type=int, metavar="COUNT",
+                        help="score COUNT generated maps from --seed on, on all cores")
+    parser.add_argument("--seed-list", metavar="FILE",
+                        help="where --fairness writes the fair seeds; otherwise generated levels are drawn from it")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    game = GameController()
-    # The game loop is handled inside the GameController class
\ No newline at end of file
+    args = parse_args()
+
+    if args.build_pack:
+        pack_path, *level_paths = args.build_pack
+        write_pack(pack_path, [load_level(path) for path in level_paths])
+        print(f"Wrote {len(level_paths)} levels to {pack_path}")
+    elif args.fairness:
+        difficulty = BENCHMARK_DIFFICULTIES[args.difficulty]
+        results = analyze_seeds(difficulty, args.seed, args.fairness)
+        criteria = criteria_for(difficulty)
+        seeds = fair_seeds(results, criteria)
+        print(format_fairness_report(difficulty, results, seeds, criteria))
+        if args.seed_list:
+            write_seed_list(args.seed_list, difficulty, seeds)
+            print(f"Wrote {len(seeds)} seeds to {args.seed_list}")
+    elif args.rollback_test:
+        print(format_match_report(run_local_match(args.seconds, args.latency, loss=args.loss,
+                                                  difficulty=BENCHMARK_DIFFICULTIES[args.difficulty],
+                                                  seed=args.seed)))
+    elif args.server is not None:
+        difficulty = BENCHMARK_DIFFICULTIES[args.difficulty]
+        if args.bots:
+            print(format_loopback_report(run_loopback(args.bots, args.seconds, difficulty, args.seed, args.server)))
+        else:
+            server = GameServer(port=args.server, difficulty=difficulty, seed=args.seed)
+            print(f"Serving on port {server.address[1]}")
+            server.run()
+    elif args.benchmark:
+        game = GameController(show_menu=False)
+        game.config.frame_pacing = args.pacing or "uncapped"
+        # Keep quality fixed so runs are comparable
+        game.config.adaptive_quality = False
+        if args.quality:
+            game.config.set_graphics_quality(args.quality)
+        if args.event_log:
+            game.events.open_log(args.event_log)
+        benchmark = FrameBenchmark(game, args.benchmark, args.seed,
+                                   BENCHMARK_DIFFICULTIES[args.difficulty], args.scenario)
+        print(format_report(benchmark.run()))
+        game.events.close()
+    else:
+        game = GameController(show_menu=False)
+        if args.pacing:
+            game.config.frame_pacing = args.pacing
+        if args.quality:
+            game.config.set_graphics_quality(args.quality)
+            game.config.adaptive_quality = False
+        if args.seed_list:
+            name, seeds = read_seed_list(args.seed_list)
+            game.level_pregen.seeds[name] = seeds
+        if args.event_log:
+            game.events.open_log(args.event_log)
+        if args.scenario:
+            ScenarioBuilder(game, args.seed).build(args.scenario, BENCHMARK_DIFFICULTIES[args.difficulty])
+            game.game_loop()
+        elif args.level:
+            game.start_game(load_level(args.level, args.level_index))
+        else:
+            # The game loop is handled inside the GameController class
+            game.show_difficulty_selection()
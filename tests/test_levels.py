@@ -0,0 +1,116 @@
+"""
+Level files: binary and ASCII round trips, packs, and damaged data
+"""
+import os
+import random
+from bomberman.constants import *
+from bomberman.map import generate_many
+from bomberman.levels import (Level, LEVEL_HEADER, encode_level, decode_level, parse_ascii, format_ascii,
+                              write_pack, LevelPack, load_level)
+
+LEVELS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "levels")
+
+def generated_levels(count=10, seed=0):
+    levels = []
+    for difficulty in (Difficulty.EASY, Difficulty.NORMAL, Difficulty.HARD):
+        levels.extend(generate_many(count, seed, difficulty))
+    return levels
+
+def crossroads():
+    with open(os.path.join(LEVELS_DIR, "crossroads.txt")) as f:
+        return parse_ascii(f.read())
+
+def assert_same_level(a, b, any_order=False):
+    """Same level; with any_order spawns and skills may come in another order (ASCII keeps map order)"""
+    arrange = sorted if any_order else list
+    assert (a.name, a.size, a.tiles, a.player_start, a.ai) == (b.name, b.size, b.tiles, b.player_start, b.ai)
+    assert arrange(a.enemy_spawns) == arrange(b.enemy_spawns)
+    assert arrange(a.skills) == arrange(b.skills)
+    assert [power_type for power_type, _ in a.powerups] == [power_type for power_type, _ in b.powerups]
+    for (_, weight_a), (_, weight_b) in zip(a.powerups, b.powerups):
+        assert abs(weight_a - weight_b) < 0.001
+
+def test_binary_round_trip():
+    for level in generated_levels() + [crossroads()]:
+        data = encode_level(level)
+        decoded = decode_level(data)
+        assert_same_level(decoded, level)
+        assert encode_level(decoded) == data
+
+def test_ascii_round_trip():
+    for level in generated_levels() + [crossroads()]:
+        text = format_ascii(level)
+        parsed = parse_ascii(text)
+        assert_same_level(parsed, level, any_order=True)
+        assert format_ascii(parsed) == text
+
+def test_pack_round_trip(tmp_path):
+    levels = generated_levels(5) + [crossroads()]
+    path = str(tmp_path / "levels.bmpk")
+    write_pack(path, levels)
+    with LevelPack(path) as pack:
+        assert len(pack) == len(levels)
+        for index, level in enumerate(levels):
+            assert pack.name(index) == level.name
+            assert_same_level(pack[index], level)
+        assert_same_level(pack[-1], levels[-1])
+        assert pack.find("Crossroads") == len(levels) - 1
+        assert pack.find("missing") is None
+    assert_same_level(load_level(path, "Crossroads"), levels[-1])
+    assert_same_level(load_level(path, 2), levels[2])
+
+def test_bad_pack_is_rejected(tmp_path):
+    path = str(tmp_path / "bad.bmpk")
+    for data in (b"", b"BMPK", b"BMPK\x01\x00\xff\xff\xff\xff", b"not a level pack at all"):
+        with open(path, "wb") as f:
+            f.write(data)
+        try:
+            LevelPack(path)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {data!r}")
+
+def test_parse_ascii_errors():
+    bad = [
+        "",
+        "name: no map",
+        "size: 7\nmap:\n#####\n#...#\n#####",
+        "map:\n#####\n#...#\n#.X.#\n#...#\n#####",
+        "map:\n#####\n#....#\n#...#\n#...#\n#####",
+        "map:\n#####\n#...#\n#...+\n#...#\n#####",
+        "ai: IMPOSSIBLE\nmap:\n#####\n#...#\n#...#\n#...#\n#####",
+        "powerups: lasers=1\nmap:\n#####\n#...#\n#...#\n#...#\n#####",
+    ]
+    for text in bad:
+        try:
+            parse_ascii(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {text!r}")
+
+def test_decode_level_fuzz():
+    # Damaged or hostile files may only fail with ValueError
+    rng = random.Random(0)
+    blobs = [encode_level(level) for level in generated_levels(3) + [crossroads()]]
+    for _ in range(3000):
+        data = bytearray(rng.choice(blobs))
+        mutation = rng.randrange(4)
+        if mutation == 0:
+            data = data[:rng.randrange(len(data))]
+        elif mutation == 1:
+            for _ in range(rng.randint(1, 6)):
+                data[rng.randrange(len(data))] = rng.randrange(256)
+        elif mutation == 2:
+            # Damage the header, where counts and sizes live
+            for _ in range(rng.randint(1, 3)):
+                data[rng.randrange(LEVEL_HEADER.size)] = rng.randrange(256)
+        else:
+            data = bytes(LEVEL_HEADER.pack(b"BMLV", 1, *(rng.randrange(256) for _ in range(4)),
+                                           rng.randrange(65536), rng.randrange(65536),
+                                           rng.randrange(256), rng.randrange(256)))
+            data += rng.randbytes(rng.randrange(400))
+        try:
+            level = decode_level(bytes(data))
+        except ValueError:
+            continue
+        assert isinstance(level, Level)
@@ -0,0 +1,30 @@
+"""
+Regression checks for the tree-search enemy controller
+"""
+from types import SimpleNamespace
+from bomberman.constants import *
+from bomberman.blast_table import BlastTable
+from bomberman.mcts import MCTSController, DOWN
+
+def open_grid(size):
+    """Border and pillar walls only"""
+    return [[WALL if x in (0, size - 1) or y in (0, size - 1) or (x % 2 == 0 and y % 2 == 0) else EMPTY
+             for x in range(size)] for y in range(size)]
+
+def test_escapes_bomb_about_to_explode():
+    # The bomb at (1, 1) covers the enemy's row up to x = 4; stepping down is the only way out
+    size = 9
+    grid = open_grid(size)
+    blast_table = BlastTable()
+    blast_table.rebuild(grid, size)
+
+    for seed in range(20):
+        enemy = SimpleNamespace(x=3, y=1, active_bomb=False)
+        game = SimpleNamespace(grid=grid, grid_size=size, blast_table=blast_table,
+                               player=SimpleNamespace(x=7, y=7),
+                               bombs=[SimpleNamespace(x=1, y=1, timer=10, range=3, owner=None)])
+        ai = SimpleNamespace(enemy=enemy, difficulty="NORMAL", decision_cooldown=30)
+        controller = MCTSController(budget_ms=5, seed=seed)
+        for _ in controller.think(game, ai):
+            pass
+        assert controller.choose_action(ai) == DOWN, f"seed {seed}"
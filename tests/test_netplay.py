@@ -0,0 +1,73 @@
+"""
+Snapshot deltas must rebuild the server state exactly and reject damaged packets cleanly
+"""
+import random
+import struct
+from bomberman.constants import *
+from bomberman.simulation import Simulation, INPUT_MOVES, INPUT_BOMB
+from bomberman.netplay import TABLES, encode_state, encode_delta, apply_delta
+
+def random_inputs(sim, rng, held):
+    """Movement held for a while, and the odd bomb, for every player"""
+    inputs = {}
+    for player_id in sim.players:
+        if player_id not in held or rng.random() < 0.05:
+            held[player_id] = rng.choice(INPUT_MOVES)[0]
+        bits = held[player_id]
+        if rng.random() < 0.05:
+            bits |= INPUT_BOMB
+        inputs[player_id] = bits
+    return inputs
+
+def played_states(seed, ticks, players=3):
+    """encode_state of every tick of a short random match"""
+    sim = Simulation(Difficulty.NORMAL, seed, players=players)
+    rng = random.Random(seed)
+    held = {}
+    states = []
+    for _ in range(ticks):
+        sim.step(random_inputs(sim, rng, held))
+        states.append(encode_state(sim))
+    return states
+
+def test_delta_round_trip():
+    for seed in range(5):
+        states = played_states(seed, 600)
+        assert apply_delta(None, encode_delta(None, states[0])) == states[0]
+        for base, state in zip(states, states[1:]):
+            assert apply_delta(base, encode_delta(base, state)) == state
+        # Older bases, as after lost snapshots
+        for base, state in zip(states, states[30:]):
+            assert apply_delta(base, encode_delta(base, state)) == state
+
+def test_unchanged_state_is_small():
+    state = played_states(0, 1)[0]
+    # No tile changes, then no changed and no removed entries in each table
+    assert len(encode_delta(state, state)) == 2 + 4 * len(TABLES)
+
+def test_truncated_delta_is_rejected():
+    states = played_states(1, 120)
+    for base, state in ((None, states[0]), (states[60], states[-1])):
+        data = encode_delta(base, state)
+        for length in range(len(data)):
+            try:
+                apply_delta(base, data[:length])
+            except (struct.error, IndexError):
+                continue
+            raise AssertionError(f"{length} of {len(data)} bytes accepted")
+
+def test_garbage_delta_raises_only_packet_errors():
+    # GameClient.poll drops packets that raise struct.error or IndexError; nothing else may escape
+    states = played_states(2, 60)
+    base = states[-1]
+    data = encode_delta(states[0], base)
+    rng = random.Random(2)
+    for _ in range(2000):
+        damaged = bytearray(data)
+        for _ in range(rng.randint(1, 8)):
+            damaged[rng.randrange(len(damaged))] = rng.randrange(256)
+        for candidate in (bytes(damaged), rng.randbytes(rng.randrange(64))):
+            try:
+                apply_delta(base, candidate)
+            except (struct.error, IndexError):
+                pass
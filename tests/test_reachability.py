@@ -0,0 +1,84 @@
+"""
+Incremental region labels must agree with labelling from scratch
+"""
+import random
+from types import SimpleNamespace
+from bomberman.constants import *
+from bomberman.reachability import RegionLabels
+
+class FakeMap:
+    """Just the version tracking RegionLabels.sync reads"""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.version = 0
+        self.base_version = 0
+        self.change_log = []
+
+    def set_tile(self, x, y, tile):
+        self.grid[y][x] = tile
+        self.change_log.append((x, y))
+        self.version += 1
+
+    def changes_since(self, version):
+        if version < self.base_version:
+            return None
+        return self.change_log[version - self.base_version:]
+
+def make_game(size, walls_percent, rng):
+    grid = [[WALL if x in (0, size - 1) or y in (0, size - 1) or (x % 2 == 0 and y % 2 == 0)
+             else DESTRUCTIBLE if rng.random() < walls_percent else EMPTY
+             for x in range(size)] for y in range(size)]
+    game_map = FakeMap(grid)
+    return SimpleNamespace(grid=grid, grid_size=size, bombs=[], map=game_map)
+
+def bomb(x, y):
+    return SimpleNamespace(x=x, y=y)
+
+def assert_matches_rebuild(game, labels):
+    fresh = RegionLabels()
+    fresh.rebuild(game.grid, game.grid_size, frozenset((b.x, b.y) for b in game.bombs))
+    tiles = [(x, y) for y in range(game.grid_size) for x in range(game.grid_size)]
+    incremental = {}
+    rebuilt = {}
+    for x, y in tiles:
+        assert (labels.region_of(x, y) is None) == (fresh.region_of(x, y) is None), (x, y)
+        if fresh.region_of(x, y) is not None:
+            # Same partition: region ids correspond one to one
+            assert incremental.setdefault(labels.region_of(x, y), fresh.region_of(x, y)) == fresh.region_of(x, y)
+            assert rebuilt.setdefault(fresh.region_of(x, y), labels.region_of(x, y)) == labels.region_of(x, y)
+
+def test_adjacent_bombs_in_one_sync():
+    # (4, 5) is a dead end behind (3, 5); bombs on (2, 5) and (3, 5) arrive in the same sync
+    game = make_game(9, 0.0, random.Random(0))
+    game.map.set_tile(5, 5, DESTRUCTIBLE)
+    for x, y in [(3, 4), (3, 6)]:
+        game.map.set_tile(x, y, DESTRUCTIBLE)
+    labels = RegionLabels()
+    labels.sync(game)
+
+    game.bombs = [bomb(2, 5), bomb(3, 5)]
+    labels.sync(game)
+    assert not labels.connected(1, 1, 4, 5)
+    assert_matches_rebuild(game, labels)
+
+def test_random_batches_match_rebuild():
+    rng = random.Random(1234)
+    for _ in range(30):
+        game = make_game(13, 0.3, rng)
+        labels = RegionLabels()
+        labels.sync(game)
+        for _ in range(20):
+            # A few bombs and walls change between syncs
+            for _ in range(rng.randint(1, 4)):
+                x, y = rng.randrange(1, 12), rng.randrange(1, 12)
+                if game.grid[y][x] == WALL:
+                    continue
+                if rng.random() < 0.5:
+                    game.map.set_tile(x, y, EMPTY if game.grid[y][x] == DESTRUCTIBLE else DESTRUCTIBLE)
+                elif any((b.x, b.y) == (x, y) for b in game.bombs):
+                    game.bombs = [b for b in game.bombs if (b.x, b.y) != (x, y)]
+                else:
+                    game.bombs.append(bomb(x, y))
+            labels.sync(game)
+            assert_matches_rebuild(game, labels)